@@ -0,0 +1,449 @@
+"""
+Debate system: the LangGraph workflow, its nodes and the ways to run it
+
+Kept apart from the CLI in main.py, which imports it only once a command
+actually runs a debate, so ``--help`` and argument errors stay fast.
+"""
+
+import os
+import time
+from typing import Callable, Dict
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import StateGraph, START, END
+from langgraph.types import Send
+from utils.state import DebateState, create_initial_state, new_debate_id
+from utils.archive import DebateArchive
+from utils.batch import BatchRunner
+from utils.cassette import get_cassette
+from utils.checkpoint import SqliteCheckpointSaver
+from utils.context import get_context_builder
+from utils.vector_index import get_argument_index
+from utils.repetition import get_repetition_index
+from utils.llm_client import get_llm_client
+from utils.rate_limit import get_rate_limiter
+from utils.streaming import TokenSink, use_sink
+from utils.tracing import get_tracer, trace_node, atrace_node
+from utils.logger import DebateLogger
+from utils.config import Config
+from nodes.user_input_node import UserInputNode
+from nodes.persona_agent_node import PersonaAgentNode
+from nodes.opening_node import OpeningStatementNode, OpeningCollectorNode
+from nodes.debate_controller import DebateController
+from nodes.memory_node import MemoryNode
+from nodes.judge_node import JudgeNode
+
+# Graph nodes, in the order they are added
+NODE_NAMES = ("user_input", "opening", "collect_openings", "agent", "controller", "memory", "judge")
+
+def route_openings(state: DebateState):
+    """Send one opening-statement branch per persona, or skip the opening phase"""
+    personas = state["personas"]
+    if (not Config.OPENING_STATEMENTS or len(personas) < 2
+            or state["debate_history"] or state["max_rounds"] < len(personas)):
+        return "controller"
+    
+    # Opening statements don't depend on each other, so they run concurrently
+    return [Send("opening", {**state, "current_agent": persona}) for persona in personas]
+
+def route_to_agent(state: DebateState) -> str:
+    """Determine which node to route to based on state"""
+    
+    # If debate is complete, go to judge
+    if state["is_complete"] or state["current_agent"] is None:
+        return "judge"
+    
+    # The agent node speaks for whichever persona current_agent names
+    return "agent"
+
+def build_graph(nodes: Dict[str, Callable], checkpointer=None):
+    """Compile the debate graph over ``nodes``, a runnable per name in NODE_NAMES"""
+    # Initialize the state graph
+    workflow = StateGraph(DebateState)
+    for name in NODE_NAMES:
+        workflow.add_node(name, nodes[name])
+    
+    # Start with user input
+    workflow.add_edge(START, "user_input")
+    
+    # After user input, fan out opening statements in parallel, or go
+    # straight to the controller
+    workflow.add_conditional_edges(
+        "user_input",
+        route_openings,
+        ["opening", "controller"]
+    )
+    
+    # Once every opening branch is done, add them to the transcript
+    workflow.add_edge("opening", "collect_openings")
+    workflow.add_edge("collect_openings", "memory")
+    
+    # From controller, either the next speaker argues or the judge decides
+    workflow.add_conditional_edges(
+        "controller",
+        route_to_agent,
+        {
+            "agent": "agent",
+            "judge": "judge"
+        }
+    )
+    
+    # After each agent, update memory then back to controller
+    workflow.add_edge("agent", "memory")
+    workflow.add_edge("memory", "controller")
+    
+    # Judge ends the debate
+    workflow.add_edge("judge", END)
+    
+    # Compile the graph once; every debate reuses it with its own state.
+    # With a checkpointer, state is persisted after every node.
+    return workflow.compile(checkpointer=checkpointer)
+
+def draw_mermaid() -> str:
+    """Mermaid diagram of the debate graph
+    
+    Only the graph's shape is needed, so placeholder nodes stand in for the
+    real ones: no node, logger or LLM client is constructed.
+    """
+    def placeholder(state: DebateState) -> Dict:
+        return {}
+    
+    return build_graph({name: placeholder for name in NODE_NAMES}).get_graph().draw_mermaid()
+
+class DebateSystem:
+    def __init__(self, checkpointing: bool = None):
+        self.logger = DebateLogger()
+        self.checkpointer = None
+        if Config.CHECKPOINTING if checkpointing is None else checkpointing:
+            self.checkpointer = SqliteCheckpointSaver(Config.CHECKPOINT_PATH)
+            self.checkpointer.prune(Config.CHECKPOINT_RETENTION_SECONDS)
+        # Completed debates go to the SQLite archive, opened on the first write
+        self.archive = None
+        if Config.ARCHIVE_PATH:
+            self.archive = DebateArchive(Config.ARCHIVE_PATH, Config.ARCHIVE_BATCH_SIZE,
+                                         Config.ARCHIVE_FLUSH_INTERVAL)
+        self._initialize_nodes()
+        self._create_graph()
+    
+    def _initialize_nodes(self):
+        """Initialize all debate nodes
+        
+        Nodes are cheap to build: each gets its LLM client on first use, so
+        no SDK is loaded and no connection pool is opened until a debate runs.
+        """
+        self.user_input = UserInputNode(self.logger)
+        # One agent node speaks for every persona; whose turn it is lives in state
+        self.agent = PersonaAgentNode(self.logger)
+        self.opening = OpeningStatementNode(self.logger, self.agent)
+        self.collect_openings = OpeningCollectorNode(self.logger, self.agent)
+        self.controller = DebateController(self.logger)
+        self.memory = MemoryNode(self.logger)
+        self.judge = JudgeNode(self.logger)
+    
+    def _create_graph(self):
+        """Create the LangGraph workflow
+        
+        Each node has a sync and an async implementation, so the same
+        compiled graph serves invoke and ainvoke.
+        """
+        self.app = build_graph({name: self._as_runnable(name, getattr(self, name))
+                                for name in NODE_NAMES}, self.checkpointer)
+
+    @staticmethod
+    def _as_runnable(name: str, node) -> RunnableLambda:
+        """Wrap a node's execute/aexecute pair in a single traced runnable"""
+        return RunnableLambda(trace_node(name, node.execute),
+                              afunc=atrace_node(name, node.aexecute), name=name)
+    
+    def _run_config(self, debate_id: str, max_rounds: int = None) -> dict:
+        """Graph config for one debate; checkpoints are keyed by the debate ID"""
+        # Each argument takes three steps (controller, agent, memory), so the
+        # recursion limit grows with the debate length
+        config = {"recursion_limit": 3 * (max_rounds or Config.MAX_ROUNDS) + 20}
+        if self.checkpointer is not None:
+            config["configurable"] = {"thread_id": debate_id}
+        return config
+    
+    def _graph_input(self, topic: str, debate_id: str, resume: bool, **overrides):
+        """Initial state for a new debate, or None to continue from its last checkpoint
+        
+        ``overrides`` (personas, turn_order, max_rounds) replace the configured
+        defaults for a new debate.
+        """
+        if not resume:
+            return create_initial_state(topic, debate_id, **overrides)
+        if self.checkpointer is None:
+            raise ValueError("Resuming a debate requires checkpointing")
+        
+        snapshot = self.app.get_state(self._run_config(debate_id))
+        if not snapshot.values:
+            raise ValueError(f"No checkpoint found for debate {debate_id}")
+        self.logger.log_step("RESUME", f"Resuming debate {debate_id} "
+                             f"(round {snapshot.values['current_round']}, "
+                             f"next: {', '.join(snapshot.next) or 'done'})")
+        return None
+    
+    def _release_debate(self, debate_id: str):
+        """Drop the in-memory context, index, scheduling and usage state of one debate"""
+        get_context_builder().discard(debate_id)
+        get_argument_index().discard(debate_id)
+        get_repetition_index().discard(debate_id)
+        get_rate_limiter().discard(debate_id)
+        get_llm_client().usage.discard(debate_id)
+        cassette = get_cassette()
+        if cassette is not None:
+            cassette.discard(debate_id)
+    
+    def _finish_debate(self, debate_id: str, final_state: DebateState = None,
+                       started: float = None):
+        """Archive, record and release a finished debate; mark checkpoints complete"""
+        get_context_builder().finish(debate_id)
+        cassette = get_cassette()
+        if cassette is not None and final_state is not None:
+            cassette.finish(debate_id, final_state)
+        if self.archive is not None and final_state is not None:
+            client = get_llm_client()
+            self.archive.record(final_state, client.usage.get(debate_id),
+                                time.perf_counter() - started if started else None,
+                                client.model, Config.LLM_BACKEND)
+        self._release_debate(debate_id)
+        if self.checkpointer is not None:
+            self.checkpointer.mark_complete(debate_id)
+            self.checkpointer.prune(Config.CHECKPOINT_RETENTION_SECONDS)
+    
+    def _invoke(self, topic: str = "", debate_id: str = None,
+                token_sink: TokenSink = None, resume: bool = False,
+                console: bool = True, **overrides) -> DebateState:
+        """Run (or resume) one debate through the compiled graph with isolated state
+        
+        With ``console`` off the transcript is not printed to stdout.
+        """
+        debate_id = debate_id or new_debate_id()
+        started = time.perf_counter()
+        graph_input = self._graph_input(topic, debate_id, resume, **overrides)
+        config = self._run_config(debate_id, overrides.get("max_rounds"))
+        
+        try:
+            with use_sink(token_sink, console):
+                final_state = self.app.invoke(graph_input, config=config)
+        except BaseException:
+            # Failed or cancelled: free memory but leave checkpoints resumable
+            self._release_debate(debate_id)
+            raise
+        self._finish_debate(debate_id, final_state, started)
+        
+        # Final logging
+        self.logger.log_step("DEBATE_COMPLETE", 
+                           f"Final winner: {final_state['winner']}")
+        return final_state
+    
+    async def _ainvoke(self, topic: str = "", debate_id: str = None,
+                       token_sink: TokenSink = None, resume: bool = False,
+                       console: bool = True, **overrides) -> DebateState:
+        """Run (or resume) one debate on the event loop through the compiled graph"""
+        debate_id = debate_id or new_debate_id()
+        started = time.perf_counter()
+        graph_input = self._graph_input(topic, debate_id, resume, **overrides)
+        config = self._run_config(debate_id, overrides.get("max_rounds"))
+        
+        try:
+            with use_sink(token_sink, console):
+                final_state = await self.app.ainvoke(graph_input, config=config)
+        except BaseException:
+            # Failed or cancelled: free memory but leave checkpoints resumable
+            self._release_debate(debate_id)
+            raise
+        self._finish_debate(debate_id, final_state, started)
+        
+        self.logger.log_step("DEBATE_COMPLETE", 
+                           f"Final winner: {final_state['winner']}")
+        return final_state
+    
+    def run_debate(self, topic: str = "", token_sink: TokenSink = None,
+                   resume_id: str = None):
+        """Execute the complete debate workflow
+        
+        With STREAMING enabled, tokens are also pushed to ``token_sink``.
+        Passing ``resume_id`` continues a checkpointed debate where it stopped.
+        """
+        debate_id = resume_id or new_debate_id()
+        
+        # One log file per debate, so concurrent runs in one directory don't collide
+        with self.logger.debate(debate_id, resume=bool(resume_id)):
+            try:
+                print("Initializing Multi-Agent Debate System...")
+                self._announce_checkpointing(debate_id, resume_id)
+                
+                final_state = self._invoke(topic, debate_id, token_sink, resume=bool(resume_id))
+                
+                print(f"\n🎉 Debate completed successfully!")
+                self._report_run(final_state["debate_id"])
+                
+                return final_state
+                
+            except Exception as e:
+                error_msg = f"Debate execution failed: {str(e)}"
+                print(f"❌ {error_msg}")
+                self.logger.log_step("ERROR", error_msg)
+                return None
+    
+    async def arun_debate(self, topic: str = "", token_sink: TokenSink = None,
+                          resume_id: str = None):
+        """Execute the complete debate workflow on the running event loop"""
+        debate_id = resume_id or new_debate_id()
+        
+        # One log file per debate, so concurrent runs in one directory don't collide
+        with self.logger.debate(debate_id, resume=bool(resume_id)):
+            try:
+                print("Initializing Multi-Agent Debate System...")
+                self._announce_checkpointing(debate_id, resume_id)
+                
+                final_state = await self._ainvoke(topic, debate_id, token_sink,
+                                                  resume=bool(resume_id))
+                
+                print(f"\n🎉 Debate completed successfully!")
+                self._report_run(final_state["debate_id"])
+                
+                return final_state
+                
+            except Exception as e:
+                error_msg = f"Debate execution failed: {str(e)}"
+                print(f"❌ {error_msg}")
+                self.logger.log_step("ERROR", error_msg)
+                return None
+    
+    def _announce_checkpointing(self, debate_id: str, resume_id: str = None):
+        """Tell the user which debate ID to pass to --resume"""
+        if self.checkpointer is None:
+            return
+        if resume_id:
+            print(f"💾 Resuming debate {debate_id} from its last checkpoint")
+        else:
+            print(f"💾 Checkpointing debate {debate_id} "
+                  f"(resume with: python main.py run --resume {debate_id})")
+    
+    def _report_run(self, debate_id: str = None):
+        """Print log location, LLM usage and per-node timings; export traces
+        
+        Without ``debate_id`` (batches, tournaments) the report covers
+        every debate of the run and points at the per-debate log files.
+        """
+        self.logger.flush()
+        if debate_id:
+            print(f"📝 Full log saved to: {self.logger.log_path(debate_id)}")
+        else:
+            pattern = os.path.join(self.logger.log_dir, f"debate_<id>{self.logger.extension}")
+            print(f"📝 Per-debate logs saved to: {pattern}")
+        if self.archive is not None:
+            self.archive.flush()
+            print(f"🗄️  {self.archive.format_summary()}")
+        print(f"📊 {get_llm_client().format_summary()}")
+        cassette = get_cassette()
+        if cassette is not None:
+            print(f"📼 {cassette.format_summary()}")
+        
+        tracer = get_tracer()
+        if Config.TRACE_SUMMARY:
+            print(f"\n⏱️  Node timings:\n{tracer.format_summary(debate_id)}")
+        if Config.TRACE_EXPORT_PATH:
+            tracer.export(Config.TRACE_EXPORT_PATH)
+            print(f"📈 Traces exported to: {Config.TRACE_EXPORT_PATH}")
+    
+    async def astream_debate(self, topic: str, debate_id: str = None,
+                             token_sink: TokenSink = None, personas=None,
+                             turn_order: str = None, max_rounds: int = None,
+                             console: bool = True):
+        """Yield (node_name, state) pairs as each node of a debate finishes
+        
+        ``personas``, ``turn_order`` and ``max_rounds`` override the configured
+        defaults for this debate only.
+        """
+        debate_id = debate_id or new_debate_id()
+        started = time.perf_counter()
+        initial_state = create_initial_state(topic, debate_id, personas, turn_order, max_rounds)
+        config = self._run_config(debate_id, initial_state["max_rounds"])
+        # Updates carry only what each node changed; fold them into the final state
+        final_state = {**initial_state, "debate_history": [], "turn_metrics": []}
+        
+        try:
+            with self.logger.debate(debate_id), use_sink(token_sink, console):
+                async for update in self.app.astream(initial_state, config=config,
+                                                     stream_mode="updates"):
+                    for node_name, node_state in update.items():
+                        if isinstance(node_state, dict):
+                            self._fold_update(final_state, node_state)
+                        yield node_name, node_state
+        except BaseException:
+            # Failed or cancelled: free memory but leave checkpoints resumable
+            self._release_debate(debate_id)
+            raise
+        self._finish_debate(debate_id, final_state, started)
+    
+    @staticmethod
+    def _fold_update(state: Dict, update: Dict):
+        """Apply one node's update to ``state`` in place, appending to append-only fields"""
+        for key, value in update.items():
+            if key in ("debate_history", "turn_metrics"):
+                state[key].extend(value)
+            elif key != "opening_statements":
+                state[key] = value
+    
+    def execute_debate(self, topic: str, debate_id: str = None, **overrides) -> dict:
+        """Run one non-interactive debate with its own log and return a result record
+        
+        Nothing is printed, so records can share stdout. ``overrides``
+        (personas, turn_order, max_rounds) replace the configured defaults for
+        this debate only.
+        """
+        debate_id = debate_id or new_debate_id()
+        record = {"debate_id": debate_id, "topic": topic}
+        started = time.perf_counter()
+        
+        with self.logger.debate(debate_id) as log_file:
+            record["log_file"] = log_file
+            try:
+                final_state = self._invoke(topic, debate_id, console=False, **overrides)
+                record.update(self._result_fields(final_state))
+            except Exception as e:
+                self.logger.log_step("ERROR", f"Debate execution failed: {str(e)}")
+                record.update({"status": "error", "error": str(e)})
+        
+        record["duration_seconds"] = round(time.perf_counter() - started, 3)
+        return record
+    
+    @staticmethod
+    def _result_fields(final_state: DebateState) -> dict:
+        """Fields of a finished debate included in its result record"""
+        return {
+            "status": "ok",
+            "winner": final_state["winner"],
+            "judgment": final_state["judgment"],
+            "arguments": len(final_state["debate_history"]),
+            "turn_metrics": final_state["turn_metrics"],
+        }
+    
+    async def aexecute_debate(self, topic: str, debate_id: str = None, **overrides) -> dict:
+        """Async counterpart of execute_debate for use on a shared event loop"""
+        debate_id = debate_id or new_debate_id()
+        record = {"debate_id": debate_id, "topic": topic}
+        started = time.perf_counter()
+        
+        with self.logger.debate(debate_id) as log_file:
+            record["log_file"] = log_file
+            try:
+                final_state = await self._ainvoke(topic, debate_id, console=False,
+                                                  **overrides)
+                record.update(self._result_fields(final_state))
+            except Exception as e:
+                self.logger.log_step("ERROR", f"Debate execution failed: {str(e)}")
+                record.update({"status": "error", "error": str(e)})
+        
+        record["duration_seconds"] = round(time.perf_counter() - started, 3)
+        return record
+    
+    def run_batch(self, topics, concurrency: int = 4, output=None):
+        """Run many debates concurrently on this system's compiled graph"""
+        return BatchRunner(self, concurrency=concurrency).run(topics, output)
+    
+    async def arun_batch(self, topics, concurrency: int = 4, output=None):
+        """Run many debates concurrently on the running event loop"""
+        return await BatchRunner(self, concurrency=concurrency).arun(topics, output)
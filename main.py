@@ -4,128 +4,323 @@ Multi-Agent Debate DAG using LangGraph
 Main application file
 """
 
+import argparse
+import contextlib
+import os
 import sys
-from langgraph.graph import StateGraph, START, END
-from utils.state import DebateState, create_initial_state
-from utils.logger import DebateLogger
+import time
 from utils.config import Config
-from nodes.user_input_node import UserInputNode
-from nodes.agent_a_node import AgentANode
-from nodes.agent_b_node import AgentBNode
-from nodes.debate_controller import DebateController
-from nodes.memory_node import MemoryNode
-from nodes.judge_node import JudgeNode
 
-class DebateSystem:
-    def __init__(self):
-        self.logger = DebateLogger()
-        self._initialize_nodes()
-        self._create_graph()
-    
-    def _initialize_nodes(self):
-        """Initialize all debate nodes"""
-        self.user_input = UserInputNode(self.logger)
-        self.agent_a = AgentANode(self.logger)
-        self.agent_b = AgentBNode(self.logger)
-        self.controller = DebateController(self.logger)
-        self.memory = MemoryNode(self.logger)
-        self.judge = JudgeNode(self.logger)
-    
-    def _create_graph(self):
-        """Create the LangGraph workflow"""
-        # Initialize the state graph
-        workflow = StateGraph(DebateState)
-        
-        # Add nodes to the graph
-        workflow.add_node("user_input", self.user_input.execute)
-        workflow.add_node("agent_a", self.agent_a.execute)
-        workflow.add_node("agent_b", self.agent_b.execute)
-        workflow.add_node("controller", self.controller.execute)
-        workflow.add_node("memory", self.memory.execute)
-        workflow.add_node("judge", self.judge.execute)
-        
-        self.workflow = workflow
+def __getattr__(name):
+    # The debate system pulls in LangGraph, the nodes and the LLM client, so
+    # it is loaded only when a command needs it (``from main import DebateSystem``
+    # keeps working)
+    if name == "DebateSystem":
+        from debate_system import DebateSystem
+        return DebateSystem
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-    def _add_graph_edges(self):
-        """Add edges and conditional logic to the graph"""
-        
-        # Start with user input
-        self.workflow.add_edge(START, "user_input")
-        
-        # After user input, go to controller
-        self.workflow.add_edge("user_input", "controller")
-        
-        # From controller, decide which agent should speak
-        self.workflow.add_conditional_edges(
-            "controller",
-            self._route_to_agent,
-            {
-                "agent_a": "agent_a",
-                "agent_b": "agent_b", 
-                "judge": "judge"
-            }
-        )
-        
-        # After each agent, update memory then back to controller
-        self.workflow.add_edge("agent_a", "memory")
-        self.workflow.add_edge("agent_b", "memory")
-        self.workflow.add_edge("memory", "controller")
-        
-        # Judge ends the debate
-        self.workflow.add_edge("judge", END)
-        
-        # Compile the graph
-        self.app = self.workflow.compile()
+def run_batch_command(args) -> int:
+    """Entry point for the `batch` subcommand"""
+    if args.output == "-":
+        # JSONL records own stdout; progress and the run report go to stderr
+        records = sys.stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            return _run_batch(args, records)
+    return _run_batch(args)
+
+def _run_batch(args, records=None) -> int:
+    from debate_system import DebateSystem
+    from utils.batch import read_topics
     
-    def _route_to_agent(self, state: DebateState) -> str:
-        """Determine which node to route to based on state"""
-        
-        # If debate is complete, go to judge
-        if state["is_complete"]:
-            return "judge"
-        
-        # Route to appropriate agent based on current_agent
-        if state["current_agent"].value == Config.AGENT_A_PERSONA:
-            return "agent_a"
-        elif state["current_agent"].value == Config.AGENT_B_PERSONA:
-            return "agent_b"
-        else:
-            return "judge"  # Fallback
+    topics = read_topics(args.topics)
+    if not topics:
+        print("No topics to debate.")
+        return 1
     
-    def run_debate(self):
-        """Execute the complete debate workflow"""
-        
-        try:
-            print("Initializing Multi-Agent Debate System...")
-            self._add_graph_edges()
-            
-            # Initialize empty state
-            initial_state = create_initial_state()
-            
-            # Run the workflow with increased recursion limit
-            config = {"recursion_limit": 50}
-            final_state = self.app.invoke(initial_state, config=config)
-            
-            # Final logging
-            self.logger.log_step("DEBATE_COMPLETE", 
-                               f"Final winner: {final_state['winner']}")
-            
-            print(f"\n🎉 Debate completed successfully!")
-            print(f"📝 Full log saved to: debate_log.txt")
-            
-            return final_state
-            
-        except Exception as e:
-            error_msg = f"Debate execution failed: {str(e)}"
-            print(f"❌ {error_msg}")
-            self.logger.log_step("ERROR", error_msg)
-            return None
+    debate_system = DebateSystem()
+    print(f"Running {len(topics)} debates with concurrency {args.concurrency}...")
+    
+    if records is not None:
+        summary = debate_system.run_batch(topics, args.concurrency, records)
+    else:
+        with open(args.output, "w", encoding="utf-8") as output:
+            summary = debate_system.run_batch(topics, args.concurrency, output)
+    
+    print(f"\n✅ {summary.succeeded}/{summary.total} debates succeeded "
+          f"({summary.failed} failed) in {summary.elapsed_seconds:.1f}s")
+    print(f"⚡ Throughput: {summary.debates_per_minute:.2f} debates/minute")
+    if records is None:
+        print(f"📝 Results saved to: {args.output}")
+    debate_system._report_run()
+    
+    return 0 if summary.failed == 0 else 1
+
+def run_tournament_command(args) -> int:
+    """Entry point for the `tournament` subcommand"""
+    from debate_system import DebateSystem
+    from utils.batch import read_topics
+    from utils.tournament import Tournament, format_standings
+    
+    topics = read_topics(args.topics)
+    personas = args.personas or Config.PERSONAS
+    debate_system = DebateSystem()
+    tournament = Tournament(debate_system, personas, topics, args.output, format=args.format,
+                            rounds=args.rounds, concurrency=args.concurrency,
+                            max_rounds=args.max_rounds, bootstrap_samples=args.bootstrap)
+    print(f"🏆 {args.format.replace('_', '-')} tournament: {len(tournament.personas)} personas, "
+          f"{len(topics)} topics, concurrency {args.concurrency}")
+    
+    summary = tournament.run()
+    
+    print(f"\n✅ {summary.played} games played, {summary.reused} reused from {args.output}, "
+          f"{summary.failed} failed (rerun them by running again) in {summary.elapsed_seconds:.1f}s")
+    print(format_standings(summary))
+    print(f"📝 Results saved to: {args.output}")
+    debate_system._report_run()
+    
+    return 0 if summary.failed == 0 else 1
 
-def main():
+def run_archive_command(args) -> int:
+    """Entry point for the `archive` subcommand"""
+    try:
+        return _archive_action(args)
+    except BrokenPipeError:
+        # The reader (e.g. `| head`) stopped early; silence the final flush to the closed pipe
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+
+def _archive_action(args) -> int:
+    from utils.archive import DebateArchive, format_debates, format_transcript
+    
+    archive = DebateArchive(args.archive)
+    if args.action == "show":
+        debate = archive.get(args.debate_id)
+        if debate is None:
+            print(f"Debate {args.debate_id} is not in {args.archive}")
+            return 1
+        print(format_transcript(debate))
+        return 0
+    
+    filters = {"topic": args.topic, "search": args.search, "personas": args.persona or (),
+               "model": args.model, "winner": args.winner, "since": args.since, "until": args.until}
+    if args.action == "list":
+        print(format_debates(archive.query(limit=args.limit, newest_first=True, **filters)))
+        return 0
+    
+    if args.output == "-":
+        count = archive.export(sys.stdout, args.format, args.turns, **filters)
+    else:
+        with open(args.output, "w", encoding="utf-8", newline="") as output:
+            count = archive.export(output, args.format, args.turns, **filters)
+        print(f"📝 Exported {count} debates to: {args.output}")
+    return 0
+
+def run_replay_command(args) -> int:
+    """Entry point for the `replay` subcommand"""
+    from utils.cassette import Cassette, format_replay, replay, set_cassette
+    
+    # Installed before the debate system so the LLM client replays instead of calling out
+    cassette = Cassette(args.cassette, "replay", speed=args.speed)
+    set_cassette(cassette)
+    from debate_system import DebateSystem
+    
+    debate_system = DebateSystem(checkpointing=False)
+    # Replays run new code against old replies; they don't belong in the archive
+    debate_system.archive = None
+    print(f"📼 Replaying {args.cassette} with concurrency {args.concurrency}...")
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            summary = replay(debate_system, cassette, args.concurrency, output)
+    else:
+        summary = replay(debate_system, cassette, args.concurrency)
+    
+    print(f"\n{format_replay(summary)}")
+    if args.output:
+        print(f"📝 Results saved to: {args.output}")
+    
+    return 1 if summary.failed or (args.strict and not summary.identical) else 0
+
+def run_checkpoints_command(args) -> int:
+    """Entry point for the `checkpoints` subcommand"""
+    from debate_system import DebateSystem
+    
+    debate_system = DebateSystem(checkpointing=True)
+    checkpointer = debate_system.checkpointer
+    
+    if args.prune:
+        removed = checkpointer.prune(Config.CHECKPOINT_RETENTION_SECONDS)
+        print(f"🧹 Removed checkpoints of {removed} completed debates")
+    
+    threads = checkpointer.incomplete_threads()
+    if not threads:
+        print("No interrupted debates to resume.")
+        return 0
+    
+    print("Interrupted debates (resume with: python main.py run --resume <id>):")
+    for debate_id, updated_at in threads:
+        snapshot = debate_system.app.get_state(debate_system._run_config(debate_id))
+        values = snapshot.values or {}
+        print(f"  {debate_id}  {time.strftime('%Y-%m-%d %H:%M', time.localtime(updated_at))}  "
+              f"round {values.get('current_round', 0)}  {values.get('topic') or '(no topic yet)'}")
+    return 0
+
+def run_serve_command(args) -> int:
+    """Entry point for the `serve` subcommand"""
+    try:
+        import uvicorn
+    except ImportError:
+        print("Serving debates over HTTP requires uvicorn: pip install uvicorn")
+        return 1
+    from debate_system import DebateSystem
+    from utils.server import DebateApp, DebateService
+    
+    service = DebateService(DebateSystem(), max_concurrent=args.concurrency,
+                            queue_size=args.queue_size)
+    print(f"Serving debates on http://{args.host}:{args.port} "
+          f"({service.max_concurrent} concurrent, {service.queue_size} queued)")
+    uvicorn.run(DebateApp(service), host=args.host, port=args.port, log_level="info")
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Multi-Agent Debate DAG using LangGraph")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    run_parser = subparsers.add_parser("run", help="Run a single debate (default)")
+    run_parser.add_argument("--topic", default="", help="Debate topic (prompted for if omitted)")
+    run_parser.add_argument("--checkpoint", action="store_true",
+                            help="Persist state after every node so the debate can be resumed")
+    run_parser.add_argument("--resume", metavar="DEBATE_ID",
+                            help="Resume a checkpointed debate from its last completed node")
+    run_parser.add_argument("--record", metavar="CASSETTE",
+                            help="Record the debate's LLM calls for `replay` (default: CASSETTE_PATH)")
+    
+    batch_parser = subparsers.add_parser("batch", help="Run many debates concurrently")
+    batch_parser.add_argument("topics", help="File with one topic per line, or '-' for stdin")
+    batch_parser.add_argument("-c", "--concurrency", type=int, default=4,
+                              help="Maximum number of debates in flight (default: 4)")
+    batch_parser.add_argument("-o", "--output", default="batch_results.jsonl",
+                              help="JSON Lines file for result records, or '-' for stdout")
+    batch_parser.add_argument("--record", metavar="CASSETTE",
+                              help="Record every debate's LLM calls for `replay` (default: CASSETTE_PATH)")
+    
+    tournament_parser = subparsers.add_parser("tournament",
+                                              help="Rank personas by debating them against each other")
+    tournament_parser.add_argument("topics", help="File with one topic per line, or '-' for stdin")
+    tournament_parser.add_argument("-p", "--personas",
+                                   type=lambda value: [name.strip() for name in value.split(",")],
+                                   help="Comma-separated personas (default: PERSONAS)")
+    tournament_parser.add_argument("-f", "--format", choices=["round_robin", "swiss"],
+                                   default="round_robin",
+                                   help="Every pairing on every topic, or Swiss rounds "
+                                        "pairing similar scores (default: round_robin)")
+    tournament_parser.add_argument("--rounds", type=int,
+                                   help="Swiss rounds, one topic each (default: log2 of the personas)")
+    tournament_parser.add_argument("-c", "--concurrency", type=int, default=4,
+                                   help="Maximum number of debates in flight (default: 4)")
+    tournament_parser.add_argument("--max-rounds", type=int,
+                                   help="Arguments per debate (default: MAX_ROUNDS)")
+    tournament_parser.add_argument("--bootstrap", type=int, default=200,
+                                   help="Bootstrap samples for the confidence intervals (default: 200)")
+    tournament_parser.add_argument("-o", "--output", default="tournament_results.jsonl",
+                                   help="JSON Lines file of game results, read again to resume "
+                                        "(default: tournament_results.jsonl)")
+    tournament_parser.add_argument("--record", metavar="CASSETTE",
+                                   help="Record every game's LLM calls for `replay` "
+                                        "(default: CASSETTE_PATH)")
+    
+    replay_parser = subparsers.add_parser("replay",
+                                          help="Rerun recorded debates offline from a cassette")
+    replay_parser.add_argument("cassette", help="Cassette written with --record or CASSETTE_PATH")
+    replay_parser.add_argument("-c", "--concurrency", type=int, default=8,
+                               help="Maximum number of debates in flight (default: 8)")
+    replay_parser.add_argument("--speed", type=float, default=0.0,
+                               help="Replay recorded latencies this many times faster; "
+                                    "0 answers instantly (default: 0)")
+    replay_parser.add_argument("-o", "--output", help="JSON Lines file for per-debate results")
+    replay_parser.add_argument("--strict", action="store_true",
+                               help="Exit with status 1 unless every call and verdict matched")
+    
+    # Filters shared by `archive list` and `archive export`
+    archive_filters = argparse.ArgumentParser(add_help=False)
+    archive_filters.add_argument("--topic", help="Exact topic")
+    archive_filters.add_argument("--search", help="Text the topic contains")
+    archive_filters.add_argument("-p", "--persona", action="append",
+                                 help="Persona that took part (repeat for head-to-heads)")
+    archive_filters.add_argument("--model", help="Debater model")
+    archive_filters.add_argument("--winner", help="Winning persona")
+    archive_filters.add_argument("--since", metavar="DATE",
+                                 help="Finished at or after this local date/time (YYYY-MM-DD[THH:MM])")
+    archive_filters.add_argument("--until", metavar="DATE",
+                                 help="Finished before this local date/time (YYYY-MM-DD[THH:MM])")
+    
+    archive_parser = subparsers.add_parser("archive", help="Query and export archived debates")
+    archive_parser.add_argument("--archive", default=Config.ARCHIVE_PATH or ".cache/archive.sqlite3",
+                                help="Archive database (default: ARCHIVE_PATH)")
+    archive_actions = archive_parser.add_subparsers(dest="action", required=True)
+    list_parser = archive_actions.add_parser("list", parents=[archive_filters],
+                                             help="List the most recent matching debates")
+    list_parser.add_argument("-n", "--limit", type=int, default=20,
+                             help="Number of debates to list (default: 20)")
+    show_parser = archive_actions.add_parser("show", help="Print one debate's transcript and verdict")
+    show_parser.add_argument("debate_id")
+    export_parser = archive_actions.add_parser("export", parents=[archive_filters],
+                                               help="Stream matching debates to JSON Lines or CSV")
+    export_parser.add_argument("-f", "--format", choices=["jsonl", "csv"], default="jsonl",
+                               help="Output format (default: jsonl)")
+    export_parser.add_argument("--turns", action="store_true",
+                               help="Include every argument (CSV: one row per argument)")
+    export_parser.add_argument("-o", "--output", default="-",
+                               help="Output file, or '-' for stdout (default: -)")
+    
+    checkpoints_parser = subparsers.add_parser("checkpoints", help="List debates that can be resumed")
+    checkpoints_parser.add_argument("--prune", action="store_true",
+                                    help="Delete checkpoints of completed debates past retention")
+    
+    serve_parser = subparsers.add_parser("serve", help="Serve debates over HTTP with Server-Sent Events")
+    serve_parser.add_argument("--host", default=Config.SERVER_HOST,
+                              help=f"Interface to bind (default: {Config.SERVER_HOST})")
+    serve_parser.add_argument("--port", type=int, default=Config.SERVER_PORT,
+                              help=f"Port to listen on (default: {Config.SERVER_PORT})")
+    serve_parser.add_argument("-c", "--concurrency", type=int,
+                              default=Config.SERVER_MAX_CONCURRENT_DEBATES,
+                              help="Maximum number of debates running at once "
+                                   f"(default: {Config.SERVER_MAX_CONCURRENT_DEBATES})")
+    serve_parser.add_argument("--queue-size", type=int, default=Config.SERVER_QUEUE_SIZE,
+                              help="Debates that may wait for a free slot before new ones are "
+                                   f"refused (default: {Config.SERVER_QUEUE_SIZE})")
+    
+    return parser
+
+def main(argv=None):
     """Main entry point"""
+    args = build_parser().parse_args(argv)
+    
+    if getattr(args, "record", None):
+        from utils.cassette import Cassette, set_cassette
+        set_cassette(Cassette(args.record))
+    
     try:
-        debate_system = DebateSystem()
-        final_state = debate_system.run_debate()
+        if args.command == "batch":
+            return run_batch_command(args)
+        if args.command == "tournament":
+            return run_tournament_command(args)
+        if args.command == "replay":
+            return run_replay_command(args)
+        if args.command == "archive":
+            return run_archive_command(args)
+        if args.command == "checkpoints":
+            return run_checkpoints_command(args)
+        if args.command == "serve":
+            return run_serve_command(args)
+        
+        from debate_system import DebateSystem
+        
+        checkpointing = getattr(args, "checkpoint", False) or bool(getattr(args, "resume", None))
+        debate_system = DebateSystem(checkpointing=checkpointing or None)
+        final_state = debate_system.run_debate(getattr(args, "topic", ""),
+                                               resume_id=getattr(args, "resume", None))
         
         if final_state:
             return 0  # Success
@@ -1,57 +1,76 @@
-from utils.state import DebateState, AgentType
+from utils.state import DebateState
 from utils.config import Config
 from utils.logger import DebateLogger
+from utils.repetition import get_repetition_index
+from utils.personas import speaker_for_turn, round_for_turn
+from utils.streaming import echo
+from typing import Dict
 
 class DebateController:
     def __init__(self, logger: DebateLogger):
         self.logger = logger
+        self.repetition = get_repetition_index()
     
-    def execute(self, state: DebateState) -> DebateState:
+    def execute(self, state: DebateState) -> Dict:
         """Control debate flow and turn management"""
         
         # Check if we've reached max rounds - complete the debate
-        if len(state["debate_history"]) >= Config.MAX_ROUNDS:
-            state["is_complete"] = True
+        if len(state["debate_history"]) >= state["max_rounds"]:
             self.logger.log_step("DEBATE_COMPLETE", 
                                f"Debate completed after {len(state['debate_history'])} arguments")
-            print("=== DEBATE COMPLETED ===\n")
-            return state
+            echo("=== DEBATE COMPLETED ===\n")
+            return {"is_complete": True}
         
-        # For the very first call, don't switch - let scientist go first
+        # For the very first call, keep the first speaker chosen at initialization
         if len(state["debate_history"]) == 0:
-            return state
+            return {}
+        
+        # End debates that are going in circles; steer away from repeats otherwise
+        update = self._check_repetition(state)
+        if update.get("is_complete"):
+            return update
             
-        # Switch turns after each argument
-        if state["current_agent"] == AgentType.SCIENTIST:
-            state["current_agent"] = AgentType.PHILOSOPHER
-        elif state["current_agent"] == AgentType.PHILOSOPHER:
-            state["current_agent"] = AgentType.SCIENTIST
+        # Pick the next speaker from the turn order, based on completed arguments
+        turn = len(state["debate_history"])
+        update["current_agent"] = speaker_for_turn(state["personas"], turn,
+                                                   state["turn_order"], state["debate_id"])
         
         # Update round number based on completed arguments
-        state["current_round"] = (len(state["debate_history"]) // 2) + 1
+        update["current_round"] = round_for_turn(state["personas"], turn)
         
         # Log current state
         self.logger.log_step("CONTROLLER", 
-                           f"Arguments so far: {len(state['debate_history'])}, Current agent: {state['current_agent'].value}")
+                           f"Arguments so far: {turn}, Current agent: {update['current_agent']}")
         
-        return state
+        return update
+    
+    async def aexecute(self, state: DebateState) -> Dict:
+        """Async entry point; this node does no I/O so it runs inline"""
+        return self.execute(state)
     
-    def _check_repetition(self, state: DebateState) -> bool:
-        """Basic check for argument repetition"""
-        if len(state["debate_history"]) < 2:
-            return False
-        
-        # Get last two arguments
-        recent_args = [entry['argument'].lower() for entry in state["debate_history"][-2:]]
-        
-        # Simple repetition check (can be enhanced)
-        for i, arg1 in enumerate(recent_args):
-            for j, arg2 in enumerate(recent_args[i+1:], i+1):
-                # Check if arguments are too similar (basic word overlap)
-                words1 = set(arg1.split())
-                words2 = set(arg2.split())
-                overlap = len(words1.intersection(words2))
-                if overlap > len(words1) * 0.7:  # 70% word overlap threshold
-                    return True
-        
-        return False
\ No newline at end of file
+    def _check_repetition(self, state: DebateState) -> Dict:
+        """Compare the latest argument with earlier ones; returns the steering update"""
+        check = self.repetition.check(state["debate_id"], state["debate_history"])
+        
+        if check.converged and Config.EARLY_STOP:
+            self.logger.log_step("DEBATE_CONVERGED",
+                               f"Last {self.repetition.window} arguments repeated earlier points "
+                               f"(similarity {check.similarity:.2f}); ending after "
+                               f"{len(state['debate_history'])} arguments")
+            echo("=== DEBATE CONVERGED - ENDING EARLY ===\n")
+            return {"is_complete": True, "steering": ""}
+        
+        if check.repeated:
+            earlier = state["debate_history"][check.match]
+            snippet = " ".join(earlier["argument"].split()[:20])
+            steering = (f"The debate is repeating itself (in round {earlier['round']}, "
+                        f"{earlier['agent']} already argued: \"{snippet}...\"). "
+                        "Do not restate earlier points; raise a new argument or new "
+                        "evidence, or answer an objection that has not been addressed.")
+            self.logger.log_step("REPETITION",
+                               f"Similarity {check.similarity:.2f} to round {earlier['round']} "
+                               f"({earlier['agent']}), {check.self_similarity:.2f} to the speaker's "
+                               f"own arguments; steering the next argument")
+        else:
+            steering = ""
+        return {"steering": steering}
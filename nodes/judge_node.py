@@ -1,37 +1,115 @@
-from groq import Groq
+import asyncio
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from utils.state import DebateState
 from utils.config import Config
 from utils.logger import DebateLogger
-from typing import Dict
+from utils.llm_client import LLMClient, LLMError, get_llm_client
+from utils.streaming import echo, stream_completion, astream_completion
+from utils.judge_panel import RUBRICS, JudgeSpec, Vote, VoteTally, build_panel
+from utils.rate_limit import JUDGE, llm_priority
+from utils.transcript import Transcript
+from typing import Dict, List, Optional, Sequence
 
 class JudgeNode:
     def __init__(self, logger: DebateLogger):
         self.logger = logger
-        self.client = Groq(api_key=Config.GROQ_API_KEY)
+        # Runs the summary request alongside the verdict request
+        self._executor = ThreadPoolExecutor(thread_name_prefix="judge")
+        # Judges whose verdicts are aggregated; a single seat means no panel
+        self.panel = build_panel()
     
-    def execute(self, state: DebateState) -> DebateState:
+    @property
+    def llm(self) -> LLMClient:
+        """The shared LLM client, created when the first verdict is requested"""
+        return get_llm_client()
+    
+    def execute(self, state: DebateState) -> Dict:
         """Execute judge evaluation of the debate"""
+        # Verdicts finish a debate, so they go ahead of other debates' turns
+        # when LLM calls are queued for rate limits
+        with llm_priority(JUDGE):
+            return self._judge(state)
+    
+    async def aexecute(self, state: DebateState) -> Dict:
+        """Execute judge evaluation without blocking the event loop"""
+        with llm_priority(JUDGE):
+            return await self._ajudge(state)
+    
+    def _judge(self, state: DebateState) -> Dict:
+        """Summarize and judge a completed debate"""
         
         if not state["is_complete"]:
-            return state  # Only judge completed debates
+            return {}  # Only judge completed debates
         
-        print("=== JUDGE EVALUATION ===")
-        print("Analyzing debate arguments...")
+        echo("=== JUDGE EVALUATION ===")
+        echo("Analyzing debate arguments...")
         
-        # Generate debate summary
-        summary = self._generate_debate_summary(state)
+        # Several judges voting concurrently, alongside the summary request
+        if len(self.panel) > 1:
+            summary_future = self._executor.submit(
+                contextvars.copy_context().run, self._generate_debate_summary, state)
+            judgment_result = self._evaluate_panel(state)
+            return self._record_judgment(state, summary_future.result(), judgment_result,
+                                         print_summary=not Config.STREAMING)
         
-        # Determine winner and justification
-        judgment_result = self._evaluate_winner(state)
+        # Single structured call returning summary, winner and reasoning
+        if Config.JUDGE_STRUCTURED:
+            judgment_result = self._evaluate_structured(state)
+            if judgment_result:
+                return self._record_judgment(state, judgment_result["summary"], judgment_result)
         
-        # Update state with results
-        state["judgment"] = summary
-        # Determine winner and justification
+        # Summary and verdict don't depend on each other, so request them
+        # concurrently (in this node's context so logging stays per-debate)
+        summary_future = self._executor.submit(
+            contextvars.copy_context().run, self._generate_debate_summary, state)
         judgment_result = self._evaluate_winner(state)
+        summary = summary_future.result()
+        
+        return self._record_judgment(state, summary, judgment_result,
+                                     print_summary=not Config.STREAMING)
+    
+    async def _ajudge(self, state: DebateState) -> Dict:
+        """Async counterpart of _judge"""
+        
+        if not state["is_complete"]:
+            return {}  # Only judge completed debates
+        
+        echo("=== JUDGE EVALUATION ===")
+        echo("Analyzing debate arguments...")
+        
+        if len(self.panel) > 1:
+            summary, judgment_result = await asyncio.gather(
+                self._agenerate_debate_summary(state),
+                self._aevaluate_panel(state),
+            )
+            return self._record_judgment(state, summary, judgment_result,
+                                         print_summary=not Config.STREAMING)
+        
+        if Config.JUDGE_STRUCTURED:
+            judgment_result = await self._aevaluate_structured(state)
+            if judgment_result:
+                return self._record_judgment(state, judgment_result["summary"], judgment_result)
+        
+        summary, judgment_result = await asyncio.gather(
+            self._agenerate_debate_summary(state),
+            self._aevaluate_winner(state),
+        )
+        
+        return self._record_judgment(state, summary, judgment_result,
+                                     print_summary=not Config.STREAMING)
+    
+    def _record_judgment(self, state: DebateState, summary: str,
+                         judgment_result: Dict[str, str],
+                         print_summary: bool = True) -> Dict:
+        """Log and print the judge's verdict; returns the state update"""
         
         # Update state with results
-        state["judgment"] = summary
-        state["winner"] = judgment_result['winner']  # Using dictionary access
+        update = {
+            "judgment": summary,
+            "winner": judgment_result['winner']  # Using dictionary access
+        }
         
         # Create a combined judgment string for logging
         full_judgment = f"{summary}\n\nWinner: {judgment_result['winner']}\nReason: {judgment_result['reasoning']}"
@@ -41,17 +119,26 @@ class JudgeNode:
         self.logger.log_step("JUDGE_WINNER", f"Winner: {judgment_result['winner']}")
         self.logger.log_step("JUDGE_REASONING", judgment_result['reasoning'])
         
+        # Panel verdicts also record every vote and the confidence in the outcome
+        if "votes" in judgment_result:
+            update["judge_votes"] = judgment_result["votes"]
+            update["judge_confidence"] = judgment_result["confidence"]
+            self.logger.log_step("JUDGE_PANEL", self._format_votes(judgment_result))
+        
         # Print results to console
-        print(f"\n[Judge] Summary of debate:")
-        print(summary)
-        print(f"\n[Judge] Winner: {judgment_result['winner']}")
-        print(f"Reason: {judgment_result['reasoning']}")
-        print("\n" + "="*50)
+        if print_summary:
+            echo(f"\n[Judge] Summary of debate:")
+            echo(summary)
+        echo(f"\n[Judge] Winner: {judgment_result['winner']}")
+        if "votes" in judgment_result:
+            echo(f"Panel: {self._format_tally(judgment_result)}")
+        echo(f"Reason: {judgment_result['reasoning']}")
+        echo("\n" + "="*50)
         
-        return state
+        return update
     
-    def _generate_debate_summary(self, state: DebateState) -> str:
-        """Generate comprehensive summary of the debate"""
+    def _build_summary_prompt(self, state: DebateState) -> str:
+        """Build the prompt asking for a debate summary"""
         
         # Build debate transcript
         transcript = f"Debate Topic: {state['topic']}\n\n"
@@ -71,92 +158,292 @@ Focus on:
 - Overall debate quality
 
 Summary:"""
-
+        return prompt
+    
+    # Describes the streamed summary to token sinks
+    _summary_stream_meta = {"node": "judge", "label": "\n[Judge] Summary of debate:\n"}
+    
+    def _generate_debate_summary(self, state: DebateState) -> str:
+        """Generate comprehensive summary of the debate"""
+        prompt = self._build_summary_prompt(state)
+        
         try:
-            response = self.client.chat.completions.create(
-                model=Config.GROQ_MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.5,
-                max_tokens=200
-            )
-            
-            return response.choices[0].message.content.strip()
-            
-        except Exception as e:
-            self.logger.log_step("ERROR_SUMMARY", f"Failed to generate summary: {str(e)}")
-            return f"Summary generation failed: {str(e)}"
+            if Config.STREAMING:
+                return stream_completion(self.llm, prompt, self._summary_stream_meta,
+                                         temperature=0.5, max_tokens=200,
+                                         cache=Config.CACHE_JUDGE).content
+            return self.llm.complete(prompt, temperature=0.5, max_tokens=200,
+                                   cache=Config.CACHE_JUDGE).content
+        except LLMError as e:
+            return self._summary_failed(e)
+    
+    async def _agenerate_debate_summary(self, state: DebateState) -> str:
+        """Generate the debate summary without blocking the event loop"""
+        prompt = self._build_summary_prompt(state)
         
-    def _evaluate_winner(self, state: DebateState) -> Dict[str, str]:
-        """Evaluate debate and determine winner with reasoning"""
+        try:
+            if Config.STREAMING:
+                response = await astream_completion(self.llm, prompt, self._summary_stream_meta,
+                                                    temperature=0.5, max_tokens=200,
+                                                    cache=Config.CACHE_JUDGE)
+            else:
+                response = await self.llm.acomplete(prompt, temperature=0.5, max_tokens=200,
+                                                    cache=Config.CACHE_JUDGE)
+            return response.content
+        except LLMError as e:
+            return self._summary_failed(e)
+    
+    def _summary_failed(self, error: LLMError) -> str:
+        self.logger.log_step("ERROR_SUMMARY", f"Failed to generate summary: {str(error)}")
+        return f"Summary generation failed: {str(error)}"
+    
+    def _build_evaluation_transcript(self, state: DebateState) -> str:
+        """Build the per-side transcript the judge evaluates"""
         
-        # Build evaluation prompt
         transcript = f"Debate Topic: {state['topic']}\n\n"
         
-        # Separate arguments by agent
-        scientist_args = []
-        philosopher_args = []
+        # Separate arguments by agent, using the transcript's per-agent views
+        history = Transcript.of(state["debate_history"])
+        speakers = dict.fromkeys([*state["personas"], *(turn.agent for turn in history)])
         
-        for entry in state["debate_history"]:
-            if entry['agent'] == Config.AGENT_A_PERSONA:
-                scientist_args.append(f"Round {entry['round']}: {entry['argument']}")
-            else:
-                philosopher_args.append(f"Round {entry['round']}: {entry['argument']}")
+        sections = []
+        for persona in speakers:
+            sections.append(f"{persona.upper()} ARGUMENTS:\n"
+                            + "".join(f"- {arg}\n" for arg in history.memory(persona)))
+        transcript += "\n".join(sections)
+        
+        return transcript
+    
+    @staticmethod
+    def _criteria(rubric: str = "balanced") -> str:
+        """Numbered evaluation criteria for a rubric"""
+        return "\n".join(f"{i}. {criterion}" for i, criterion in enumerate(RUBRICS[rubric], 1))
+    
+    def _build_evaluation_prompt(self, state: DebateState, judge: Optional[JudgeSpec] = None) -> str:
+        """Build the prompt asking the judge (or one panel judge) for a winner and reasoning"""
         
-        transcript += f"SCIENTIST ARGUMENTS:\n"
-        for arg in scientist_args:
-            transcript += f"- {arg}\n"
+        transcript = self._build_evaluation_transcript(state)
         
-        transcript += f"\nPHILOSOPHER ARGUMENTS:\n"
-        for arg in philosopher_args:
-            transcript += f"- {arg}\n"
+        # Panel judges are told their seat so identical briefings stay independent samples
+        seat = ""
+        if judge is not None:
+            seat = f" You are {judge.name.replace('_', ' ')} of a panel of {len(self.panel)}."
         
         # Create evaluation prompt
-        prompt = f"""You are an impartial debate judge. Evaluate this debate and determine the winner.
+        prompt = f"""You are an impartial debate judge.{seat} Evaluate this debate and determine the winner.
 
 {transcript}
 
 Evaluation Criteria:
-1. Logical consistency and reasoning
-2. Evidence quality and relevance  
-3. Argument strength and persuasiveness
-4. Response to opposing points
-5. Overall coherence of position
+{self._criteria(judge.rubric if judge else "balanced")}
 
 Provide your decision in this exact format:
-WINNER: [Scientist/Philosopher]
+WINNER: [{"/".join(state["personas"])}]
 REASONING: [2-3 sentences explaining your decision]
 
 Your evaluation:"""
+        return prompt
+    
+    def _parse_evaluation(self, evaluation: str) -> Dict[str, str]:
+        """Parse WINNER:/REASONING: lines from the judge's response"""
+        lines = evaluation.split('\n')
+        winner = "Tie"
+        reasoning = "Unable to determine winner"
+        
+        for line in lines:
+            if line.startswith("WINNER:"):
+                winner = line.split(":", 1)[1].strip()
+            elif line.startswith("REASONING:"):
+                reasoning = line.split(":", 1)[1].strip()
+        
+        return {
+            "winner": winner,
+            "reasoning": reasoning
+        }
+    
+    def _evaluate_winner(self, state: DebateState) -> Dict[str, str]:
+        """Evaluate debate and determine winner with reasoning"""
+        prompt = self._build_evaluation_prompt(state)
+        
+        try:
+            # Lower temperature for more consistent judging
+            response = self.llm.complete(prompt, temperature=0.3, max_tokens=250,
+                                         cache=Config.CACHE_JUDGE)
+            return self._parse_evaluation(response.content)
+        except LLMError as e:
+            return self._evaluation_failed(e)
+    
+    async def _aevaluate_winner(self, state: DebateState) -> Dict[str, str]:
+        """Evaluate the debate without blocking the event loop"""
+        prompt = self._build_evaluation_prompt(state)
+        
+        try:
+            response = await self.llm.acomplete(prompt, temperature=0.3, max_tokens=250,
+                                             cache=Config.CACHE_JUDGE)
+            return self._parse_evaluation(response.content)
+        except LLMError as e:
+            return self._evaluation_failed(e)
+    
+    def _evaluation_failed(self, error: LLMError) -> Dict[str, str]:
+        self.logger.log_step("ERROR_EVALUATION", f"Failed to evaluate winner: {str(error)}")
+        return {
+            "winner": "Error",
+            "reasoning": f"Evaluation failed: {str(error)}"
+        }
+    
+    def _panel_vote(self, state: DebateState, judge: JudgeSpec) -> Vote:
+        """One panel judge's verdict"""
+        prompt = self._build_evaluation_prompt(state, judge)
+        
+        try:
+            response = self.llm.complete(prompt, temperature=0.3, max_tokens=250, model=judge.model,
+                                         cache=Config.CACHE_JUDGE)
+            verdict = self._parse_evaluation(response.content)
+        except LLMError as e:
+            verdict = self._evaluation_failed(e)
+        return Vote(judge, self._known_winner(verdict["winner"], state["personas"]),
+                    verdict["reasoning"])
+    
+    async def _apanel_vote(self, state: DebateState, judge: JudgeSpec) -> Vote:
+        """One panel judge's verdict, without blocking the event loop"""
+        prompt = self._build_evaluation_prompt(state, judge)
+        
+        try:
+            response = await self.llm.acomplete(prompt, temperature=0.3, max_tokens=250,
+                                                model=judge.model, cache=Config.CACHE_JUDGE)
+            verdict = self._parse_evaluation(response.content)
+        except LLMError as e:
+            verdict = self._evaluation_failed(e)
+        return Vote(judge, self._known_winner(verdict["winner"], state["personas"]),
+                    verdict["reasoning"])
+    
+    @staticmethod
+    def _known_winner(winner: str, personas: Sequence[str]) -> str:
+        """Normalize a vote to a persona name or "Tie"; anything else abstains"""
+        cleaned = winner.strip().strip("[]").strip().lower()
+        return next((name for name in list(personas) + ["Tie"] if name.lower() == cleaned), "Error")
+    
+    def _evaluate_panel(self, state: DebateState) -> Dict:
+        """Collect the panel's votes concurrently, stopping once the outcome is settled"""
+        tally = VoteTally(self.panel, Config.JUDGE_PANEL_AGGREGATION)
+        futures = [self._executor.submit(contextvars.copy_context().run, self._panel_vote, state, judge)
+                   for judge in self.panel]
+        for future in as_completed(futures):
+            tally.add(future.result())
+            if Config.JUDGE_PANEL_EARLY_EXIT and tally.decided():
+                break
+        # Judges still queued are dropped; requests already in flight finish unread
+        for future in futures:
+            future.cancel()
+        return tally.result()
+    
+    async def _aevaluate_panel(self, state: DebateState) -> Dict:
+        """Async counterpart of _evaluate_panel; undecided judges' requests are cancelled"""
+        tally = VoteTally(self.panel, Config.JUDGE_PANEL_AGGREGATION)
+        tasks = [asyncio.ensure_future(self._apanel_vote(state, judge)) for judge in self.panel]
+        try:
+            for next_vote in asyncio.as_completed(tasks):
+                tally.add(await next_vote)
+                if Config.JUDGE_PANEL_EARLY_EXIT and tally.decided():
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+        return tally.result()
+    
+    def _format_tally(self, judgment_result: Dict) -> str:
+        """One-line panel outcome, e.g. 2 of 3 votes, confidence 0.67"""
+        counted = len(judgment_result["votes"])
+        backing = sum(1 for vote in judgment_result["votes"]
+                      if vote["winner"] == judgment_result["winner"])
+        stopped = f", stopped after {counted}" if counted < len(self.panel) else ""
+        return (f"{backing} of {len(self.panel)} votes{stopped}, "
+                f"confidence {judgment_result['confidence']:.2f}")
+    
+    def _format_votes(self, judgment_result: Dict) -> str:
+        """Every vote the panel counted, for the debate log"""
+        lines = [self._format_tally(judgment_result)]
+        for vote in judgment_result["votes"]:
+            model = vote["model"] or self.llm.model
+            lines.append(f"{vote['judge']} ({model}, {vote['rubric']}, weight {vote['weight']:g}): "
+                         f"{vote['winner']} - {vote['reasoning']}")
+        return "\n".join(lines)
+    
+    def _build_structured_prompt(self, state: DebateState) -> str:
+        """Build the single-call prompt asking for summary and verdict as JSON"""
+        
+        transcript = self._build_evaluation_transcript(state)
+        
+        prompt = f"""You are an impartial debate judge. Summarize this debate and determine the winner.
+
+{transcript}
+
+Evaluation Criteria:
+{self._criteria()}
 
+Respond with a single JSON object and nothing else, using exactly these keys:
+{{"summary": "3-4 sentences covering each side's main arguments and the key points of contention",
+ "winner": {" or ".join(f'"{name}"' for name in state["personas"])} or "Tie",
+ "reasoning": "2-3 sentences explaining your decision"}}"""
+        return prompt
+    
+    def _parse_structured(self, evaluation: str, personas: List[str]) -> Dict[str, str]:
+        """Validate the structured judge response; raises ValueError if malformed"""
+        
+        # Tolerate a Markdown code fence around the object
+        text = evaluation.strip()
+        if text.startswith("```"):
+            text = text.strip("`").split("\n", 1)[-1]
+        
         try:
-            response = self.client.chat.completions.create(
-                model=Config.GROQ_MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,  # Lower temperature for more consistent judging
-                max_tokens=250
-            )
-            
-            evaluation = response.choices[0].message.content.strip()
-            
-            # Parse the response
-            lines = evaluation.split('\n')
-            winner = "Tie"
-            reasoning = "Unable to determine winner"
-            
-            for line in lines:
-                if line.startswith("WINNER:"):
-                    winner = line.split(":", 1)[1].strip()
-                elif line.startswith("REASONING:"):
-                    reasoning = line.split(":", 1)[1].strip()
-            
-            return {
-                "winner": winner,
-                "reasoning": reasoning
-            }
-            
-        except Exception as e:
-            self.logger.log_step("ERROR_EVALUATION", f"Failed to evaluate winner: {str(e)}")
-            return {
-                "winner": "Error",
-                "reasoning": f"Evaluation failed: {str(e)}"
-            }
\ No newline at end of file
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"response is not valid JSON: {e}") from e
+        if not isinstance(data, dict):
+            raise ValueError("response is not a JSON object")
+        
+        for key in ("summary", "winner", "reasoning"):
+            if not isinstance(data.get(key), str) or not data[key].strip():
+                raise ValueError(f"missing or empty '{key}'")
+        
+        # Normalize the winner to a known persona name
+        candidates = list(personas) + ["Tie"]
+        winner = next((name for name in candidates
+                       if name.lower() == data["winner"].strip().lower()), None)
+        if winner is None:
+            raise ValueError(f"unknown winner '{data['winner']}'")
+        
+        return {
+            "summary": data["summary"].strip(),
+            "winner": winner,
+            "reasoning": data["reasoning"].strip()
+        }
+    
+    def _evaluate_structured(self, state: DebateState) -> Optional[Dict[str, str]]:
+        """Summarize and judge in one call; None means fall back to two calls"""
+        prompt = self._build_structured_prompt(state)
+        
+        try:
+            response = self.llm.complete(prompt, temperature=0.3, max_tokens=450,
+                                         cache=Config.CACHE_JUDGE,
+                                         response_format={"type": "json_object"})
+            return self._parse_structured(response.content, state["personas"])
+        except (LLMError, ValueError) as e:
+            return self._structured_failed(e)
+    
+    async def _aevaluate_structured(self, state: DebateState) -> Optional[Dict[str, str]]:
+        """Async counterpart of _evaluate_structured"""
+        prompt = self._build_structured_prompt(state)
+        
+        try:
+            response = await self.llm.acomplete(prompt, temperature=0.3, max_tokens=450,
+                                                cache=Config.CACHE_JUDGE,
+                                                response_format={"type": "json_object"})
+            return self._parse_structured(response.content, state["personas"])
+        except (LLMError, ValueError) as e:
+            return self._structured_failed(e)
+    
+    def _structured_failed(self, error: Exception) -> None:
+        self.logger.log_step("ERROR_STRUCTURED_JUDGMENT",
+                           f"Structured judgment failed, falling back to separate calls: {str(error)}")
+        return None
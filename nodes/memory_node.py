@@ -1,81 +1,57 @@
 from utils.config import Config
-from utils.state import DebateState, AgentType
+from utils.state import DebateState
 from utils.logger import DebateLogger
-from typing import Dict, List
+from utils.context import get_context_builder
+from utils.vector_index import get_argument_index
+from utils.transcript import Transcript
+from typing import Dict
 
 class MemoryNode:
     def __init__(self, logger: DebateLogger):
         self.logger = logger
+        self.context = get_context_builder()
+        self.index = get_argument_index()
     
-    def execute(self, state: DebateState) -> DebateState:
-        """Update and manage memory for agents"""
+    def execute(self, state: DebateState) -> Dict:
+        """Update and manage memory for agents
         
-        # Update structured memory based on recent arguments
-        self._update_agent_memories(state)
+        Speakers append their own turns to the transcript; this node indexes
+        them for retrieval and refreshes the rolling summary.
+        """
         
-        # Log memory state
-        self._log_memory_state(state)
-        
-        # Generate memory summary for agents
-        self._generate_memory_summaries(state)
-        
-        return state
-    
-    def _update_agent_memories(self, state: DebateState):
-        """Update each agent's memory with relevant information"""
+        # Embed the new argument so agents can retrieve it by relevance later
+        self.index.sync(state["debate_id"], state["debate_history"])
         
-        if not state["debate_history"]:
-            return
-        
-        # Get the most recent argument
-        latest_entry = state["debate_history"][-1]
-        
-        # Update memories based on who spoke
-        if latest_entry['agent'] == Config.AGENT_A_PERSONA:
-            # Scientist's argument - add to their memory
-            if len(state["agent_a_memory"]) == 0 or state["agent_a_memory"][-1] != f"Round {latest_entry['round']}: {latest_entry['argument']}":
-                state["agent_a_memory"].append(f"Round {latest_entry['round']}: {latest_entry['argument']}")
-        
-        elif latest_entry['agent'] == Config.AGENT_B_PERSONA:
-            # Philosopher's argument - add to their memory
-            if len(state["agent_b_memory"]) == 0 or state["agent_b_memory"][-1] != f"Round {latest_entry['round']}: {latest_entry['argument']}":
-                state["agent_b_memory"].append(f"Round {latest_entry['round']}: {latest_entry['argument']}")
-    
-    def _generate_memory_summaries(self, state: DebateState) -> Dict[str, str]:
-        """Generate concise summaries of each agent's memory"""
+        # Apply the summary folded while this turn was spoken and fold the
+        # next turns in the background, while the next agent is speaking
+        update = self.context.update(state)
         
-        summaries = {
-            "scientist_summary": self._summarize_memory(state["agent_a_memory"], "Scientist"),
-            "philosopher_summary": self._summarize_memory(state["agent_b_memory"], "Philosopher")
-        }
+        # Log memory state
+        self._log_memory_state({**state, **update})
         
-        return summaries
+        return update
     
-    def _summarize_memory(self, memory: List[str], agent_type: str) -> str:
-        """Create a summary of an agent's memory"""
-        
-        if not memory:
-            return f"No arguments yet from {agent_type}"
-        
-        if len(memory) <= 2:
-            return f"{agent_type} arguments: " + "; ".join(memory)
-        
-        # For longer memories, create a structured summary
-        recent_args = memory[-2:] if len(memory) >= 2 else memory
-        summary = f"{agent_type} recent arguments: " + "; ".join(recent_args)
-        
-        return summary
+    async def aexecute(self, state: DebateState) -> Dict:
+        """Async entry point; waits for the pending summary without blocking the loop"""
+        self.index.sync(state["debate_id"], state["debate_history"])
+        update = await self.context.aupdate(state)
+        self._log_memory_state({**state, **update})
+        return update
     
     def _log_memory_state(self, state: DebateState):
         """Log current memory state"""
         
+        transcript = Transcript.of(state["debate_history"])
+        memories = ""
+        for persona in state["personas"]:
+            memory = transcript.memory(persona)
+            memories += (f"{persona} Memory ({len(memory)} entries):\n"
+                         f"{chr(10).join(memory[-3:]) if memory else 'No entries'}\n\n")
+        
         memory_info = f"""Memory State Update:
 
-Scientist Memory ({len(state["agent_a_memory"])} entries):
-{chr(10).join(state["agent_a_memory"][-3:]) if state["agent_a_memory"] else "No entries"}
-
-Philosopher Memory ({len(state["agent_b_memory"])} entries):
-{chr(10).join(state["agent_b_memory"][-3:]) if state["agent_b_memory"] else "No entries"}
+{memories}Rolling Summary: covers {state["summary_turns"]} of {len(state["debate_history"])} entries
+{state["context_summary"] or "No summary yet"}
 
 Total Debate History: {len(state["debate_history"])} entries"""
         
@@ -0,0 +1,64 @@
+from utils.state import DebateState, merge_updates
+from utils.logger import DebateLogger
+from utils.personas import speaker_for_turn
+from nodes.persona_agent_node import PersonaAgentNode
+from typing import Dict
+
+class OpeningStatementNode:
+    """One debater's opening statement, run as a parallel branch per persona
+    
+    Each branch receives the debate state with ``current_agent`` set to its
+    persona and writes only to the ``opening_statements`` channel, whose
+    reducer merges the branches' results by persona.
+    """
+    
+    def __init__(self, logger: DebateLogger, agent: PersonaAgentNode):
+        self.logger = logger
+        self.agent = agent
+    
+    def execute(self, state: DebateState) -> Dict:
+        """Generate this branch's opening statement"""
+        persona = state["current_agent"]
+        # Never streamed: concurrent branches would interleave their tokens
+        argument, metrics = self.agent._generate_argument(state, persona)
+        return self._statement(persona, argument, metrics)
+    
+    async def aexecute(self, state: DebateState) -> Dict:
+        """Generate this branch's opening statement without blocking the event loop"""
+        persona = state["current_agent"]
+        argument, metrics = await self.agent._agenerate_argument(state, persona)
+        return self._statement(persona, argument, metrics)
+    
+    @staticmethod
+    def _statement(persona: str, argument: str, metrics: Dict) -> Dict:
+        return {"opening_statements": {persona: {"argument": argument,
+                                                 "metrics": {**metrics, "opening": True}}}}
+
+class OpeningCollectorNode:
+    """Adds the concurrently generated opening statements to the transcript"""
+    
+    def __init__(self, logger: DebateLogger, agent: PersonaAgentNode):
+        self.logger = logger
+        self.agent = agent
+    
+    def execute(self, state: DebateState) -> Dict:
+        """Record opening statements in speaking order, as if made one by one"""
+        if state["debate_history"]:
+            return {}  # Already collected
+        
+        personas = state["personas"]
+        turns = []
+        for turn in range(len(personas)):
+            persona = speaker_for_turn(personas, turn, state["turn_order"], state["debate_id"])
+            statement = state["opening_statements"].get(persona)
+            if statement is not None:
+                turns.append(self.agent._record_argument(state, persona, statement["argument"],
+                                                         statement["metrics"], streamed=False))
+        
+        self.logger.log_step("OPENING_STATEMENTS",
+                           f"{len(turns)} opening statements generated concurrently")
+        return merge_updates(*turns)
+    
+    async def aexecute(self, state: DebateState) -> Dict:
+        """Async entry point; this node does no I/O so it runs inline"""
+        return self.execute(state)
@@ -0,0 +1,170 @@
+import math
+from utils.state import DebateState
+from utils.config import Config
+from utils.logger import DebateLogger
+from utils.llm_client import LLMClient, LLMError, get_llm_client
+from utils.context import get_context_builder
+from utils.personas import get_persona
+from utils.transcript import Turn
+from utils.streaming import echo, stream_completion, astream_completion
+from typing import Dict, Optional, Tuple
+
+class PersonaAgentNode:
+    """A debater whose briefing comes from its persona name
+    
+    With ``persona=None`` (how the graph uses it) the node speaks for whichever
+    persona ``state["current_agent"]`` names, so one node serves any number
+    of debaters. A fixed ``persona`` only ever takes that persona's turns.
+    """
+    
+    def __init__(self, logger: DebateLogger, persona: Optional[str] = None):
+        self.logger = logger
+        self.context = get_context_builder()
+        self.persona = persona
+    
+    @property
+    def llm(self) -> LLMClient:
+        """The shared LLM client, created when the first argument is generated"""
+        return get_llm_client()
+    
+    def execute(self, state: DebateState) -> Dict:
+        """Execute the current debater's turn"""
+        if not self._should_speak(state):
+            return {}
+        
+        # Generate argument
+        persona = state["current_agent"]
+        argument, metrics = self._generate_argument(state, persona, stream=Config.STREAMING)
+        
+        return self._record_argument(state, persona, argument, metrics)
+    
+    async def aexecute(self, state: DebateState) -> Dict:
+        """Execute the current debater's turn without blocking the event loop"""
+        if not self._should_speak(state):
+            return {}
+        
+        # Generate argument
+        persona = state["current_agent"]
+        argument, metrics = await self._agenerate_argument(state, persona, stream=Config.STREAMING)
+        
+        return self._record_argument(state, persona, argument, metrics)
+    
+    def _should_speak(self, state: DebateState) -> bool:
+        """Check whether this node should take the current turn"""
+        # Check if it's this agent's turn
+        if state["current_agent"] is None:
+            return False
+        if self.persona is not None and state["current_agent"] != self.persona:
+            return False  # Not this agent's turn
+        
+        # Check if debate is complete
+        if len(state["debate_history"]) >= state["max_rounds"] or state["is_complete"]:
+            return False
+        
+        return True
+    
+    def _record_argument(self, state: DebateState, persona: str, argument: str,
+                         metrics: Dict, streamed: bool = None) -> Dict:
+        """State update appending a generated argument to the append-only channels"""
+        # New debate history entry; the agent's memory is a view over the transcript
+        debate_entry = Turn(state["current_round"], persona, argument)
+        
+        update = {
+            "debate_history": [debate_entry],
+            # Record per-turn latency, time-to-first-token and throughput
+            "turn_metrics": [{
+                "round": state["current_round"],
+                "agent": persona,
+                **metrics
+            }]
+        }
+        
+        # Log the argument
+        self.logger.log_step(f"ROUND_{state['current_round']}_{persona.upper()}", argument)
+        
+        # Print to console (streamed turns were already printed token by token)
+        if not (Config.STREAMING if streamed is None else streamed):
+            echo(f"[Round {state['current_round']}] {persona}: {argument}\n")
+        
+        return update
+    
+    def _build_prompt(self, state: DebateState, persona: str) -> str:
+        """Build the persona's prompt for the current turn"""
+        briefing = get_persona(persona)
+        
+        # Rolling summary of older arguments plus recent ones, within the token budget
+        context = self.context.build(state)
+        
+        # Nudge away from points the debate keeps circling back to
+        steering = f"{state['steering']}\n\n" if state.get("steering") else ""
+        
+        # Opponents, so debates with more than two personas know who is in the room
+        others = [name for name in state["personas"] if name != persona]
+        opponents = f"Other debaters: {', '.join(others)}\n" if len(others) > 1 else ""
+        
+        guidelines = "\n".join(f"- {line}" for line in briefing.guidelines)
+        total_rounds = math.ceil(state["max_rounds"] / len(state["personas"]))
+        
+        prompt = f"""You are a {persona} participating in a formal debate.
+Topic: {state["topic"]}
+{opponents}
+{context}{steering}Your role: {briefing.role}
+{guidelines}
+
+Your argument (Round {state["current_round"]}/{total_rounds}):"""
+        return prompt
+    
+    def _stream_meta(self, state: DebateState, persona: str) -> Dict:
+        """Describe this turn to token sinks"""
+        return {
+            "node": "agent",
+            "round": state["current_round"],
+            "agent": persona,
+            "label": f"[Round {state['current_round']}] {persona}: "
+        }
+    
+    def _generate_argument(self, state: DebateState, persona: str,
+                           stream: bool = False) -> Tuple[str, Dict]:
+        """Generate the persona's argument using the shared LLM client"""
+        prompt = self._build_prompt(state, persona)
+        
+        try:
+            if stream:
+                response = stream_completion(self.llm, prompt, self._stream_meta(state, persona),
+                                             temperature=0.7, max_tokens=150,
+                                             cache=Config.CACHE_AGENTS)
+            else:
+                response = self.llm.complete(prompt, temperature=0.7, max_tokens=150,
+                                             cache=Config.CACHE_AGENTS)
+            return response.content, response.metrics()
+        except LLMError as e:
+            self._generation_failed(persona, e)
+            raise
+    
+    async def _agenerate_argument(self, state: DebateState, persona: str,
+                                  stream: bool = False) -> Tuple[str, Dict]:
+        """Generate the persona's argument without blocking the event loop"""
+        prompt = self._build_prompt(state, persona)
+        
+        try:
+            if stream:
+                response = await astream_completion(self.llm, prompt,
+                                                    self._stream_meta(state, persona),
+                                                    temperature=0.7, max_tokens=150,
+                                                    cache=Config.CACHE_AGENTS)
+            else:
+                response = await self.llm.acomplete(prompt, temperature=0.7, max_tokens=150,
+                                                    cache=Config.CACHE_AGENTS)
+            return response.content, response.metrics()
+        except LLMError as e:
+            self._generation_failed(persona, e)
+            raise
+    
+    def _generation_failed(self, persona: str, error: LLMError):
+        """Log a completion that failed even after the client's retries
+        
+        The error propagates and fails the node rather than putting error text
+        into the transcript, where opponents and the judge would read it as an
+        argument. With checkpointing the debate resumes from this turn.
+        """
+        self.logger.log_step(f"ERROR_{persona.upper()}", f"Failed to generate argument: {str(error)}")
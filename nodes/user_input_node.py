@@ -1,35 +1,51 @@
-from utils.state import DebateState, AgentType
+import asyncio
+from utils.state import DebateState
 from utils.logger import DebateLogger
+from utils.personas import speaker_for_turn
+from utils.streaming import echo
+from typing import Dict
 
 class UserInputNode:
     def __init__(self, logger: DebateLogger):
         self.logger = logger
     
-    def execute(self, state: DebateState) -> DebateState:
+    def execute(self, state: DebateState) -> Dict:
         """Get debate topic from user input"""
-        print("\n=== MULTI-AGENT DEBATE SYSTEM ===")
-        print("Two AI agents will debate on your chosen topic.")
-        print("Agent A: Scientist | Agent B: Philosopher")
-        print("8 rounds total (4 arguments per agent)\n")
+        echo("\n=== MULTI-AGENT DEBATE SYSTEM ===")
+        personas = state["personas"]
+        echo(f"{len(personas)} AI agents will debate on your chosen topic.")
+        echo(" | ".join(f"Agent {chr(ord('A') + i)}: {name}" for i, name in enumerate(personas)))
+        echo(f"{state['max_rounds']} rounds total "
+              f"({state['max_rounds'] // len(personas)} arguments per agent)\n")
         
         # Get topic from user
-        while not state["topic"]:
+        topic = state["topic"]
+        while not topic:
             topic = input("Enter topic for debate: ").strip()
-            if topic:
-                state["topic"] = topic
-            else:
-                print("Please enter a valid topic.")
+            if not topic:
+                echo("Please enter a valid topic.")
         
         # Initialize debate state
-        state["current_round"] = 1
-        state["current_agent"] = AgentType.SCIENTIST  # Scientist goes first
+        update = {
+            "topic": topic,
+            "current_round": 1,
+            "current_agent": speaker_for_turn(personas, 0, state["turn_order"],
+                                              state["debate_id"])
+        }
         
         # Log the initialization
-        self.logger.log_step("USER_INPUT", f"Debate Topic: {state['topic']}")
+        self.logger.log_step("USER_INPUT", f"Debate Topic: {topic}")
         self.logger.log_step("INITIALIZATION", 
-                           f"Starting debate between {AgentType.SCIENTIST.value} and {AgentType.PHILOSOPHER.value}")
+                           f"Starting debate between {', '.join(personas)} "
+                           f"(turn order: {state['turn_order']})")
         
-        print(f"\nStarting debate on: '{state['topic']}'")
-        print(f"Round 1 - {state['current_agent'].value} will go first...\n")
+        echo(f"\nStarting debate on: '{topic}'")
+        echo(f"Round 1 - {update['current_agent']} will go first...\n")
         
-        return state
\ No newline at end of file
+        return update
+    
+    async def aexecute(self, state: DebateState) -> Dict:
+        """Async entry point; the interactive prompt runs in a worker thread"""
+        if not state["topic"]:
+            return await asyncio.to_thread(self.execute, state)
+        return self.execute(state)
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the debate graph
+
+Runs complete debates through DebateSystem (every node, the compiled graph,
+context and indexes) against the fake LLM backend, so it needs no network
+access or API key. For each MAX_ROUNDS setting it runs two latency profiles
+in fresh worker processes:
+
+- ``zero``: instant LLM replies, so the timings are pure orchestration cost
+- ``llm``: simulated latency and reply lengths drawn from log-normal and
+  normal distributions (``--latency-ms``, ``--latency-jitter``, ``--words``,
+  ``--words-jitter``)
+
+and reports end-to-end debate latency, orchestration time per turn, graph
+overhead per node step, debates per second under concurrency and peak
+memory. Results are written as JSON and compared with a stored baseline;
+the exit status is 1 when a metric regressed by more than ``--tolerance``.
+
+    python scripts/benchmark.py
+    python scripts/benchmark.py --rounds 8 40 --output results.json
+    python scripts/benchmark.py --save-baseline
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, "scripts", "benchmark_baseline.json")
+
+TOPICS = [
+    "Should AI be regulated?",
+    "Is remote work better than office work?",
+    "Should cities ban private cars?",
+    "Is nuclear power the answer to climate change?",
+]
+
+# Metric name -> (which direction is better, changes smaller than this are noise)
+METRICS: Dict[str, Tuple[str, float]] = {
+    "debate_p50_ms": ("lower", 5.0),
+    "debate_p95_ms": ("lower", 5.0),
+    "orchestration_ms_per_turn": ("lower", 1.0),
+    "graph_overhead_ms_per_step": ("lower", 0.5),
+    "debates_per_second": ("higher", 0.0),
+    "peak_rss_mb": ("lower", 5.0),
+    "peak_heap_kb_per_debate": ("lower", 50.0),
+}
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+def _busy_seconds(spans) -> float:
+    """Wall time covered by at least one node span (parallel branches overlap)"""
+    intervals = sorted((span.start, span.start + span.duration) for span in spans)
+    busy, end = 0.0, float("-inf")
+    for start, stop in intervals:
+        if start > end:
+            busy += stop - start
+            end = stop
+        elif stop > end:
+            busy += stop - end
+            end = stop
+    return busy
+
+async def _measure(scenario: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one scenario inside a worker process (its settings are already in the environment)"""
+    import resource
+    import tracemalloc
+    from debate_system import DebateSystem
+    from utils.batch import BatchRunner
+    from utils.tracing import get_tracer
+
+    system = DebateSystem(checkpointing=False)
+    tracer = get_tracer()
+
+    async def debate(topic: str) -> Tuple[Dict[str, Any], float]:
+        started = time.perf_counter()
+        record = await system.aexecute_debate(topic)
+        if record["status"] != "ok":
+            raise RuntimeError(f"Debate failed: {record.get('error')}")
+        return record, time.perf_counter() - started
+
+    # Warm-up: the first debate pays for lazy clients, caches and imports
+    await debate(TOPICS[0])
+
+    durations: List[float] = []
+    per_turn: List[float] = []
+    per_step: List[float] = []
+    for i in range(scenario["debates"]):
+        record, seconds = await debate(TOPICS[i % len(TOPICS)])
+        spans = tracer.spans(record["debate_id"], kind="node")
+        durations.append(seconds)
+        per_turn.append(seconds / max(1, record["arguments"]))
+        per_step.append((seconds - _busy_seconds(spans)) / max(1, len(spans)))
+
+    batch_topics = [TOPICS[i % len(TOPICS)] for i in range(scenario["batch"])]
+    summary = await BatchRunner(system, concurrency=scenario["concurrency"]).arun(batch_topics)
+    if summary.failed:
+        raise RuntimeError(f"{summary.failed} batch debates failed")
+
+    # Heap growth of one debate, measured last because tracing allocations is slow
+    tracemalloc.start()
+    await debate(TOPICS[0])
+    _, peak_heap = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "debate_p50_ms": round(1000 * statistics.median(durations), 2),
+        "debate_p95_ms": round(1000 * _percentile(durations, 0.95), 2),
+        "orchestration_ms_per_turn": round(1000 * statistics.median(per_turn), 3),
+        "graph_overhead_ms_per_step": round(1000 * statistics.median(per_step), 3),
+        "debates_per_second": round(summary.total / summary.elapsed_seconds, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_heap_kb_per_debate": round(peak_heap / 1024, 1),
+    }
+
+def _worker_environment(scenario: Dict[str, Any], work_dir: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    env.update({
+        "LLM_BACKEND": "fake",
+        "MAX_ROUNDS": str(scenario["rounds"]),
+        "FAKE_LLM_LATENCY_MS": str(scenario["latency_ms"]),
+        "FAKE_LLM_LATENCY_JITTER": str(scenario["latency_jitter"]),
+        "FAKE_LLM_WORDS": str(scenario["words"]),
+        "FAKE_LLM_WORDS_JITTER": str(scenario["words_jitter"]),
+        # Measure the graph, not the console, the disk cache, the archive or fault handling
+        "STREAMING": "false",
+        "CHECKPOINTING": "false",
+        "COMPLETION_CACHE_PATH": "",
+        "ARCHIVE_PATH": "",
+        "TRACE_SUMMARY": "false",
+        "TRACE_EXPORT_PATH": "",
+        "LOG_DIR": work_dir,
+        "FAKE_LLM_FAILURE_RATE": "0",
+        "FAKE_LLM_STALL_RATE": "0",
+    })
+    return env
+
+def run_scenario(scenario: Dict[str, Any]) -> Dict[str, Any]:
+    """Run ``scenario`` in a fresh process, so settings and peak memory don't leak between runs"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", json.dumps(scenario)],
+            cwd=work_dir, env=_worker_environment(scenario, work_dir),
+            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Scenario {scenario['name']} failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def build_scenarios(args) -> List[Dict[str, Any]]:
+    profiles = [("zero", 0.0, 0.0), ("llm", args.latency_ms, args.latency_jitter)]
+    return [{
+        "name": f"r{rounds}-{profile}",
+        "rounds": rounds,
+        "latency_ms": latency_ms,
+        "latency_jitter": jitter,
+        "words": args.words,
+        "words_jitter": args.words_jitter,
+        "debates": args.debates,
+        "batch": args.batch,
+        "concurrency": args.concurrency,
+    } for rounds in args.rounds for profile, latency_ms, jitter in profiles]
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any],
+            tolerance: float) -> Tuple[List[str], List[str], List[str]]:
+    """Table rows comparing results with the baseline, and the regressions among them
+
+    Scenarios run with different settings than the baseline's are not
+    compared; they are returned, with what differs, as the third list.
+    """
+    rows, regressions, skipped = [], [], []
+    for name, metrics in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            continue
+        # Fewer debates or less concurrency change the numbers; don't call that a regression
+        old_settings = previous.get("settings", {})
+        differences = [f"{key} {old_settings.get(key)} -> {value}"
+                       for key, value in metrics["settings"].items()
+                       if old_settings.get(key) != value]
+        if differences:
+            skipped.append(f"{name}: {', '.join(differences)}")
+            continue
+        for metric, value in metrics["metrics"].items():
+            old = previous["metrics"].get(metric)
+            if old is None or metric not in METRICS:
+                continue
+            better, noise = METRICS[metric]
+            change = (value - old) / old if old else 0.0
+            worse = value - old if better == "lower" else old - value
+            regressed = worse > noise and worse > tolerance * abs(old)
+            flag = "  REGRESSION" if regressed else ""
+            rows.append(f"{name:<10} {metric:<28} {old:>12.2f} {value:>12.2f} {change:>+8.1%}{flag}")
+            if regressed:
+                regressions.append(f"{name} {metric}: {old} -> {value} ({change:+.1%})")
+    return rows, regressions, skipped
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmark of full debates on the fake LLM")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--rounds", type=int, nargs="+", default=[8, 20, 40],
+                        help="MAX_ROUNDS settings to benchmark (default: 8 20 40)")
+    parser.add_argument("--debates", type=int, default=5,
+                        help="Sequential debates timed per scenario (default: 5)")
+    parser.add_argument("--batch", type=int, default=16,
+                        help="Debates in the concurrent throughput run (default: 16)")
+    parser.add_argument("-c", "--concurrency", type=int, default=8,
+                        help="Debates in flight during the throughput run (default: 8)")
+    parser.add_argument("--latency-ms", type=float, default=20.0,
+                        help="Mean simulated LLM latency of the 'llm' profile (default: 20)")
+    parser.add_argument("--latency-jitter", type=float, default=0.5,
+                        help="Log-normal sigma of the simulated latency (default: 0.5)")
+    parser.add_argument("--words", type=int, default=40,
+                        help="Mean reply length in words (default: 40)")
+    parser.add_argument("--words-jitter", type=float, default=10.0,
+                        help="Standard deviation of the reply length (default: 10)")
+    parser.add_argument("-o", "--output", default="benchmark_results.json",
+                        help="JSON file for the results, or '-' for stdout")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE,
+                        help="Baseline JSON to compare with (default: scripts/benchmark_baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Relative slowdown reported as a regression (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(asyncio.run(_measure(json.loads(args.worker)))))
+        return 0
+
+    results: Dict[str, Any] = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "scenarios": {},
+    }
+    print(f"{'scenario':<10} {'p50 ms':>9} {'p95 ms':>9} {'ms/turn':>9} {'ms/step':>9} "
+          f"{'debates/s':>10} {'rss MB':>8} {'heap KB':>9}")
+    for scenario in build_scenarios(args):
+        metrics = run_scenario(scenario)
+        results["scenarios"][scenario["name"]] = {"settings": scenario, "metrics": metrics}
+        print(f"{scenario['name']:<10} {metrics['debate_p50_ms']:>9.1f} {metrics['debate_p95_ms']:>9.1f} "
+              f"{metrics['orchestration_ms_per_turn']:>9.2f} {metrics['graph_overhead_ms_per_step']:>9.3f} "
+              f"{metrics['debates_per_second']:>10.2f} {metrics['peak_rss_mb']:>8.1f} "
+              f"{metrics['peak_heap_kb_per_debate']:>9.1f}", flush=True)
+
+    if args.output == "-":
+        print(json.dumps(results, indent=2))
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📝 Results saved to: {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"📌 Baseline updated: {args.baseline}")
+        return 0
+
+    baseline: Optional[Dict[str, Any]] = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    if baseline is None:
+        print("No baseline to compare with (create one with --save-baseline)")
+        return 0
+
+    rows, regressions, skipped = compare(results, baseline, args.tolerance)
+    print(f"\nCompared with baseline from {baseline.get('created_at', 'unknown')} "
+          f"(regression: >{args.tolerance:.0%} worse)")
+    print(f"{'scenario':<10} {'metric':<28} {'baseline':>12} {'current':>12} {'change':>8}")
+    print("\n".join(rows) or "No matching scenarios")
+    if skipped:
+        print(f"\n⚠️  {len(skipped)} scenario(s) not compared, their settings differ from "
+              f"the baseline's:\n  " + "\n  ".join(skipped))
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s):\n  " + "\n  ".join(regressions))
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
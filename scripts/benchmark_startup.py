@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the debate CLI and DebateSystem
+
+Every case runs in fresh interpreters, the way short-lived workers start, and
+reports the median of several runs: wall time of the whole process plus the
+import and initialization phases measured inside it. Use ``--importtime`` to
+list the slowest modules a case imports and ``--json`` for machine-readable
+output to compare across commits.
+
+    python scripts/benchmark_startup.py
+    python scripts/benchmark_startup.py --runs 10 --json startup.json
+    python scripts/benchmark_startup.py --importtime system
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each case prints {"import": seconds, "init": seconds} as its last line
+_PHASES = """
+import json, sys, time
+started = time.perf_counter()
+{imports}
+imported = time.perf_counter()
+{init}
+print(json.dumps({{"import": imported - started, "init": time.perf_counter() - imported}}))
+"""
+
+CASES: Dict[str, Dict[str, str]] = {
+    # Interpreter start-up alone, the floor for every other case
+    "python": {"imports": "pass", "init": "pass"},
+    # What `python main.py --help` pays before printing usage
+    "help": {"imports": "import main",
+             "init": "main.build_parser().format_help()"},
+    "diagram": {"imports": "from debate_system import draw_mermaid",
+                "init": "draw_mermaid()"},
+    # Everything a worker does before it can run its first debate
+    "system": {"imports": "from debate_system import DebateSystem",
+               "init": "DebateSystem(checkpointing=False)"},
+}
+
+def _environment(log_dir: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    # Never reach a real provider; processes run in log_dir so their logs stay out of the tree
+    env["LLM_BACKEND"] = "fake"
+    env["LOG_DIR"] = log_dir
+    return env
+
+def run_case(name: str, runs: int, env: Dict[str, str]) -> Dict[str, float]:
+    """Median wall, import and init time of ``runs`` fresh processes, in milliseconds"""
+    code = _PHASES.format(**CASES[name])
+    walls: List[float] = []
+    imports: List[float] = []
+    inits: List[float] = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code], cwd=env["LOG_DIR"], env=env,
+                                capture_output=True, text=True)
+        walls.append(time.perf_counter() - started)
+        if result.returncode != 0:
+            raise RuntimeError(f"Case {name} failed:\n{result.stderr}")
+        phases = json.loads(result.stdout.strip().splitlines()[-1])
+        imports.append(phases["import"])
+        inits.append(phases["init"])
+
+    return {
+        "wall_ms": round(statistics.median(walls) * 1000, 1),
+        "wall_min_ms": round(min(walls) * 1000, 1),
+        "import_ms": round(statistics.median(imports) * 1000, 1),
+        "init_ms": round(statistics.median(inits) * 1000, 1),
+    }
+
+def slowest_imports(name: str, env: Dict[str, str], top: int = 15) -> List[Dict]:
+    """Modules with the largest cumulative import time for one case (``-X importtime``)"""
+    code = _PHASES.format(**CASES[name])
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=env["LOG_DIR"],
+                            env=env, capture_output=True, text=True)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, module = line.split(":", 1)[1].split("|")
+        # Indentation is nesting depth: keep the case's own imports and what
+        # they import directly; deeper modules are inside those totals
+        depth = (len(module) - len(module.lstrip()) - 1) // 2
+        if depth > 1:
+            continue
+        modules.append({"module": module.strip(), "depth": depth,
+                        "cumulative_ms": int(cumulative_us) / 1000})
+    return sorted(modules, key=lambda row: row["cumulative_ms"], reverse=True)[:top]
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure CLI and DebateSystem startup time")
+    parser.add_argument("cases", nargs="*",
+                        help=f"Cases to run (default: all of {', '.join(CASES)})")
+    parser.add_argument("-n", "--runs", type=int, default=5,
+                        help="Fresh processes per case; the median is reported (default: 5)")
+    parser.add_argument("--json", metavar="PATH",
+                        help="Also write the results as JSON ('-' for stdout)")
+    parser.add_argument("--importtime", metavar="CASE", choices=list(CASES),
+                        help="List the slowest top-level imports of one case")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.cases if name not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)} (choose from {', '.join(CASES)})")
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        env = _environment(log_dir)
+
+        if args.importtime:
+            for row in slowest_imports(args.importtime, env):
+                print(f"{row['cumulative_ms']:9.1f} ms  {'  ' * row['depth']}{row['module']}")
+            return 0
+
+        results = {name: run_case(name, args.runs, env) for name in args.cases or CASES}
+
+    report = {"python": sys.version.split()[0], "runs": args.runs, "cases": results}
+    if args.json == "-":
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(f"{'case':<10} {'wall':>9} {'min':>9} {'import':>9} {'init':>9}   (median of {args.runs}, ms)")
+    for name, row in results.items():
+        print(f"{name:<10} {row['wall_ms']:>9.1f} {row['wall_min_ms']:>9.1f} "
+              f"{row['import_ms']:>9.1f} {row['init_ms']:>9.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Results saved to: {args.json}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
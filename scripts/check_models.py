@@ -1,12 +1,11 @@
-from groq import Groq
-from utils.config import Config
+from utils.llm_client import get_llm_client
 
-client = Groq(api_key=Config.GROQ_API_KEY)
+backend = get_llm_client().backend
 
 try:
-    models = client.models.list()
-    print("Available Groq models:")
-    for model in models.data:
-        print(f"- {model.id}")
+    models = backend.list_models()
+    print(f"Available models ({backend.name} backend):")
+    for model_id in models:
+        print(f"- {model_id}")
 except Exception as e:
     print(f"Error: {e}")
\ No newline at end of file
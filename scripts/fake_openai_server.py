@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for an OpenAI-compatible inference server
+
+Serves /v1/models and /v1/chat/completions (plain and streamed) from the
+deterministic FakeBackend, so the "openai" backend can be exercised end to end
+without network access:
+
+    python scripts/fake_openai_server.py --port 8000 --latency-ms 200
+    LLM_BACKEND=openai LLM_BASE_URL=http://localhost:8000/v1 python main.py
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.llm_backends import FakeBackend
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    backend = FakeBackend()
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/v1/models":
+            data = [{"id": model_id, "object": "model"} for model_id in self.backend.list_models()]
+            self._send_json(200, {"object": "list", "data": data})
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        stream = body.pop("stream", False)
+        body.pop("stream_options", None)
+
+        if stream:
+            self._stream(body)
+        else:
+            completion = self.backend.complete(body)
+            self._send_json(200, {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": completion.content}}],
+                "usage": {"prompt_tokens": completion.prompt_tokens,
+                          "completion_tokens": completion.completion_tokens,
+                          "total_tokens": completion.prompt_tokens + completion.completion_tokens},
+            })
+
+    def _stream(self, body):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        for delta in self.backend.stream(body):
+            chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk",
+                     "model": body.get("model"), "choices": []}
+            if delta.text is not None:
+                chunk["choices"] = [{"index": 0, "delta": {"content": delta.text}}]
+            if delta.completion_tokens is not None:
+                chunk["usage"] = {"prompt_tokens": delta.prompt_tokens,
+                                  "completion_tokens": delta.completion_tokens}
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+        self._write_chunk("data: [DONE]\n\n")
+        self._write_chunk("")
+
+    def _write_chunk(self, text: str):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status: int, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+def start_server(host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0) -> ThreadingHTTPServer:
+    """Start the server on a background thread; port 0 picks a free port"""
+    FakeOpenAIHandler.backend = FakeBackend(latency=latency_ms / 1000.0)
+    server = ThreadingHTTPServer((host, port), FakeOpenAIHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="Simulated latency per completion")
+    args = parser.parse_args()
+
+    server = start_server(args.host, args.port, args.latency_ms)
+    print(f"Fake OpenAI-compatible server on http://{args.host}:{server.server_port}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -10,7 +10,8 @@ def test_imports():
         print("Testing imports...")
         
         # Test basic imports
-        from utils.state import DebateState, AgentType
+        from utils.state import DebateState
+        from utils.personas import get_persona, speaker_for_turn
         from utils.logger import DebateLogger
         from utils.config import Config
         print("✅ Utils imports successful")
@@ -19,6 +20,8 @@ def test_imports():
         from nodes.user_input_node import UserInputNode
         from nodes.agent_a_node import AgentANode
         from nodes.agent_b_node import AgentBNode
+        from nodes.persona_agent_node import PersonaAgentNode
+        from nodes.opening_node import OpeningStatementNode, OpeningCollectorNode
         from nodes.debate_controller import DebateController
         from nodes.memory_node import MemoryNode
         from nodes.judge_node import JudgeNode
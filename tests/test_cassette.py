@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+@pytest.fixture
+def env(tmp_path):
+    """Fake backend with jittered latency; no cache, archive or API key"""
+    env = dict(os.environ, LLM_BACKEND="fake", FAKE_LLM_LATENCY_MS="30",
+               FAKE_LLM_LATENCY_JITTER="0.8", MAX_ROUNDS="10", COMPLETION_CACHE_PATH="",
+               ARCHIVE_PATH="", CASSETTE_PATH="", LOG_DIR=str(tmp_path / "logs"))
+    env.pop("GROQ_API_KEY", None)
+    return env
+
+def main(tmp_path, env, *args) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, MAIN, *args], cwd=tmp_path, env=env,
+                          capture_output=True, text=True, timeout=120)
+
+@pytest.mark.parametrize("speed", ["0", "1"])
+def test_strict_replay_of_an_unchanged_graph_matches_every_call(tmp_path, env, speed):
+    (tmp_path / "topics.txt").write_text("Should cities ban cars?\nIs math discovered?\n")
+    recorded = main(tmp_path, env, "batch", "topics.txt", "-o", "batch.jsonl",
+                    "--record", "debates.jsonl")
+    assert recorded.returncode == 0, recorded.stderr
+
+    replayed = main(tmp_path, env, "replay", "debates.jsonl", "--strict", "--speed", speed,
+                    "-o", "replay.jsonl")
+    assert replayed.returncode == 0, replayed.stdout + replayed.stderr
+    for line in (tmp_path / "replay.jsonl").read_text().splitlines():
+        calls = json.loads(line)["calls"]
+        assert calls["calls"] > 10
+        assert calls["changed"] == calls["unrecorded"] == calls["unused"] == 0
@@ -0,0 +1,150 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from utils.rate_limit import (ACTIVE, JUDGE, NEW, RateLimitScheduler, TokenBucket,
+                              parse_duration)
+from utils.resilience import DeadlineExceeded
+
+def http_error(status: int, retry_after: str = None) -> httpx.HTTPStatusError:
+    headers = {"retry-after": retry_after} if retry_after is not None else {}
+    request = httpx.Request("POST", "https://llm.invalid/v1/chat/completions")
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError(f"{status} (test)", request=request, response=response)
+
+def drained(tokens_per_minute: float) -> RateLimitScheduler:
+    """A scheduler whose token bucket has just been emptied"""
+    scheduler = RateLimitScheduler(requests_per_minute=0, tokens_per_minute=tokens_per_minute,
+                                   adapt=False)
+    scheduler.acquire(int(tokens_per_minute))
+    return scheduler
+
+def grant_order(scheduler: RateLimitScheduler, requests) -> list:
+    """Labels of ``requests`` ((label, tokens, debate_id, priority), queued in order) as granted"""
+    granted = []
+
+    async def request(label, tokens, debate_id, priority):
+        await scheduler.aacquire(tokens, debate_id, priority, timeout=5)
+        granted.append(label)
+
+    async def run():
+        await asyncio.gather(*(request(*args) for args in requests))
+
+    asyncio.run(run())
+    return granted
+
+# Token buckets
+
+def test_bucket_refills_continuously_up_to_capacity():
+    bucket = TokenBucket(per_minute=60)
+    now = time.monotonic()
+    bucket.take(60, now)
+    assert bucket.wait_time(30, now) == pytest.approx(30)
+    assert bucket.wait_time(30, now + 10) == pytest.approx(20)
+    assert bucket.wait_time(30, now + 30) == pytest.approx(0)
+    bucket.wait_time(1, now + 1000)
+    assert bucket.level == 60
+
+def test_overdraft_is_repaid_by_later_refills():
+    bucket = TokenBucket(per_minute=60)
+    now = time.monotonic()
+    bucket.take(90, now)
+    # A request bigger than the bucket waits only for a full bucket
+    assert bucket.wait_time(120, now) == pytest.approx(90)
+
+def test_give_back_and_sync_stay_within_bounds():
+    bucket = TokenBucket(per_minute=60)
+    now = time.monotonic()
+    bucket.take(10, now)
+    bucket.give_back(50, now)
+    assert bucket.level == pytest.approx(60)
+    bucket.sync(80, now)
+    assert bucket.level == pytest.approx(60)
+    bucket.sync(5, now)
+    assert bucket.level == pytest.approx(5)
+
+def test_disabled_bucket_never_waits():
+    bucket = TokenBucket(per_minute=0)
+    bucket.take(1000, time.monotonic())
+    assert not bucket.enabled
+    assert bucket.wait_time(1000, time.monotonic()) == 0
+
+def test_reset_durations():
+    assert parse_duration("7.66s") == pytest.approx(7.66)
+    assert parse_duration("2m59.56s") == pytest.approx(179.56)
+    assert parse_duration("20ms") == pytest.approx(0.02)
+    assert parse_duration("1h") == 3600
+    assert parse_duration("soon") is None
+
+# Queueing
+
+def test_waiters_are_granted_by_priority_class():
+    # 6000 tokens/minute: one 10-token request every 0.1s
+    scheduler = drained(6000)
+    order = grant_order(scheduler, [("new", 10, "c", NEW), ("active", 10, "b", ACTIVE),
+                                    ("judge", 10, "a", JUDGE)])
+    assert order == ["judge", "active", "new"]
+
+def test_fair_queueing_interleaves_a_busy_debate_with_a_quiet_one():
+    scheduler = drained(6000)
+    order = grant_order(scheduler, [("busy-1", 10, "busy", ACTIVE), ("busy-2", 10, "busy", ACTIVE),
+                                    ("busy-3", 10, "busy", ACTIVE), ("quiet", 10, "quiet", ACTIVE)])
+    assert order == ["busy-1", "quiet", "busy-2", "busy-3"]
+
+def test_queued_requests_wait_for_the_refill():
+    scheduler = drained(6000)
+    started = time.perf_counter()
+    scheduler.acquire(20)
+    assert time.perf_counter() - started >= 0.15
+    assert scheduler.stats.snapshot()["queued"] == 1
+
+def test_acquire_times_out_and_withdraws():
+    scheduler = drained(60)
+    with pytest.raises(DeadlineExceeded):
+        scheduler.acquire(30, timeout=0.05)
+    assert not scheduler._waiters
+
+def test_hedges_only_take_spare_capacity():
+    scheduler = drained(6000)
+    assert not scheduler.try_acquire(10)
+    assert RateLimitScheduler(0, 0, adapt=False).try_acquire(10)
+
+# 429 throttling
+
+def test_429_holds_back_every_request_until_retry_after():
+    scheduler = RateLimitScheduler(requests_per_minute=0, tokens_per_minute=0, adapt=False)
+    admission = scheduler.admission({"messages": [{"content": "hi"}], "max_tokens": 10})
+    admission.acquire()
+    admission.failed(http_error(429, "0.2"))
+    assert scheduler.stats.snapshot()["throttled"] == 1
+    assert not scheduler.try_acquire(10)
+
+    started = time.perf_counter()
+    scheduler.acquire(10)
+    assert time.perf_counter() - started >= 0.18
+
+def test_other_failures_do_not_throttle():
+    scheduler = RateLimitScheduler(requests_per_minute=0, tokens_per_minute=0, adapt=False)
+    admission = scheduler.admission({"messages": [{"content": "hi"}], "max_tokens": 10})
+    admission.acquire()
+    admission.failed(http_error(503))
+    assert scheduler.stats.snapshot()["throttled"] == 0
+    assert scheduler.try_acquire(10)
+
+def test_failed_attempts_get_their_tokens_back():
+    scheduler = RateLimitScheduler(requests_per_minute=0, tokens_per_minute=600, adapt=False)
+    admission = scheduler.admission({"messages": [{"content": "x" * 400}], "max_tokens": 100})
+    admission.acquire()
+    assert scheduler.tokens.level == pytest.approx(400, abs=1)
+    admission.failed(http_error(503))
+    assert scheduler.tokens.level == pytest.approx(600, abs=1)
+
+def test_exhausted_quota_headers_pause_the_scheduler():
+    scheduler = RateLimitScheduler(requests_per_minute=0, tokens_per_minute=0, adapt=True)
+    scheduler.observe({"x-ratelimit-remaining-requests": "0",
+                       "x-ratelimit-reset-requests": "150ms"})
+    started = time.perf_counter()
+    scheduler.acquire(10)
+    assert time.perf_counter() - started >= 0.13
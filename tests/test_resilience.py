@@ -0,0 +1,180 @@
+import asyncio
+import random
+import time
+
+import httpx
+import pytest
+
+from utils.resilience import (CallReport, CircuitBreaker, CircuitOpenError, DeadlineExceeded,
+                              ResilientCaller, RetryPolicy)
+
+def http_error(status: int, retry_after: str = None) -> httpx.HTTPStatusError:
+    headers = {"retry-after": retry_after} if retry_after is not None else {}
+    request = httpx.Request("POST", "https://llm.invalid/v1/chat/completions")
+    response = httpx.Response(status, headers=headers, request=request)
+    return httpx.HTTPStatusError(f"{status} (test)", request=request, response=response)
+
+def caller(**overrides) -> ResilientCaller:
+    """A caller with no timeouts, hedging or breaker unless a test asks for them"""
+    settings = dict(policy=RetryPolicy(attempts=3, base_delay=0.0, max_delay=1.0),
+                    attempt_timeout=0, deadline=0, hedge_percentile=0,
+                    breaker=CircuitBreaker(threshold=0), max_workers=4)
+    settings.update(overrides)
+    return ResilientCaller(**settings)
+
+class Flaky:
+    """Fails with each of ``errors`` in turn, then returns "ok" """
+
+    def __init__(self, *errors: BaseException):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+# Backoff and Retry-After
+
+def test_backoff_doubles_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(random, "uniform", lambda low, high: high)
+    policy = RetryPolicy(attempts=5, base_delay=0.5, max_delay=3.0)
+    assert [policy.delay(retry) for retry in range(4)] == [0.5, 1.0, 2.0, 3.0]
+
+def test_backoff_is_jittered_from_zero(monkeypatch):
+    monkeypatch.setattr(random, "uniform", lambda low, high: low)
+    assert RetryPolicy(base_delay=0.5).delay(2) == 0.0
+
+def test_retry_after_is_a_lower_bound_capped_at_max_delay(monkeypatch):
+    monkeypatch.setattr(random, "uniform", lambda low, high: low)
+    policy = RetryPolicy(base_delay=0.5, max_delay=8.0)
+    assert policy.delay(0, http_error(429, "3")) == 3.0
+    assert policy.delay(0, http_error(429, "120")) == 8.0
+    assert policy.delay(0, http_error(429, "soon")) == 0.0
+
+def test_transient_errors_are_retried():
+    func = Flaky(http_error(503), http_error(429))
+    resilient = caller()
+    report = CallReport()
+    assert resilient.call(func, report) == "ok"
+    assert report.attempts == 3
+    assert resilient.stats.snapshot()["retries"] == 2
+
+def test_permanent_errors_are_not_retried():
+    func = Flaky(http_error(400))
+    with pytest.raises(httpx.HTTPStatusError):
+        caller().call(func)
+    assert func.calls == 1
+
+def test_attempts_are_bounded():
+    func = Flaky(*[http_error(503)] * 5)
+    with pytest.raises(httpx.HTTPStatusError):
+        caller().call(func)
+    assert func.calls == 3
+
+def test_retry_waits_for_retry_after():
+    func = Flaky(http_error(429, "0.2"))
+    started = time.perf_counter()
+    assert caller().call(func) == "ok"
+    assert time.perf_counter() - started >= 0.2
+
+# Deadlines and attempt timeouts
+
+def test_attempt_timeout_cuts_off_a_stalled_attempt():
+    attempts = []
+
+    def func():
+        attempts.append(None)
+        if len(attempts) == 1:
+            time.sleep(0.5)
+            return "late"
+        return "ok"
+
+    resilient = caller(attempt_timeout=0.05)
+    started = time.perf_counter()
+    assert resilient.call(func) == "ok"
+    assert time.perf_counter() - started < 0.4
+    assert resilient.stats.snapshot()["timeouts"] == 1
+
+def test_async_attempt_timeout_cancels_the_stalled_request():
+    cancelled = []
+
+    async def stall():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(None)
+            raise
+
+    responses = iter([stall, lambda: asyncio.sleep(0, "ok")])
+    resilient = caller(attempt_timeout=0.05)
+    assert asyncio.run(resilient.acall(lambda: next(responses)())) == "ok"
+    assert cancelled
+
+def test_deadline_ends_the_call_without_further_retries():
+    calls = []
+
+    async def stall():
+        calls.append(None)
+        await asyncio.sleep(5)
+
+    resilient = caller(policy=RetryPolicy(attempts=10, base_delay=0.0), deadline=0.15)
+    started = time.perf_counter()
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(resilient.acall(stall))
+    assert time.perf_counter() - started < 0.5
+    assert len(calls) == 1
+
+def test_attempt_timeout_never_outlives_the_deadline():
+    resilient = caller(attempt_timeout=10, deadline=0.2)
+    assert resilient._attempt_budget(time.perf_counter()) <= 0.2
+    with pytest.raises(DeadlineExceeded):
+        resilient._attempt_budget(time.perf_counter() - 1)
+
+# Circuit breaker
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+def test_breaker_lets_one_probe_through_when_half_open():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # The probe is still in flight
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = CircuitBreaker(threshold=3, reset_timeout=0.05)
+    for _ in range(3):
+        breaker.record_failure()
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+def test_open_breaker_rejects_calls_without_calling_the_provider():
+    resilient = caller(breaker=CircuitBreaker(threshold=1, reset_timeout=60))
+    func = Flaky(*[http_error(503)] * 3)
+    with pytest.raises(CircuitOpenError):
+        resilient.call(func)
+    assert func.calls == 1
+    assert resilient.stats.snapshot()["rejected"] == 1
+
+def test_rate_limits_do_not_trip_the_breaker():
+    resilient = caller(breaker=CircuitBreaker(threshold=1, reset_timeout=60))
+    assert resilient.call(Flaky(http_error(429), http_error(429))) == "ok"
+    assert resilient.breaker.state == "closed"
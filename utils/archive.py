@@ -0,0 +1,364 @@
+import atexit
+import csv
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from itertools import groupby
+from typing import Any, Dict, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS debates (
+    debate_id TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    personas TEXT NOT NULL,
+    model TEXT,
+    backend TEXT,
+    turn_order TEXT,
+    max_rounds INTEGER,
+    arguments INTEGER NOT NULL,
+    winner TEXT,
+    judgment TEXT,
+    judge_confidence REAL,
+    judge_votes TEXT,
+    llm_calls INTEGER NOT NULL,
+    cached_calls INTEGER NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    llm_seconds REAL NOT NULL,
+    duration_seconds REAL,
+    finished_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS debate_personas (
+    debate_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    persona TEXT NOT NULL,
+    PRIMARY KEY (debate_id, position)
+);
+CREATE TABLE IF NOT EXISTS turns (
+    debate_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    round INTEGER NOT NULL,
+    agent TEXT NOT NULL,
+    argument TEXT NOT NULL,
+    latency_ms REAL,
+    ttft_ms REAL,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    cached INTEGER,
+    PRIMARY KEY (debate_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_debates_topic ON debates (topic);
+CREATE INDEX IF NOT EXISTS idx_debates_model ON debates (model);
+CREATE INDEX IF NOT EXISTS idx_debates_finished_at ON debates (finished_at);
+CREATE INDEX IF NOT EXISTS idx_debate_personas_persona ON debate_personas (persona, debate_id);
+"""
+
+# Columns of the debates table, in export order
+DEBATE_COLUMNS = ("debate_id", "topic", "personas", "model", "backend", "turn_order",
+                  "max_rounds", "arguments", "winner", "judgment", "judge_confidence",
+                  "judge_votes", "llm_calls", "cached_calls", "prompt_tokens",
+                  "completion_tokens", "llm_seconds", "duration_seconds", "finished_at")
+TURN_COLUMNS = ("position", "round", "agent", "argument", "latency_ms", "ttft_ms",
+                "prompt_tokens", "completion_tokens", "cached")
+# Debate fields repeated on every row of a per-turn CSV export
+TURN_EXPORT_COLUMNS = ("debate_id", "topic", "model", "finished_at") + TURN_COLUMNS
+
+EXPORT_FORMATS = ("jsonl", "csv")
+
+# Queue markers understood by the writer thread
+_FLUSH, _STOP = "flush", "stop"
+
+def _debate_row(state: Dict[str, Any], usage: Dict[str, float], duration_seconds: Optional[float],
+                model: Optional[str], backend: Optional[str]) -> Tuple:
+    return (
+        state["debate_id"], state["topic"], json.dumps(list(state["personas"])), model, backend,
+        state.get("turn_order"), state.get("max_rounds"), len(state["debate_history"]),
+        state.get("winner"), state.get("judgment"), state.get("judge_confidence"),
+        json.dumps(state.get("judge_votes") or []),
+        usage.get("llm_calls", 0), usage.get("cached_calls", 0),
+        usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0),
+        round(usage.get("llm_seconds", 0.0), 3),
+        round(duration_seconds, 3) if duration_seconds is not None else None,
+        time.strftime("%Y-%m-%dT%H:%M:%S"),
+    )
+
+def _turn_rows(state: Dict[str, Any]) -> List[Tuple]:
+    """One row per argument, with the metrics recorded for the same turn"""
+    metrics = state.get("turn_metrics") or []
+    rows = []
+    for position, turn in enumerate(state["debate_history"]):
+        m = metrics[position] if position < len(metrics) else {}
+        rows.append((state["debate_id"], position, turn["round"], turn["agent"], turn["argument"],
+                     m.get("latency_ms"), m.get("ttft_ms"), m.get("prompt_tokens"),
+                     m.get("completion_tokens"),
+                     int(m["cached"]) if m.get("cached") is not None else None))
+    return rows
+
+class DebateArchive:
+    """SQLite archive of completed debates, written in batches off the critical path
+
+    ``record`` flattens a finished debate (topic, personas, every argument with
+    its metrics, token usage, timings and verdict) into rows and queues them.
+    A writer thread inserts queued debates in one transaction per batch: once
+    ``batch_size`` debates are waiting, ``flush_interval`` seconds after the
+    first of them, on ``flush()`` and at interpreter shutdown.
+
+    Debates are indexed by topic, persona, model and finish time. ``query`` and
+    ``export`` read through a cursor on their own connection, so archives of
+    any size are streamed rather than loaded into memory.
+    """
+
+    def __init__(self, path: str, batch_size: int = 64, flush_interval: float = 1.0):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.archived = 0
+        self.errors = 0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def record(self, state: Dict[str, Any], usage: Optional[Dict[str, float]] = None,
+               duration_seconds: Optional[float] = None, model: Optional[str] = None,
+               backend: Optional[str] = None):
+        """Queue a completed debate for the next batch"""
+        debate = _debate_row(state, usage or {}, duration_seconds, model, backend)
+        personas = [(state["debate_id"], position, persona)
+                    for position, persona in enumerate(state["personas"])]
+        self._start()
+        self._queue.put((debate, personas, _turn_rows(state)))
+
+    def flush(self):
+        """Block until every debate recorded so far has been written"""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(_FLUSH)
+            self._queue.join()
+
+    def close(self):
+        """Write pending debates and stop the writer thread"""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+
+    def _start(self):
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    conn = self._connect()
+                    self._writer = threading.Thread(target=self._run, args=(conn,),
+                                                    name="debate-archive-writer", daemon=True)
+                    self._writer.start()
+                    atexit.register(self.close)
+
+    def _run(self, conn: sqlite3.Connection):
+        stopping = False
+        while not stopping:
+            # Wait for a debate, then gather more until the batch is full or due
+            batch = [self._queue.get()]
+            due = time.monotonic() + self.flush_interval
+            while batch[-1] not in (_FLUSH, _STOP) and len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, due - time.monotonic())))
+                except queue.Empty:
+                    break
+            stopping = _STOP in batch
+            self._write(conn, [item for item in batch if item not in (_FLUSH, _STOP)])
+            # Items count as done only once committed, so flush() can wait on the queue
+            for _ in batch:
+                self._queue.task_done()
+        conn.close()
+
+    def _write(self, conn: sqlite3.Connection, debates: List[Tuple]):
+        if not debates:
+            return
+        ids = [(debate[0],) for debate, _, _ in debates]
+        try:
+            with conn:
+                # Re-archiving a debate (e.g. after resuming it) replaces it
+                conn.executemany("DELETE FROM debate_personas WHERE debate_id = ?", ids)
+                conn.executemany("DELETE FROM turns WHERE debate_id = ?", ids)
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO debates ({', '.join(DEBATE_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(DEBATE_COLUMNS))})",
+                    [debate for debate, _, _ in debates])
+                conn.executemany(
+                    "INSERT INTO debate_personas (debate_id, position, persona) VALUES (?, ?, ?)",
+                    [row for _, personas, _ in debates for row in personas])
+                conn.executemany(
+                    f"INSERT INTO turns (debate_id, {', '.join(TURN_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * (len(TURN_COLUMNS) + 1))})",
+                    [row for _, _, turns in debates for row in turns])
+            self.archived += len(debates)
+        except sqlite3.Error:
+            # Archiving must never take a debate down with it
+            self.errors += len(debates)
+
+    def _read(self) -> sqlite3.Connection:
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"No debate archive at {self.path}")
+        return self._connect()
+
+    @staticmethod
+    def _where(topic: Optional[str] = None, search: Optional[str] = None,
+               personas: Sequence[str] = (), model: Optional[str] = None,
+               winner: Optional[str] = None, since: Optional[str] = None,
+               until: Optional[str] = None) -> Tuple[str, List[Any]]:
+        """SQL condition over ``d`` (the debates table) and its parameters"""
+        clauses, params = [], []
+        if topic:
+            clauses.append("d.topic = ?")
+            params.append(topic)
+        if search:
+            clauses.append("d.topic LIKE ?")
+            params.append(f"%{search}%")
+        for persona in personas or ():
+            # Every listed persona took part, e.g. all head-to-heads of two personas
+            clauses.append("d.debate_id IN (SELECT debate_id FROM debate_personas WHERE persona = ?)")
+            params.append(persona)
+        if model:
+            clauses.append("d.model = ?")
+            params.append(model)
+        if winner:
+            clauses.append("d.winner = ?")
+            params.append(winner)
+        # Finish times are local ISO timestamps, so dates compare as prefixes
+        if since:
+            clauses.append("d.finished_at >= ?")
+            params.append(since)
+        if until:
+            clauses.append("d.finished_at < ?")
+            params.append(until)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, limit: Optional[int] = None, newest_first: bool = False,
+              **filters: Any) -> Iterator[Dict[str, Any]]:
+        """Debates matching the filters (topic, search, personas, model, winner, since, until)"""
+        where, params = self._where(**filters)
+        sql = (f"SELECT {', '.join('d.' + c for c in DEBATE_COLUMNS)} FROM debates d{where} "
+               f"ORDER BY d.finished_at {'DESC' if newest_first else 'ASC'}, d.debate_id")
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        conn = self._read()
+        try:
+            for row in conn.execute(sql, params):
+                yield self._debate(row)
+        finally:
+            conn.close()
+
+    def get(self, debate_id: str) -> Optional[Dict[str, Any]]:
+        """One debate with its turns, or None if it is not archived"""
+        for debate in self.iter_with_turns(debate_id=debate_id):
+            return debate
+        return None
+
+    def iter_with_turns(self, debate_id: Optional[str] = None,
+                        **filters: Any) -> Iterator[Dict[str, Any]]:
+        """Matching debates, each with its ``turns``, streamed in finish order"""
+        where, params = self._where(**filters)
+        if debate_id:
+            where += (" AND " if where else " WHERE ") + "d.debate_id = ?"
+            params.append(debate_id)
+        sql = (f"SELECT {', '.join('d.' + c for c in DEBATE_COLUMNS)}, "
+               f"{', '.join('t.' + c for c in TURN_COLUMNS)} "
+               f"FROM debates d LEFT JOIN turns t ON t.debate_id = d.debate_id{where} "
+               f"ORDER BY d.finished_at, d.debate_id, t.position")
+        width = len(DEBATE_COLUMNS)
+        conn = self._read()
+        try:
+            rows = conn.execute(sql, params)
+            for _, group in groupby(rows, key=lambda row: row[0]):
+                first = next(group)
+                debate = self._debate(first[:width])
+                debate["turns"] = [dict(zip(TURN_COLUMNS, row[width:]))
+                                   for row in (first, *group) if row[width] is not None]
+                yield debate
+        finally:
+            conn.close()
+
+    def export(self, output: TextIO, export_format: str = "jsonl", turns: bool = False,
+               **filters: Any) -> int:
+        """Stream matching debates to ``output`` as JSON Lines or CSV; returns the count
+
+        With ``turns``, JSON records include their arguments and CSV has one
+        row per argument instead of one per debate.
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        debates = self.iter_with_turns(**filters) if turns else self.query(**filters)
+        count = 0
+        if export_format == "jsonl":
+            for debate in debates:
+                output.write(json.dumps(debate) + "\n")
+                count += 1
+            return count
+
+        writer = csv.writer(output)
+        writer.writerow(TURN_EXPORT_COLUMNS if turns else DEBATE_COLUMNS)
+        for debate in debates:
+            count += 1
+            if turns:
+                for turn in debate["turns"]:
+                    writer.writerow([debate["debate_id"], debate["topic"], debate["model"],
+                                     debate["finished_at"]] + [turn[c] for c in TURN_COLUMNS])
+            else:
+                writer.writerow([self._csv_value(debate[c]) for c in DEBATE_COLUMNS])
+        return count
+
+    @staticmethod
+    def _debate(row: Sequence[Any]) -> Dict[str, Any]:
+        debate = dict(zip(DEBATE_COLUMNS, row))
+        debate["personas"] = json.loads(debate["personas"])
+        debate["judge_votes"] = json.loads(debate["judge_votes"] or "[]")
+        return debate
+
+    @staticmethod
+    def _csv_value(value: Any) -> Any:
+        if isinstance(value, list):
+            return json.dumps(value) if value and isinstance(value[0], dict) else ",".join(value)
+        return value
+
+    def format_summary(self) -> str:
+        summary = f"Archive: {self.path} ({self.archived} written this run)"
+        if self.errors:
+            summary += f" ({self.errors} failed)"
+        return summary
+
+def format_debates(debates: Iterator[Dict[str, Any]]) -> str:
+    """Table of archived debates, one line each"""
+    lines = [f"{'finished':<20}{'debate_id':<14}{'winner':<14}{'args':>5}{'tokens':>9}  "
+             f"{'personas':<28}topic"]
+    for d in debates:
+        personas = ",".join(d["personas"])
+        lines.append(f"{d['finished_at']:<20}{d['debate_id']:<14}{(d['winner'] or '-'):<14}"
+                     f"{d['arguments']:>5}{d['prompt_tokens'] + d['completion_tokens']:>9}  "
+                     f"{personas[:27]:<28}{d['topic']}")
+    return "\n".join(lines)
+
+def format_transcript(debate: Dict[str, Any]) -> str:
+    """One archived debate as readable text"""
+    lines = [f"Debate {debate['debate_id']} ({debate['finished_at']}, {debate['model'] or '-'})",
+             f"Topic: {debate['topic']}",
+             f"Personas: {', '.join(debate['personas'])}", ""]
+    for turn in debate["turns"]:
+        lines.append(f"[Round {turn['round']}] {turn['agent']}: {turn['argument']}")
+        lines.append("")
+    lines.append(f"Winner: {debate['winner'] or '-'}")
+    if debate["judgment"]:
+        lines.append(debate["judgment"])
+    lines.append(f"{debate['arguments']} arguments, {debate['llm_calls']} LLM calls, "
+                 f"{debate['prompt_tokens']} prompt + {debate['completion_tokens']} completion "
+                 f"tokens, {debate['duration_seconds'] or 0:.1f}s")
+    return "\n".join(lines)
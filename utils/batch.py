@@ -0,0 +1,81 @@
+import asyncio
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, TextIO
+
+def read_topics(path: str) -> List[str]:
+    """Read one topic per line from a file, or from stdin when path is '-'
+
+    Blank lines and lines starting with '#' are ignored.
+    """
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+
+    return [line.strip() for line in lines
+            if line.strip() and not line.strip().startswith("#")]
+
+@dataclass
+class BatchSummary:
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    elapsed_seconds: float = 0.0
+    records: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def debates_per_minute(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.total * 60.0 / self.elapsed_seconds
+
+class BatchRunner:
+    """Run many debates concurrently on one DebateSystem and its compiled graph
+
+    Debates run as asyncio tasks on a single event loop, so in-flight debates
+    waiting on the LLM cost a coroutine each rather than a thread each.
+    """
+
+    def __init__(self, debate_system, concurrency: int = 4):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.debate_system = debate_system
+        self.concurrency = concurrency
+
+    def run(self, topics: Iterable[str], output: Optional[TextIO] = None) -> BatchSummary:
+        """Run every topic and write one JSON record per debate to output"""
+        return asyncio.run(self.arun(topics, output))
+
+    async def arun(self, topics: Iterable[str], output: Optional[TextIO] = None) -> BatchSummary:
+        """Async counterpart of run for callers that already own an event loop"""
+        topics = list(topics)
+        summary = BatchSummary(total=len(topics))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.perf_counter()
+
+        async def run_one(topic: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.debate_system.aexecute_debate(topic)
+
+        tasks = [asyncio.create_task(run_one(topic)) for topic in topics]
+        for task in asyncio.as_completed(tasks):
+            record = await task
+            summary.records.append(record)
+            if record["status"] == "ok":
+                summary.succeeded += 1
+            else:
+                summary.failed += 1
+            self._write_record(record, output)
+
+        summary.elapsed_seconds = time.perf_counter() - started
+        return summary
+
+    def _write_record(self, record: Dict[str, Any], output: Optional[TextIO]):
+        if output is None:
+            return
+        output.write(json.dumps(record) + "\n")
+        output.flush()
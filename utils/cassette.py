@@ -0,0 +1,357 @@
+import asyncio
+import difflib
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from utils.config import Config
+from utils.tracing import current_debate_id
+
+# Mismatches described in full in a replay summary; the rest are only counted
+MAX_REPORTED_MISMATCHES = 20
+
+# Per-debate call counts in a replay report
+_REPORT_COUNTS = ("calls", "matched", "changed", "unrecorded", "unused")
+
+def request_key(request: Dict[str, Any]) -> str:
+    """Hash identifying a request (model, prompt, sampling settings, response format)"""
+    payload = json.dumps(request, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+def _prompt(request: Dict[str, Any]) -> str:
+    return request["messages"][-1]["content"]
+
+def _shape(request: Dict[str, Any]) -> Tuple:
+    """What kind of call a request is, independent of its prompt text"""
+    return (request["model"], request["max_tokens"],
+            (request.get("response_format") or {}).get("type"))
+
+def _open(path: str, mode: str) -> TextIO:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+@dataclass
+class Recording:
+    """One LLM request and the reply it got"""
+    key: str
+    shape: Tuple
+    prompt: str
+    content: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_ms: float = 0.0
+    used: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"key": self.key, "shape": list(self.shape), "prompt": self.prompt,
+                "content": self.content, "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens, "latency_ms": self.latency_ms}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Recording":
+        return cls(data["key"], tuple(data["shape"]), data["prompt"], data["content"],
+                   data.get("prompt_tokens", 0), data.get("completion_tokens", 0),
+                   data.get("latency_ms", 0.0))
+
+@dataclass
+class Mismatch:
+    """A replayed call that did not line up with the recording"""
+    debate_id: str
+    call: int
+    kind: str  # "changed", "unrecorded" or "unused"
+    detail: str
+
+@dataclass
+class ReplaySummary:
+    debates: int = 0
+    failed: int = 0
+    calls: int = 0
+    matched: int = 0
+    changed: int = 0
+    unrecorded: int = 0
+    unused: int = 0
+    verdict_changes: List[Tuple[str, Optional[str], Optional[str]]] = field(default_factory=list)
+    mismatches: List[Mismatch] = field(default_factory=list)
+    recorded_seconds: float = 0.0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def identical(self) -> bool:
+        """Every call matched its recording and every verdict was reproduced"""
+        return not (self.failed or self.changed or self.unrecorded or self.unused
+                    or self.verdict_changes)
+
+    @property
+    def speedup(self) -> float:
+        """Recorded debate time over replay wall time"""
+        return self.recorded_seconds / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+
+class Cassette:
+    """LLM request/response pairs of whole debates, for deterministic offline reruns
+
+    In ``record`` mode the reply each LLM call settles on (the winning
+    attempt, after retries and hedging) is kept under the debate that asked
+    for it. When the debate finishes, its settings (topic,
+    personas, turn order, length, verdict) and its calls are appended to
+    ``path`` as one JSON line; a ``.gz`` path is gzip-compressed. Debates that
+    fail are not recorded.
+
+    In ``replay`` mode debates are loaded one at a time (``debates()``), and
+    each request of a replayed debate is served the recorded reply to the same
+    request. When a prompt has changed, the next unused recording of the same
+    kind of call answers instead and the difference is reported. Requests with
+    nothing left to answer them are reported as unrecorded, and recordings
+    never asked for as unused. Replies take their recorded latency divided by
+    ``speed``; 0 replays them instantly.
+    """
+
+    def __init__(self, path: str, mode: str = "record", speed: float = 0.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unsupported cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self.recorded = 0
+        self.summary = ReplaySummary()
+        self._lock = threading.Lock()
+        # Calls per debate in flight: being recorded, or loaded for replay
+        self._calls: Dict[str, List[Recording]] = {}
+        self._started: Dict[str, float] = {}
+        self._positions: Dict[str, int] = {}
+        self._reports: Dict[str, Dict[str, int]] = {}
+
+    # Recording
+
+    def record(self, request: Dict[str, Any], content: str, prompt_tokens: int,
+               completion_tokens: int, latency: float):
+        """Keep a reply under the debate of the current context"""
+        debate_id = current_debate_id()
+        if debate_id is None or self.mode != "record":
+            return
+        recording = Recording(request_key(request), _shape(request), _prompt(request), content,
+                              prompt_tokens, completion_tokens, round(1000 * latency, 1))
+        with self._lock:
+            if debate_id not in self._calls:
+                self._calls[debate_id] = []
+                self._started[debate_id] = time.monotonic() - latency
+            self._calls[debate_id].append(recording)
+
+    def finish(self, debate_id: str, state: Dict[str, Any]):
+        """Append a finished debate to the cassette, or close out its replay"""
+        if self.mode == "replay":
+            self._finish_replay(debate_id)
+            return
+        with self._lock:
+            calls = self._calls.pop(debate_id, [])
+            started = self._started.pop(debate_id, None)
+            entry = {
+                "debate_id": debate_id,
+                "topic": state["topic"],
+                "personas": list(state["personas"]),
+                "turn_order": state.get("turn_order"),
+                "max_rounds": state.get("max_rounds"),
+                "winner": state.get("winner"),
+                "duration_seconds": round(time.monotonic() - started, 3) if started else 0.0,
+                "calls": [call.to_dict() for call in calls],
+            }
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Each debate is a complete gzip member, so an interrupted run keeps what it wrote
+            with _open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+            self.recorded += 1
+
+    def discard(self, debate_id: str):
+        """Forget a debate's calls (it failed, or its replay is over)"""
+        with self._lock:
+            self._calls.pop(debate_id, None)
+            self._started.pop(debate_id, None)
+            self._positions.pop(debate_id, None)
+
+    # Replaying
+
+    def debates(self) -> Iterator[Dict[str, Any]]:
+        """Recorded debates in file order, read one line at a time"""
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"No cassette at {self.path}")
+        with _open(self.path, "r") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def load(self, entry: Dict[str, Any]):
+        """Make a recorded debate's calls available to its replay"""
+        with self._lock:
+            self._calls[entry["debate_id"]] = [Recording.from_dict(call) for call in entry["calls"]]
+            self._positions[entry["debate_id"]] = 0
+            self._reports[entry["debate_id"]] = dict.fromkeys(_REPORT_COUNTS, 0)
+
+    def replay(self, request: Dict[str, Any]) -> Optional[Recording]:
+        """The recorded reply for a request of the current debate, or None if there is none"""
+        debate_id = current_debate_id()
+        key = request_key(request)
+        with self._lock:
+            calls = self._calls.get(debate_id, [])
+            position = self._positions.get(debate_id, 0) + 1
+            self._positions[debate_id] = position
+            report = self._reports.setdefault(debate_id, dict.fromkeys(_REPORT_COUNTS, 0))
+            report["calls"] += 1
+            self.summary.calls += 1
+
+            recording = next((call for call in calls if not call.used and call.key == key), None)
+            if recording is not None:
+                recording.used = True
+                report["matched"] += 1
+                self.summary.matched += 1
+                return recording
+
+            # The prompt changed: answer with the next unused call of the same kind
+            shape = _shape(request)
+            recording = next((call for call in calls if not call.used and call.shape == shape), None)
+            if recording is None:
+                report["unrecorded"] += 1
+                self.summary.unrecorded += 1
+                self._mismatch(debate_id, position, "unrecorded", _first_line(_prompt(request)))
+                return None
+            recording.used = True
+            report["changed"] += 1
+            self.summary.changed += 1
+            self._mismatch(debate_id, position, "changed", _diff(recording.prompt, _prompt(request)))
+            return recording
+
+    def delay(self, recording: Recording) -> float:
+        """Seconds to spend on a replayed reply"""
+        return recording.latency_ms / 1000.0 / self.speed if self.speed > 0 else 0.0
+
+    def report(self, debate_id: str) -> Dict[str, int]:
+        """Call counts of a replayed debate (calls, matched, changed, unrecorded, unused); read once"""
+        with self._lock:
+            return self._reports.pop(debate_id, dict.fromkeys(_REPORT_COUNTS, 0))
+
+    def _finish_replay(self, debate_id: str):
+        with self._lock:
+            unused = [call for call in self._calls.pop(debate_id, []) if not call.used]
+            report = self._reports.setdefault(debate_id, dict.fromkeys(_REPORT_COUNTS, 0))
+            report["unused"] = len(unused)
+            self.summary.unused += len(unused)
+            for call in unused:
+                self._mismatch(debate_id, 0, "unused", _first_line(call.prompt))
+
+    def _mismatch(self, debate_id: str, call: int, kind: str, detail: str):
+        if len(self.summary.mismatches) < MAX_REPORTED_MISMATCHES:
+            self.summary.mismatches.append(Mismatch(debate_id, call, kind, detail))
+
+    def format_summary(self) -> str:
+        if self.mode == "record":
+            return f"Cassette: {self.recorded} debates recorded to {self.path}"
+        s = self.summary
+        return (f"Cassette: {s.calls} calls replayed, {s.matched} matched, {s.changed} changed, "
+                f"{s.unrecorded} unrecorded, {s.unused} unused")
+
+def _first_line(text: str, width: int = 100) -> str:
+    line = text.strip().splitlines()[0] if text.strip() else ""
+    return line[:width]
+
+def _diff(recorded: str, replayed: str, max_lines: int = 12, width: int = 100) -> str:
+    """The changed lines of a prompt, recorded (-) against replayed (+)"""
+    lines = [line[:width] for line in difflib.unified_diff(recorded.splitlines(),
+                                                           replayed.splitlines(), lineterm="", n=0)
+             if not line.startswith(("---", "+++", "@@"))]
+    if len(lines) > max_lines:
+        lines = lines[:max_lines] + [f"... {len(lines) - max_lines} more changed lines"]
+    return "\n".join(lines)
+
+async def areplay(debate_system, cassette: Cassette, concurrency: int = 8,
+                  output: Optional[TextIO] = None) -> ReplaySummary:
+    """Rerun every debate on a cassette through the current graph
+
+    Each debate keeps its recorded ID, topic, personas, turn order and length,
+    so it makes the same requests unless the code producing them changed.
+    At most ``concurrency`` debates (and their recordings) are in memory at a
+    time. One JSON record per debate is written to ``output``.
+    """
+    summary = cassette.summary
+    started = time.perf_counter()
+
+    async def run_one(entry: Dict[str, Any]) -> Dict[str, Any]:
+        cassette.load(entry)
+        record = await debate_system.aexecute_debate(
+            entry["topic"], entry["debate_id"], personas=entry["personas"],
+            turn_order=entry["turn_order"], max_rounds=entry["max_rounds"])
+        record["recorded_winner"] = entry["winner"]
+        record["recorded_seconds"] = entry["duration_seconds"]
+        record["calls"] = cassette.report(entry["debate_id"])
+        cassette.discard(entry["debate_id"])
+        return record
+
+    def collect(record: Dict[str, Any]):
+        summary.debates += 1
+        summary.recorded_seconds += record["recorded_seconds"]
+        if record["status"] != "ok":
+            summary.failed += 1
+        elif record["winner"] != record["recorded_winner"]:
+            summary.verdict_changes.append((record["debate_id"], record["recorded_winner"],
+                                            record["winner"]))
+        if output is not None:
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+
+    pending = set()
+    for entry in cassette.debates():
+        if len(pending) >= concurrency:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                collect(task.result())
+        pending.add(asyncio.create_task(run_one(entry)))
+    for task in asyncio.as_completed(pending):
+        collect(await task)
+
+    summary.elapsed_seconds = time.perf_counter() - started
+    return summary
+
+def replay(debate_system, cassette: Cassette, concurrency: int = 8,
+           output: Optional[TextIO] = None) -> ReplaySummary:
+    """Synchronous wrapper around areplay"""
+    return asyncio.run(areplay(debate_system, cassette, concurrency, output))
+
+def format_replay(summary: ReplaySummary) -> str:
+    """Replay report: call matching, verdict changes and the first mismatches"""
+    lines = [f"{summary.debates} debates replayed ({summary.failed} failed) in "
+             f"{summary.elapsed_seconds:.2f}s, {summary.speedup:.0f}x faster than recorded "
+             f"({summary.recorded_seconds:.1f}s)",
+             f"{summary.calls} LLM calls: {summary.matched} matched, {summary.changed} with "
+             f"changed prompts, {summary.unrecorded} unrecorded; {summary.unused} recordings unused",
+             f"{len(summary.verdict_changes)} verdicts changed"]
+    for debate_id, before, after in summary.verdict_changes[:MAX_REPORTED_MISMATCHES]:
+        lines.append(f"  {debate_id}: {before} -> {after}")
+    if summary.mismatches:
+        lines.append("First mismatches:")
+        for m in summary.mismatches:
+            where = f"call {m.call}" if m.call else "never called"
+            lines.append(f"  {m.debate_id} {where}: {m.kind}")
+            lines.extend(f"    {line}" for line in m.detail.splitlines())
+    return "\n".join(lines)
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+def get_cassette() -> Optional[Cassette]:
+    """The cassette LLM calls are recorded on or replayed from, or None"""
+    global _cassette
+    if _cassette is None and Config.CASSETTE_PATH:
+        with _cassette_lock:
+            if _cassette is None:
+                _cassette = Cassette(Config.CASSETTE_PATH, "record")
+    return _cassette
+
+def set_cassette(cassette: Optional[Cassette]):
+    """Record on or replay from ``cassette``; call before the first LLM request"""
+    global _cassette
+    _cassette = cassette
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# Seconds between sweeps for expired entries (which also re-sync the row count)
+SWEEP_INTERVAL = 60.0
+
+class CompletionCache:
+    """On-disk LLM completion cache keyed by a hash of the request parameters
+
+    Entries live in a small SQLite database. Reads refresh an entry's access
+    time so that, once the cache holds more than ``max_entries`` rows, the least
+    recently used ones are evicted. Entries older than ``ttl_seconds`` are
+    treated as misses and removed. The row count is tracked in memory, so a
+    write costs index lookups rather than table scans; expired entries nobody
+    asks for are swept at most every SWEEP_INTERVAL seconds.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl_seconds: float = 7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_completions_last_access ON completions (last_access)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_completions_created_at ON completions (created_at)"
+        )
+        self._conn.commit()
+        self._count = 0
+        self._swept_at = 0.0
+
+    @staticmethod
+    def make_key(**request: Any) -> str:
+        """Hash the request parameters (model, messages, temperature, ...)"""
+        payload = json.dumps(request, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                self._count -= self._conn.execute(
+                    "DELETE FROM completions WHERE key = ?", (key,)).rowcount
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE completions SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Dict[str, Any]):
+        now = time.time()
+        with self._lock:
+            exists = self._conn.execute(
+                "SELECT 1 FROM completions WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, value, created_at, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            self._count += exists is None
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        """Sweep expired entries now and then; drop least recently used ones beyond max_entries"""
+        if now - self._swept_at >= SWEEP_INTERVAL:
+            self._conn.execute("DELETE FROM completions WHERE created_at < ?",
+                               (now - self.ttl_seconds,))
+            # Other processes may share the file, so recount rather than trust ours
+            self._count = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+            self._swept_at = now
+        if self._count > self.max_entries:
+            self._count -= self._conn.execute(
+                "DELETE FROM completions WHERE key IN ("
+                " SELECT key FROM completions ORDER BY last_access ASC LIMIT ?)",
+                (self._count - self.max_entries,),
+            ).rowcount
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM completions")
+            self._conn.commit()
+            self._count = 0
+
+    def format_summary(self) -> str:
+        lookups = self.hits + self.misses
+        hit_rate = 100.0 * self.hits / lookups if lookups else 0.0
+        return f"Completion cache: {self.hits} hits, {self.misses} misses ({hit_rate:.0f}% hit rate)"
@@ -9,4 +9,142 @@ class Config:
     GROQ_MODEL = os.getenv("GROQ_MODEL", "llama3-8b-8192")
     MAX_ROUNDS = int(os.getenv("MAX_ROUNDS", 8))
     AGENT_A_PERSONA = os.getenv("AGENT_A_PERSONA", "Scientist")
-    AGENT_B_PERSONA = os.getenv("AGENT_B_PERSONA", "Philosopher")
\ No newline at end of file
+    AGENT_B_PERSONA = os.getenv("AGENT_B_PERSONA", "Philosopher")
+
+    # Debaters, in speaking order; defaults to the two personas above
+    PERSONAS = [name.strip() for name in
+                os.getenv("PERSONAS", f"{AGENT_A_PERSONA},{AGENT_B_PERSONA}").split(",")
+                if name.strip()]
+    # Turn order: "round_robin", "snake" (reverse every other round) or "random"
+    TURN_ORDER = os.getenv("TURN_ORDER", "round_robin")
+    # Generate the first round's arguments concurrently as opening statements
+    OPENING_STATEMENTS = os.getenv("OPENING_STATEMENTS", "true").lower() == "true"
+
+    # LLM backend: "groq", "openai" (any OpenAI-compatible server) or "fake"
+    LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+    LLM_MODEL = os.getenv("LLM_MODEL", GROQ_MODEL)
+    LLM_BASE_URL = os.getenv("LLM_BASE_URL", "http://localhost:8000/v1")
+    LLM_API_KEY = os.getenv("LLM_API_KEY")
+    FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", 0))
+    # Fake backend distributions: log-normal sigma of the latency around
+    # FAKE_LLM_LATENCY_MS, and mean and standard deviation of the reply length
+    FAKE_LLM_LATENCY_JITTER = float(os.getenv("FAKE_LLM_LATENCY_JITTER", 0))
+    FAKE_LLM_WORDS = int(os.getenv("FAKE_LLM_WORDS", 40))
+    FAKE_LLM_WORDS_JITTER = float(os.getenv("FAKE_LLM_WORDS_JITTER", 0))
+    # Fault injection for the fake backend: share of requests that fail with a
+    # retryable 503, and share that stall for FAKE_LLM_STALL_MS before answering
+    FAKE_LLM_FAILURE_RATE = float(os.getenv("FAKE_LLM_FAILURE_RATE", 0))
+    FAKE_LLM_STALL_RATE = float(os.getenv("FAKE_LLM_STALL_RATE", 0))
+    FAKE_LLM_STALL_MS = float(os.getenv("FAKE_LLM_STALL_MS", 5000))
+    # Provider quotas emulated by the fake backend (0 = unlimited): requests over
+    # them get a 429 with Retry-After, and replies carry x-ratelimit-* headers
+    FAKE_LLM_REQUESTS_PER_MINUTE = float(os.getenv("FAKE_LLM_REQUESTS_PER_MINUTE", 0))
+    FAKE_LLM_TOKENS_PER_MINUTE = float(os.getenv("FAKE_LLM_TOKENS_PER_MINUTE", 0))
+
+    # Shared LLM client: per-request timeout and keep-alive connection pool
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 30))
+    LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", 20))
+    LLM_KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS", 30))
+
+    # Resilience around every LLM call: attempts on transient errors with
+    # jittered exponential backoff, a timeout per attempt and a deadline per
+    # call (0 disables either)
+    LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", 3))
+    LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", 0.5))
+    LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", 8))
+    LLM_ATTEMPT_TIMEOUT_SECONDS = float(os.getenv("LLM_ATTEMPT_TIMEOUT_SECONDS", 30))
+    LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", 90))
+    # Hedging: when a call is slower than this percentile of recent latencies,
+    # send a second copy and take whichever answers first (0 disables it)
+    LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", 0))
+    LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", 20))
+    # Circuit breaker: after this many consecutive failures, fail calls fast
+    # for LLM_BREAKER_RESET_SECONDS before letting a probe through (0 disables it)
+    LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", 5))
+    LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", 30))
+    # Process-wide rate limits shared by all debates (0 = unlimited). With
+    # LLM_RATE_LIMIT_HEADERS the scheduler also follows the provider's
+    # x-ratelimit-* headers, and learns the tokens-per-minute quota from them
+    # when LLM_TOKENS_PER_MINUTE is not set
+    LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", 0))
+    LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", 0))
+    LLM_RATE_LIMIT_HEADERS = os.getenv("LLM_RATE_LIMIT_HEADERS", "true").lower() == "true"
+
+    # On-disk completion cache; set COMPLETION_CACHE_PATH to "" to disable it
+    COMPLETION_CACHE_PATH = os.getenv("COMPLETION_CACHE_PATH", ".cache/completions.sqlite3")
+    COMPLETION_CACHE_MAX_ENTRIES = int(os.getenv("COMPLETION_CACHE_MAX_ENTRIES", 10000))
+    COMPLETION_CACHE_TTL_SECONDS = float(os.getenv("COMPLETION_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+    CACHE_JUDGE = os.getenv("CACHE_JUDGE", "true").lower() == "true"
+    CACHE_AGENTS = os.getenv("CACHE_AGENTS", "false").lower() == "true"
+
+    # Judge: one JSON call for summary + verdict instead of two text calls
+    JUDGE_STRUCTURED = os.getenv("JUDGE_STRUCTURED", "false").lower() == "true"
+    # Judge panel: K concurrent verdicts (1 = single judge), cycling through
+    # the listed models/rubrics/weights, aggregated by "majority" or "weighted" vote
+    JUDGE_PANEL_SIZE = int(os.getenv("JUDGE_PANEL_SIZE", 1))
+    JUDGE_PANEL_MODELS = [m.strip() for m in os.getenv("JUDGE_PANEL_MODELS", "").split(",") if m.strip()]
+    JUDGE_PANEL_RUBRICS = [r.strip() for r in
+                           os.getenv("JUDGE_PANEL_RUBRICS", "balanced,evidence,rhetoric").split(",")
+                           if r.strip()]
+    JUDGE_PANEL_WEIGHTS = [float(w) for w in os.getenv("JUDGE_PANEL_WEIGHTS", "").split(",") if w.strip()]
+    JUDGE_PANEL_AGGREGATION = os.getenv("JUDGE_PANEL_AGGREGATION", "majority")
+    # Stop waiting once the remaining judges can no longer change the outcome
+    JUDGE_PANEL_EARLY_EXIT = os.getenv("JUDGE_PANEL_EARLY_EXIT", "true").lower() == "true"
+
+    # Stream tokens to the console/sinks as they arrive
+    STREAMING = os.getenv("STREAMING", "false").lower() == "true"
+
+    # Logging: "text" or "jsonl", one file per debate under LOG_DIR
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+    LOG_DIR = os.getenv("LOG_DIR", "logs")
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 3))
+    LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", 0.5))
+
+    # Tracing: per-node/LLM spans exported as "prometheus" text or "otlp-json"
+    TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+    TRACE_FORMAT = os.getenv("TRACE_FORMAT", "prometheus")
+    TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", 100000))
+    TRACE_SUMMARY = os.getenv("TRACE_SUMMARY", "true").lower() == "true"
+
+    # Checkpointing: persist graph state after every node so debates can be resumed
+    CHECKPOINTING = os.getenv("CHECKPOINTING", "false").lower() == "true"
+    CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", ".cache/checkpoints.sqlite3")
+    CHECKPOINT_RETENTION_SECONDS = float(os.getenv("CHECKPOINT_RETENTION_SECONDS", 24 * 3600))
+
+    # Archive of every completed debate (topic, personas, arguments, tokens,
+    # timings, verdict) in SQLite, written in batches by a background thread;
+    # set ARCHIVE_PATH to "" to disable it
+    ARCHIVE_PATH = os.getenv("ARCHIVE_PATH", ".cache/archive.sqlite3")
+    ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 64))
+    ARCHIVE_FLUSH_INTERVAL = float(os.getenv("ARCHIVE_FLUSH_INTERVAL", 1.0))
+
+    # Cassette: record every LLM request/reply of each finished debate to this
+    # file (".gz" compresses it) for offline replay with `python main.py replay`
+    CASSETTE_PATH = os.getenv("CASSETTE_PATH", "")
+
+    # Prompt context: recent turns verbatim, older ones in a rolling summary
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 600))
+    CONTEXT_RECENT_TURNS = int(os.getenv("CONTEXT_RECENT_TURNS", 3))
+    CONTEXT_SUMMARY_TOKENS = int(os.getenv("CONTEXT_SUMMARY_TOKENS", 200))
+    # Seconds the memory node waits for a background summary before going on without it
+    CONTEXT_SUMMARY_TIMEOUT_SECONDS = float(os.getenv("CONTEXT_SUMMARY_TIMEOUT_SECONDS", 60))
+
+    # Retrieval of relevant earlier arguments from a local hashed-TF vector index
+    RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", 3))
+    RETRIEVAL_DIM = int(os.getenv("RETRIEVAL_DIM", 1024))
+
+    # Repetition/convergence detection (MinHash over word shingles)
+    REPETITION_THRESHOLD = float(os.getenv("REPETITION_THRESHOLD", 0.4))
+    CONVERGENCE_WINDOW = int(os.getenv("CONVERGENCE_WINDOW", 4))
+    EARLY_STOP = os.getenv("EARLY_STOP", "true").lower() == "true"
+    MINHASH_PERMUTATIONS = int(os.getenv("MINHASH_PERMUTATIONS", 64))
+    SHINGLE_SIZE = int(os.getenv("SHINGLE_SIZE", 2))
+
+    # HTTP server: debates over REST + Server-Sent Events (python main.py serve)
+    SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+    SERVER_PORT = int(os.getenv("SERVER_PORT", 8080))
+    SERVER_MAX_CONCURRENT_DEBATES = int(os.getenv("SERVER_MAX_CONCURRENT_DEBATES", 4))
+    SERVER_QUEUE_SIZE = int(os.getenv("SERVER_QUEUE_SIZE", 16))
+    SERVER_RETAIN_DEBATES = int(os.getenv("SERVER_RETAIN_DEBATES", 100))
+    SERVER_MAX_ROUNDS = int(os.getenv("SERVER_MAX_ROUNDS", 40))
@@ -0,0 +1,210 @@
+import asyncio
+import contextvars
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional
+
+from utils.config import Config
+from utils.llm_client import LLMClient, LLMError, get_llm_client
+from utils.state import DebateState
+from utils.vector_index import get_argument_index
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) without a tokenizer"""
+    return math.ceil(len(text) / 4)
+
+def _truncate(text: str, max_tokens: int) -> str:
+    max_chars = max(0, max_tokens * 4)
+    if len(text) <= max_chars:
+        return text
+    return text[:max(0, max_chars - 3)].rstrip() + "..."
+
+class ContextBuilder:
+    """Builds the debate context for agent prompts within a token budget
+
+    The most recent turns are quoted verbatim, followed in priority by the
+    ``top_k`` earlier arguments most relevant to the one being answered
+    (from the shared ArgumentIndex). Older turns are also folded into a
+    rolling summary stored in the debate state (``context_summary``, covering
+    the first ``summary_turns`` entries of the history). The memory node calls
+    ``update`` after every turn: it applies the fold started after the
+    previous turn and starts the next one on a background thread, so the
+    summary is refreshed while the next agent is speaking. Each fold lands
+    exactly one turn after it started, whatever the LLM's timing, so the same
+    debate always builds the same prompts.
+    """
+
+    def __init__(self, llm: Optional[LLMClient] = None, token_budget: Optional[int] = None,
+                 recent_turns: Optional[int] = None, summary_tokens: Optional[int] = None,
+                 top_k: Optional[int] = None, summary_timeout: Optional[float] = None):
+        self._llm = llm
+        self.token_budget = token_budget or Config.CONTEXT_TOKEN_BUDGET
+        self.recent_turns = Config.CONTEXT_RECENT_TURNS if recent_turns is None else recent_turns
+        self.summary_tokens = summary_tokens or Config.CONTEXT_SUMMARY_TOKENS
+        self.top_k = Config.RETRIEVAL_TOP_K if top_k is None else top_k
+        self.summary_timeout = (Config.CONTEXT_SUMMARY_TIMEOUT_SECONDS
+                                if summary_timeout is None else summary_timeout)
+        self.index = get_argument_index()
+        self._executor = ThreadPoolExecutor(thread_name_prefix="context-summary")
+        # In-flight fold per debate: (future, number of history entries it covers)
+        self._pending: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def llm(self) -> LLMClient:
+        """The summarizing client; the shared one is created on first use"""
+        return self._llm or get_llm_client()
+
+    def build(self, state: DebateState) -> str:
+        """Context block for the next prompt: summary, relevant and recent turns"""
+        history = state["debate_history"]
+        if not history:
+            return ""
+
+        summary = state.get("context_summary", "")
+        if summary:
+            summary = _truncate(summary, self.token_budget // 2)
+        remaining = self.token_budget - estimate_tokens(summary)
+
+        # The most recent turns are quoted newest first until the budget runs
+        # out; the latest turn is always included
+        recent: List[str] = []
+        for entry in reversed(history[-self.recent_turns:] if self.recent_turns else history[-1:]):
+            line = f"- {entry['agent']}: {entry['argument']}\n"
+            cost = estimate_tokens(line)
+            if cost > remaining:
+                if not recent:
+                    recent.append(_truncate(line.rstrip("\n"), remaining) + "\n")
+                    remaining = 0
+                break
+            recent.append(line)
+            remaining -= cost
+        recent.reverse()
+
+        # Spend what is left on the earlier arguments most similar to the one
+        # being answered, which the summary may only paraphrase
+        relevant = []
+        if self.top_k and remaining > 0:
+            matches = self.index.relevant(state["debate_id"], history, history[-1]["argument"],
+                                          self.top_k, before=len(history) - len(recent))
+            for position in sorted(position for position, _ in matches):
+                entry = history[position]
+                line = f"- Round {entry['round']}, {entry['agent']}: {entry['argument']}\n"
+                cost = estimate_tokens(line)
+                if cost <= remaining:
+                    relevant.append(line)
+                    remaining -= cost
+
+        context = ""
+        if summary:
+            context += f"Summary of earlier arguments:\n{summary}\n\n"
+        if relevant:
+            context += "Relevant earlier arguments:\n" + "".join(relevant) + "\n"
+        context += "Previous arguments in this debate:\n" + "".join(recent) + "\n"
+        return context
+
+    def update(self, state: DebateState) -> Dict:
+        """Apply the fold started after the previous turn and schedule the next
+
+        Waits for that fold if it is still running. Returns the state update:
+        ``context_summary`` and ``summary_turns`` when a fold was applied,
+        otherwise nothing.
+        """
+        with self._lock:
+            pending = self._pending.pop(state["debate_id"], None)
+        summary = None
+        if pending is not None:
+            try:
+                summary = pending[0].result(timeout=self.summary_timeout or None)
+            except FutureTimeoutError:
+                pass  # Too slow; keep the previous summary and fold again from there
+        return self._schedule(state, pending, summary)
+
+    async def aupdate(self, state: DebateState) -> Dict:
+        """Async counterpart of update; waits for the fold without blocking the loop"""
+        with self._lock:
+            pending = self._pending.pop(state["debate_id"], None)
+        summary = None
+        if pending is not None:
+            try:
+                summary = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(pending[0])),
+                                                 self.summary_timeout or None)
+            except asyncio.TimeoutError:
+                pass
+        return self._schedule(state, pending, summary)
+
+    def _schedule(self, state: DebateState, pending: Optional[tuple],
+                  summary: Optional[str]) -> Dict:
+        """Apply a finished fold (None: failed or timed out) and start the next one"""
+        update: Dict = {}
+        start = state.get("summary_turns", 0)
+        if summary is not None:
+            start = pending[1]
+            update = {"context_summary": summary, "summary_turns": start}
+        else:
+            summary = state.get("context_summary", "")
+
+        # Fold everything older than the verbatim window into the summary,
+        # unless no agent will speak again to read it
+        target = len(state["debate_history"]) - self.recent_turns
+        if target <= start or len(state["debate_history"]) >= state["max_rounds"]:
+            return update
+        future = self._executor.submit(
+            contextvars.copy_context().run, self._fold,
+            state["topic"], summary, list(state["debate_history"][start:target]))
+        with self._lock:
+            self._pending[state["debate_id"]] = (future, target)
+        return update
+
+    def finish(self, debate_id: str):
+        """Wait for a finished debate's in-flight summary, then forget it
+
+        Its LLM call then always completes before the debate is recorded.
+        """
+        with self._lock:
+            pending = self._pending.pop(debate_id, None)
+        if pending is not None:
+            try:
+                pending[0].result(timeout=self.summary_timeout or None)
+            except FutureTimeoutError:
+                pass
+
+    def discard(self, debate_id: str):
+        """Forget any in-flight summary of a finished debate"""
+        with self._lock:
+            self._pending.pop(debate_id, None)
+
+    def _fold(self, topic: str, summary: str, entries: List[Dict]) -> Optional[str]:
+        """Merge new turns into the running summary; None if the call fails"""
+        new_arguments = "".join(f"- Round {entry['round']}, {entry['agent']}: {entry['argument']}\n"
+                                for entry in entries)
+        max_words = int(self.summary_tokens * 0.75)
+        prompt = f"""You are keeping running notes on a formal debate.
+Topic: {topic}
+
+Notes so far:
+{summary or "(none yet)"}
+
+New arguments:
+{new_arguments}
+Rewrite the notes so they also cover the new arguments. Keep each side's key claims, evidence and open disagreements, drop repetition, and stay under {max_words} words.
+
+Updated notes:"""
+        try:
+            response = self.llm.complete(prompt, temperature=0.3, max_tokens=self.summary_tokens)
+            return response.content.strip()
+        except LLMError:
+            return None
+
+_shared_builder: Optional[ContextBuilder] = None
+_shared_builder_lock = threading.Lock()
+
+def get_context_builder() -> ContextBuilder:
+    """Return the process-wide context builder, creating it on first use"""
+    global _shared_builder
+    if _shared_builder is None:
+        with _shared_builder_lock:
+            if _shared_builder is None:
+                _shared_builder = ContextBuilder()
+    return _shared_builder
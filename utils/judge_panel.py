@@ -0,0 +1,143 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from utils.config import Config
+
+# Evaluation criteria each panel judge can be briefed with
+RUBRICS: Dict[str, Tuple[str, ...]] = {
+    "balanced": (
+        "Logical consistency and reasoning",
+        "Evidence quality and relevance",
+        "Argument strength and persuasiveness",
+        "Response to opposing points",
+        "Overall coherence of position",
+    ),
+    "evidence": (
+        "Quality, relevance and accuracy of the evidence cited",
+        "Validity of the inferences drawn from it",
+        "Honesty about uncertainty and limitations",
+    ),
+    "rhetoric": (
+        "Clarity and persuasiveness of each argument",
+        "Direct engagement with the opponents' strongest points",
+        "Overall coherence of position across rounds",
+    ),
+}
+
+AGGREGATIONS = ("majority", "weighted")
+
+@dataclass(frozen=True)
+class JudgeSpec:
+    """One seat on the judge panel"""
+    name: str
+    model: Optional[str] = None   # None uses the client's default model
+    rubric: str = "balanced"
+    weight: float = 1.0
+
+@dataclass
+class Vote:
+    judge: JudgeSpec
+    winner: str
+    reasoning: str
+
+    @property
+    def abstained(self) -> bool:
+        """Failed evaluations don't count towards any outcome"""
+        return self.winner == "Error"
+
+def build_panel(size: Optional[int] = None, models: Optional[Sequence[str]] = None,
+                rubrics: Optional[Sequence[str]] = None,
+                weights: Optional[Sequence[float]] = None) -> List[JudgeSpec]:
+    """Panel of ``size`` judges, cycling through the configured models, rubrics and weights"""
+    size = Config.JUDGE_PANEL_SIZE if size is None else size
+    models = list(Config.JUDGE_PANEL_MODELS if models is None else models) or [None]
+    rubrics = list(Config.JUDGE_PANEL_RUBRICS if rubrics is None else rubrics) or ["balanced"]
+    weights = list(Config.JUDGE_PANEL_WEIGHTS if weights is None else weights) or [1.0]
+
+    for rubric in rubrics:
+        if rubric not in RUBRICS:
+            raise ValueError(f"Unknown judge rubric: {rubric} (expected one of {', '.join(RUBRICS)})")
+
+    return [JudgeSpec(name=f"judge_{i + 1}", model=models[i % len(models)],
+                      rubric=rubrics[i % len(rubrics)], weight=float(weights[i % len(weights)]))
+            for i in range(size)]
+
+class VoteTally:
+    """Running count of panel votes that knows when the outcome is settled
+
+    Votes are added as the judges answer. The outcome is decided once the
+    leader's weight exceeds the runner-up's plus every vote still pending, so
+    the remaining judges cannot change it and the panel can stop waiting.
+    With ``majority`` aggregation every judge counts once; with ``weighted``
+    each counts its configured weight.
+    """
+
+    def __init__(self, panel: Sequence[JudgeSpec], aggregation: str = "majority"):
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"Unknown vote aggregation: {aggregation} "
+                             f"(expected one of {', '.join(AGGREGATIONS)})")
+        self.panel = list(panel)
+        self.aggregation = aggregation
+        self.votes: List[Vote] = []
+        self._totals: Dict[str, float] = {}
+        self._pending = sum(self._weight(judge) for judge in self.panel)
+        self._abstained = 0.0
+
+    def _weight(self, judge: JudgeSpec) -> float:
+        return judge.weight if self.aggregation == "weighted" else 1.0
+
+    def add(self, vote: Vote):
+        weight = self._weight(vote.judge)
+        self.votes.append(vote)
+        self._pending -= weight
+        if vote.abstained:
+            self._abstained += weight
+        else:
+            self._totals[vote.winner] = self._totals.get(vote.winner, 0.0) + weight
+
+    def _standings(self) -> List[Tuple[str, float]]:
+        return sorted(self._totals.items(), key=lambda item: item[1], reverse=True)
+
+    def decided(self) -> bool:
+        """True once the votes still pending cannot change the winner"""
+        standings = self._standings()
+        if not standings:
+            return self._pending <= 0
+        runner_up = standings[1][1] if len(standings) > 1 else 0.0
+        return standings[0][1] > runner_up + self._pending or self._pending <= 0
+
+    def result(self) -> Dict:
+        """Winner, confidence and the reasoning of the most weighted judge backing it
+
+        Confidence is the share of the non-abstaining panel weight known to
+        back the winner; judges that had not answered when the panel stopped
+        early count against it, so it is a lower bound.
+        """
+        standings = self._standings()
+        eligible = sum(self._weight(judge) for judge in self.panel) - self._abstained
+        if not standings:
+            reasons = "; ".join(vote.reasoning for vote in self.votes) or "No judge answered"
+            return {"winner": "Error", "reasoning": reasons, "confidence": 0.0,
+                    "votes": self._vote_records()}
+
+        leader, weight = standings[0]
+        tied = len(standings) > 1 and standings[1][1] == weight
+        winner = "Tie" if tied else leader
+        backing = [vote for vote in self.votes if vote.winner == winner]
+        if backing:
+            reasoning = max(backing, key=lambda vote: self._weight(vote.judge)).reasoning
+        else:
+            reasoning = "The panel split evenly between " + " and ".join(
+                name for name, total in standings if total == weight)
+
+        return {
+            "winner": winner,
+            "reasoning": reasoning,
+            "confidence": round(self._totals.get(winner, 0.0) / eligible, 3) if eligible else 0.0,
+            "votes": self._vote_records(),
+        }
+
+    def _vote_records(self) -> List[Dict]:
+        return [{"judge": vote.judge.name, "model": vote.judge.model, "rubric": vote.judge.rubric,
+                 "weight": vote.judge.weight, "winner": vote.winner, "reasoning": vote.reasoning}
+                for vote in self.votes]
@@ -0,0 +1,494 @@
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Mapping, Optional
+
+import httpx
+from utils.cassette import Cassette, get_cassette
+from utils.config import Config
+from utils.rate_limit import TokenBucket
+
+@dataclass
+class Completion:
+    """Provider-neutral result of a non-streamed completion"""
+    content: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+@dataclass
+class StreamDelta:
+    """One piece of a streamed completion: text, final usage, or both"""
+    text: Optional[str] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+
+class LLMBackend:
+    """Transport for OpenAI-style chat completion requests
+
+    ``request`` is a dict with ``model``, ``messages``, ``temperature``,
+    ``max_tokens`` and optionally ``response_format``. Backends raise on
+    failure; LLMClient turns errors into LLMError and does the accounting.
+    Response headers are passed to ``on_headers`` (if set) so the rate-limit
+    scheduler can follow the provider's ``x-ratelimit-*`` figures.
+    """
+
+    name = "base"
+    on_headers: Optional[Callable[[Mapping[str, str]], None]] = None
+
+    def _observe(self, headers: Mapping[str, str]):
+        if self.on_headers is not None:
+            self.on_headers(headers)
+
+    def complete(self, request: Dict[str, Any]) -> Completion:
+        raise NotImplementedError
+
+    async def acomplete(self, request: Dict[str, Any]) -> Completion:
+        raise NotImplementedError
+
+    def stream(self, request: Dict[str, Any]) -> Iterator[StreamDelta]:
+        raise NotImplementedError
+
+    def astream(self, request: Dict[str, Any]) -> AsyncIterator[StreamDelta]:
+        raise NotImplementedError
+
+    def list_models(self) -> List[str]:
+        raise NotImplementedError
+
+class _PerLoopClients:
+    """Async HTTP pools are bound to the event loop that opened them, so keep
+    one async client per running loop"""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = \
+            weakref.WeakKeyDictionary()
+
+    def get(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._factory()
+            self._clients[loop] = client
+        return client
+
+def _usage(usage) -> Dict[str, int]:
+    """Read token counts from a usage object or dict"""
+    if usage is None:
+        return {"prompt_tokens": 0, "completion_tokens": 0}
+    if isinstance(usage, dict):
+        get = usage.get
+    else:
+        get = lambda key: getattr(usage, key, 0)
+    return {"prompt_tokens": get("prompt_tokens") or 0,
+            "completion_tokens": get("completion_tokens") or 0}
+
+class GroqBackend(LLMBackend):
+    """Groq cloud API through the official SDK over a shared keep-alive pool"""
+
+    name = "groq"
+
+    def __init__(self, api_key: Optional[str], timeout: httpx.Timeout, limits: httpx.Limits):
+        from groq import Groq, AsyncGroq, DefaultHttpxClient, DefaultAsyncHttpxClient
+
+        # LLMClient's resilience layer does the retrying, so the SDK must not
+        self.client = Groq(
+            api_key=api_key,
+            timeout=timeout,
+            max_retries=0,
+            http_client=DefaultHttpxClient(limits=limits, timeout=timeout),
+        )
+        self._async_clients = _PerLoopClients(lambda: AsyncGroq(
+            api_key=api_key,
+            timeout=timeout,
+            max_retries=0,
+            http_client=DefaultAsyncHttpxClient(limits=limits, timeout=timeout),
+        ))
+
+    # Raw responses expose the rate-limit headers alongside the parsed body
+    def complete(self, request: Dict[str, Any]) -> Completion:
+        raw = self.client.chat.completions.with_raw_response.create(**request)
+        self._observe(raw.headers)
+        return self._to_completion(raw.parse())
+
+    async def acomplete(self, request: Dict[str, Any]) -> Completion:
+        raw = await self._async_clients.get().chat.completions.with_raw_response.create(**request)
+        self._observe(raw.headers)
+        return self._to_completion(await raw.parse())
+
+    def stream(self, request: Dict[str, Any]) -> Iterator[StreamDelta]:
+        raw = self.client.chat.completions.with_raw_response.create(stream=True, **request)
+        self._observe(raw.headers)
+        for chunk in raw.parse():
+            yield self._to_delta(chunk)
+
+    async def astream(self, request: Dict[str, Any]) -> AsyncIterator[StreamDelta]:
+        raw = await self._async_clients.get().chat.completions.with_raw_response.create(
+            stream=True, **request)
+        self._observe(raw.headers)
+        async for chunk in await raw.parse():
+            yield self._to_delta(chunk)
+
+    def list_models(self) -> List[str]:
+        return [model.id for model in self.client.models.list().data]
+
+    @staticmethod
+    def _to_completion(response) -> Completion:
+        return Completion(content=response.choices[0].message.content or "",
+                          **_usage(getattr(response, "usage", None)))
+
+    @staticmethod
+    def _to_delta(chunk) -> StreamDelta:
+        delta = StreamDelta()
+        # Groq reports usage on the last chunk under x_groq
+        usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or getattr(chunk, "usage", None)
+        if usage is not None:
+            counts = _usage(usage)
+            delta.prompt_tokens = counts["prompt_tokens"]
+            delta.completion_tokens = counts["completion_tokens"]
+        if chunk.choices:
+            delta.text = chunk.choices[0].delta.content
+        return delta
+
+class OpenAICompatibleBackend(LLMBackend):
+    """Any server implementing the OpenAI ``/chat/completions`` HTTP API
+
+    Works with self-hosted inference servers (vLLM, llama.cpp server, TGI,
+    Ollama's OpenAI endpoint, ...). Streaming uses server-sent events.
+    """
+
+    name = "openai"
+
+    def __init__(self, base_url: str, api_key: Optional[str], timeout: httpx.Timeout,
+                 limits: httpx.Limits):
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.base_url = base_url.rstrip("/")
+        self.client = httpx.Client(base_url=self.base_url, headers=headers,
+                                   timeout=timeout, limits=limits)
+        self._async_clients = _PerLoopClients(lambda: httpx.AsyncClient(
+            base_url=self.base_url, headers=headers, timeout=timeout, limits=limits))
+
+    def complete(self, request: Dict[str, Any]) -> Completion:
+        response = self.client.post("/chat/completions", json=request)
+        response.raise_for_status()
+        self._observe(response.headers)
+        return self._to_completion(response.json())
+
+    async def acomplete(self, request: Dict[str, Any]) -> Completion:
+        response = await self._async_clients.get().post("/chat/completions", json=request)
+        response.raise_for_status()
+        self._observe(response.headers)
+        return self._to_completion(response.json())
+
+    def stream(self, request: Dict[str, Any]) -> Iterator[StreamDelta]:
+        with self.client.stream("POST", "/chat/completions", json=self._stream_body(request)) as response:
+            response.raise_for_status()
+            self._observe(response.headers)
+            for line in response.iter_lines():
+                delta = self._parse_event(line)
+                if delta is not None:
+                    yield delta
+
+    async def astream(self, request: Dict[str, Any]) -> AsyncIterator[StreamDelta]:
+        client = self._async_clients.get()
+        async with client.stream("POST", "/chat/completions", json=self._stream_body(request)) as response:
+            response.raise_for_status()
+            self._observe(response.headers)
+            async for line in response.aiter_lines():
+                delta = self._parse_event(line)
+                if delta is not None:
+                    yield delta
+
+    def list_models(self) -> List[str]:
+        response = self.client.get("/models")
+        response.raise_for_status()
+        return [model["id"] for model in response.json().get("data", [])]
+
+    @staticmethod
+    def _stream_body(request: Dict[str, Any]) -> Dict[str, Any]:
+        return {**request, "stream": True, "stream_options": {"include_usage": True}}
+
+    @staticmethod
+    def _to_completion(data: Dict[str, Any]) -> Completion:
+        return Completion(content=data["choices"][0]["message"]["content"] or "",
+                          **_usage(data.get("usage")))
+
+    @staticmethod
+    def _parse_event(line: str) -> Optional[StreamDelta]:
+        if not line.startswith("data:"):
+            return None
+        payload = line[len("data:"):].strip()
+        if not payload or payload == "[DONE]":
+            return None
+        data = json.loads(payload)
+        delta = StreamDelta()
+        if data.get("usage"):
+            counts = _usage(data["usage"])
+            delta.prompt_tokens = counts["prompt_tokens"]
+            delta.completion_tokens = counts["completion_tokens"]
+        if data.get("choices"):
+            delta.text = data["choices"][0].get("delta", {}).get("content")
+        return delta
+
+class FakeBackend(LLMBackend):
+    """Deterministic in-process backend for tests, demos and benchmarks
+
+    The reply is derived from a hash of the request, so the same prompt always
+    gets the same answer. Judge prompts get replies in the format the judge
+    parses (``WINNER:``/``REASONING:`` lines, or JSON when ``response_format``
+    asks for it). ``latency`` seconds are spent per request, spread across the
+    streamed tokens. With ``latency_jitter`` (a log-normal sigma) latencies
+    vary around that mean, and with ``words_jitter`` (a standard deviation)
+    reply lengths vary around ``words``; both are drawn from the request hash
+    too, so benchmark runs are repeatable.
+
+    For exercising the resilience layer, ``failure_rate`` of requests fail
+    with a retryable 503 and ``stall_rate`` of them hang for ``stall`` seconds
+    first. Faults are drawn at random per request, so a retry can succeed.
+    ``requests_per_minute`` and ``tokens_per_minute`` emulate provider quotas
+    (tokens are words here): replies carry ``x-ratelimit-*`` headers, and
+    requests over quota fail with a 429 and ``Retry-After``.
+    """
+
+    name = "fake"
+
+    _WORDS = ("evidence suggests that the claim depends on measurable outcomes while "
+              "ethical reasoning demands we weigh long term consequences against present "
+              "values and principles because data alone cannot settle questions of meaning "
+              "yet careful study reveals patterns that challenge intuition").split()
+
+    def __init__(self, latency: float = 0.0, words: int = 40, failure_rate: float = 0.0,
+                 stall_rate: float = 0.0, stall: float = 0.0, latency_jitter: float = 0.0,
+                 words_jitter: float = 0.0, requests_per_minute: float = 0.0,
+                 tokens_per_minute: float = 0.0):
+        self.latency = latency
+        self.words = words
+        self.latency_jitter = latency_jitter
+        self.words_jitter = words_jitter
+        self.failure_rate = failure_rate
+        self.stall_rate = stall_rate
+        self.stall = stall
+        self._quotas = {"requests": TokenBucket(requests_per_minute),
+                        "tokens": TokenBucket(tokens_per_minute)}
+        self._quota_lock = threading.Lock()
+
+    def _fault(self) -> float:
+        """Raise an injected failure, or return the extra seconds to stall"""
+        if self.failure_rate and random.random() < self.failure_rate:
+            request = httpx.Request("POST", "http://fake/chat/completions")
+            raise httpx.HTTPStatusError("503 Service Unavailable (injected)", request=request,
+                                        response=httpx.Response(503, request=request))
+        if self.stall_rate and random.random() < self.stall_rate:
+            return self.stall
+        return 0.0
+
+    def _charge(self, completion: Completion):
+        """Spend the emulated quotas, or raise a 429 when they have run out"""
+        costs = {"requests": 1, "tokens": completion.prompt_tokens + completion.completion_tokens}
+        with self._quota_lock:
+            now = time.monotonic()
+            quotas = {kind: bucket for kind, bucket in self._quotas.items() if bucket.enabled}
+            if not quotas:
+                return
+            wait = max(bucket.wait_time(costs[kind], now) for kind, bucket in quotas.items())
+            if not wait:
+                for kind, bucket in quotas.items():
+                    bucket.take(costs[kind], now)
+            headers = {}
+            for kind, bucket in quotas.items():
+                headers[f"x-ratelimit-limit-{kind}"] = f"{bucket.capacity:.0f}"
+                headers[f"x-ratelimit-remaining-{kind}"] = f"{max(0, math.floor(bucket.level))}"
+                headers[f"x-ratelimit-reset-{kind}"] = f"{(bucket.capacity - bucket.level) / bucket.rate:.2f}s"
+        if wait:
+            request = httpx.Request("POST", "http://fake/chat/completions")
+            response = httpx.Response(429, request=request,
+                                      headers={**headers, "retry-after": f"{wait:.2f}"})
+            raise httpx.HTTPStatusError("429 Too Many Requests (emulated quota)", request=request,
+                                        response=response)
+        self._observe(headers)
+
+    @staticmethod
+    def _rng(request: Dict[str, Any], purpose: bytes = b"") -> random.Random:
+        seed = hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8") + purpose).digest()
+        return random.Random(seed)
+
+    def _latency(self, request: Dict[str, Any]) -> float:
+        """Seconds this request takes; log-normal with mean ``latency`` when jittered"""
+        if not self.latency or not self.latency_jitter:
+            return self.latency
+        sigma = self.latency_jitter
+        return self.latency * self._rng(request, b"latency").lognormvariate(-sigma * sigma / 2, sigma)
+
+    def _reply(self, request: Dict[str, Any]) -> str:
+        prompt = request["messages"][-1]["content"]
+        rng = self._rng(request)
+        words = self.words
+        if self.words_jitter:
+            words = round(rng.gauss(self.words, self.words_jitter))
+        sentence = " ".join(rng.choice(self._WORDS) for _ in range(max(1, words))).capitalize() + "."
+
+        winner = rng.choice(self._candidates(prompt))
+        if request.get("response_format", {}).get("type") == "json_object":
+            return json.dumps({"summary": sentence, "winner": winner, "reasoning": sentence})
+        if "WINNER:" in prompt:
+            return f"WINNER: {winner}\nREASONING: {sentence}"
+        return sentence
+
+    @staticmethod
+    def _candidates(prompt: str) -> List[str]:
+        """Personas a judge prompt asks to choose between"""
+        match = re.search(r"WINNER: \[([^\]]+)\]", prompt)
+        if match:
+            return match.group(1).split("/")
+        match = re.search(r'"winner": (.*) or "Tie"', prompt)
+        if match:
+            return re.findall(r'"([^"]+)"', match.group(1))
+        return list(Config.PERSONAS)
+
+    def _completion(self, request: Dict[str, Any]) -> Completion:
+        content = self._reply(request)
+        return Completion(content=content,
+                          prompt_tokens=len(request["messages"][-1]["content"].split()),
+                          completion_tokens=len(content.split()))
+
+    def complete(self, request: Dict[str, Any]) -> Completion:
+        completion = self._completion(request)
+        self._charge(completion)
+        time.sleep(self._latency(request) + self._fault())
+        return completion
+
+    async def acomplete(self, request: Dict[str, Any]) -> Completion:
+        completion = self._completion(request)
+        self._charge(completion)
+        await asyncio.sleep(self._latency(request) + self._fault())
+        return completion
+
+    def stream(self, request: Dict[str, Any]) -> Iterator[StreamDelta]:
+        completion = self._completion(request)
+        self._charge(completion)
+        time.sleep(self._fault())
+        tokens = completion.content.split(" ")
+        latency = self._latency(request)
+        for index, token in enumerate(tokens):
+            time.sleep(latency / len(tokens))
+            yield StreamDelta(text=token if index == 0 else " " + token)
+        yield StreamDelta(prompt_tokens=completion.prompt_tokens,
+                          completion_tokens=completion.completion_tokens)
+
+    async def astream(self, request: Dict[str, Any]) -> AsyncIterator[StreamDelta]:
+        completion = self._completion(request)
+        self._charge(completion)
+        await asyncio.sleep(self._fault())
+        tokens = completion.content.split(" ")
+        latency = self._latency(request)
+        for index, token in enumerate(tokens):
+            await asyncio.sleep(latency / len(tokens))
+            yield StreamDelta(text=token if index == 0 else " " + token)
+        yield StreamDelta(prompt_tokens=completion.prompt_tokens,
+                          completion_tokens=completion.completion_tokens)
+
+    def list_models(self) -> List[str]:
+        return ["fake-debater"]
+
+class ReplayBackend(LLMBackend):
+    """Answers from a cassette's recordings instead of the network
+
+    Requests the cassette has no reply for get a deterministic FakeBackend
+    reply, so a replayed debate always runs to the end.
+    """
+
+    name = "replay"
+
+    def __init__(self, cassette: Cassette, fallback: Optional[LLMBackend] = None):
+        self.cassette = cassette
+        self.fallback = fallback or FakeBackend()
+
+    def _reply(self, request: Dict[str, Any]):
+        """The completion to return and the seconds to take over it"""
+        recording = self.cassette.replay(request)
+        if recording is None:
+            return self.fallback._completion(request), 0.0
+        return (Completion(recording.content, recording.prompt_tokens, recording.completion_tokens),
+                self.cassette.delay(recording))
+
+    def complete(self, request: Dict[str, Any]) -> Completion:
+        completion, delay = self._reply(request)
+        if delay:
+            time.sleep(delay)
+        return completion
+
+    async def acomplete(self, request: Dict[str, Any]) -> Completion:
+        completion, delay = self._reply(request)
+        if delay:
+            await asyncio.sleep(delay)
+        return completion
+
+    def stream(self, request: Dict[str, Any]) -> Iterator[StreamDelta]:
+        completion, delay = self._reply(request)
+        tokens = completion.content.split(" ")
+        for index, token in enumerate(tokens):
+            if delay:
+                time.sleep(delay / len(tokens))
+            yield StreamDelta(text=token if index == 0 else " " + token)
+        yield StreamDelta(prompt_tokens=completion.prompt_tokens,
+                          completion_tokens=completion.completion_tokens)
+
+    async def astream(self, request: Dict[str, Any]) -> AsyncIterator[StreamDelta]:
+        completion, delay = self._reply(request)
+        tokens = completion.content.split(" ")
+        for index, token in enumerate(tokens):
+            if delay:
+                await asyncio.sleep(delay / len(tokens))
+            yield StreamDelta(text=token if index == 0 else " " + token)
+        yield StreamDelta(prompt_tokens=completion.prompt_tokens,
+                          completion_tokens=completion.completion_tokens)
+
+    def list_models(self) -> List[str]:
+        return [Config.LLM_MODEL]
+
+def create_backend(name: Optional[str] = None, api_key: Optional[str] = None,
+                   timeout: Optional[httpx.Timeout] = None,
+                   limits: Optional[httpx.Limits] = None) -> LLMBackend:
+    """Build the backend selected by ``name`` (defaults to Config.LLM_BACKEND)
+
+    When replaying a cassette (CASSETTE_PATH or ``set_cassette``) the
+    backend is replaced by the cassette's replies.
+    """
+    cassette = get_cassette()
+    if cassette is not None and cassette.mode == "replay":
+        return ReplayBackend(cassette)
+    return _create_backend(name, api_key, timeout, limits)
+
+def _create_backend(name: Optional[str], api_key: Optional[str],
+                    timeout: Optional[httpx.Timeout],
+                    limits: Optional[httpx.Limits]) -> LLMBackend:
+    name = (name or Config.LLM_BACKEND).lower()
+    timeout = timeout or httpx.Timeout(Config.LLM_TIMEOUT_SECONDS)
+    limits = limits or httpx.Limits(
+        max_connections=Config.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=Config.LLM_MAX_CONNECTIONS,
+        keepalive_expiry=Config.LLM_KEEPALIVE_SECONDS,
+    )
+
+    if name == "groq":
+        return GroqBackend(api_key or Config.GROQ_API_KEY, timeout, limits)
+    if name == "openai":
+        return OpenAICompatibleBackend(Config.LLM_BASE_URL, api_key or Config.LLM_API_KEY,
+                                       timeout, limits)
+    if name == "fake":
+        return FakeBackend(latency=Config.FAKE_LLM_LATENCY_MS / 1000.0,
+                           latency_jitter=Config.FAKE_LLM_LATENCY_JITTER,
+                           words=Config.FAKE_LLM_WORDS,
+                           words_jitter=Config.FAKE_LLM_WORDS_JITTER,
+                           failure_rate=Config.FAKE_LLM_FAILURE_RATE,
+                           stall_rate=Config.FAKE_LLM_STALL_RATE,
+                           stall=Config.FAKE_LLM_STALL_MS / 1000.0,
+                           requests_per_minute=Config.FAKE_LLM_REQUESTS_PER_MINUTE,
+                           tokens_per_minute=Config.FAKE_LLM_TOKENS_PER_MINUTE)
+    raise ValueError(f"Unknown LLM backend: {name} (expected groq, openai or fake)")
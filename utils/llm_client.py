@@ -0,0 +1,451 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+import httpx
+from utils.config import Config
+from utils.completion_cache import CompletionCache
+from utils.cassette import get_cassette
+from utils.llm_backends import Completion, LLMBackend, StreamDelta, create_backend
+from utils.rate_limit import RateLimitScheduler, get_rate_limiter
+from utils.resilience import CallReport, ResilientCaller
+from utils.tracing import Span, get_tracer
+
+class LLMError(Exception):
+    """Raised when a completion request fails"""
+
+@dataclass
+class LLMResponse:
+    content: str
+    model: str
+    latency: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached: bool = False
+    ttft: Optional[float] = None
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Completion tokens per second after the first token arrived"""
+        generation_time = self.latency - (self.ttft or 0.0)
+        if generation_time <= 0:
+            return 0.0
+        return self.completion_tokens / generation_time
+
+    def metrics(self) -> Dict[str, object]:
+        """Per-turn timing and usage figures"""
+        return {
+            "latency_ms": round(1000 * self.latency, 1),
+            "ttft_ms": round(1000 * self.ttft, 1) if self.ttft is not None else None,
+            "tokens_per_second": round(self.tokens_per_second, 1),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached": self.cached,
+        }
+
+class LLMStats:
+    """Thread-safe counters for every completion request made by the process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.errors = 0
+            self.total_latency = 0.0
+            self.prompt_tokens = 0
+            self.completion_tokens = 0
+
+    def record(self, response: LLMResponse):
+        with self._lock:
+            self.requests += 1
+            self.total_latency += response.latency
+            self.prompt_tokens += response.prompt_tokens
+            self.completion_tokens += response.completion_tokens
+
+    def record_error(self, latency: float):
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+            self.total_latency += latency
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "avg_latency_ms": round(1000 * self.total_latency / self.requests, 1)
+                                  if self.requests else 0.0,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+            }
+
+    def format_summary(self) -> str:
+        stats = self.snapshot()
+        return (f"{stats['requests']} LLM requests ({stats['errors']} failed), "
+                f"{stats['prompt_tokens']} prompt + {stats['completion_tokens']} completion tokens, "
+                f"avg latency {stats['avg_latency_ms']:.0f} ms")
+
+class DebateUsage:
+    """LLM calls, tokens and time per debate, kept until the debate is released"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._usage: Dict[str, Dict[str, float]] = {}
+
+    def record(self, debate_id: Optional[str], response: LLMResponse):
+        if debate_id is None:
+            return
+        with self._lock:
+            usage = self._usage.get(debate_id)
+            if usage is None:
+                usage = self._usage[debate_id] = self._empty()
+            usage["llm_calls"] += 1
+            usage["cached_calls"] += int(response.cached)
+            usage["prompt_tokens"] += response.prompt_tokens
+            usage["completion_tokens"] += response.completion_tokens
+            usage["llm_seconds"] += response.latency
+
+    def get(self, debate_id: str) -> Dict[str, float]:
+        """Usage of one debate so far (zeros if it made no calls)"""
+        with self._lock:
+            usage = self._usage.get(debate_id)
+            return dict(usage) if usage is not None else self._empty()
+
+    def discard(self, debate_id: str):
+        with self._lock:
+            self._usage.pop(debate_id, None)
+
+    @staticmethod
+    def _empty() -> Dict[str, float]:
+        return {"llm_calls": 0, "cached_calls": 0, "prompt_tokens": 0,
+                "completion_tokens": 0, "llm_seconds": 0.0}
+
+class LLMClient:
+    """Shared LLM client with pooled keep-alive connections and request accounting
+
+    One instance is shared by every node so that all turns of all debates reuse
+    the same HTTP connection pool instead of paying a TLS handshake per client.
+    The provider is a pluggable LLMBackend selected by ``LLM_BACKEND``. Every
+    request goes through a ResilientCaller (retries, deadlines, hedging and a
+    circuit breaker); LLMError is raised only once it gives up. Every attempt
+    first waits its turn in the process-wide RateLimitScheduler.
+    """
+
+    def __init__(self, backend: Optional[LLMBackend] = None, model: Optional[str] = None,
+                 timeout: Optional[float] = None, max_connections: Optional[int] = None,
+                 resilience: Optional[ResilientCaller] = None,
+                 scheduler: Optional[RateLimitScheduler] = None):
+        self.model = model or Config.LLM_MODEL
+        self.timeout = httpx.Timeout(timeout or Config.LLM_TIMEOUT_SECONDS)
+        self.limits = httpx.Limits(
+            max_connections=max_connections or Config.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=max_connections or Config.LLM_MAX_CONNECTIONS,
+            keepalive_expiry=Config.LLM_KEEPALIVE_SECONDS,
+        )
+        self.backend = backend or create_backend(timeout=self.timeout, limits=self.limits)
+        self.resilience = resilience or ResilientCaller()
+        self.scheduler = scheduler or get_rate_limiter()
+        # Rate-limit headers on the provider's replies tune the scheduler
+        self.backend.on_headers = self.scheduler.observe
+        self.stats = LLMStats()
+        self.usage = DebateUsage()
+        self._cache: Optional[CompletionCache] = None
+        self._cache_lock = threading.Lock()
+
+    @property
+    def cache(self) -> Optional[CompletionCache]:
+        """The on-disk completion cache, or None when caching is disabled
+
+        A cassette must see every call, so the cache is off while recording
+        or replaying.
+        """
+        if self._cache is None and Config.COMPLETION_CACHE_PATH and get_cassette() is None:
+            with self._cache_lock:
+                if self._cache is None:
+                    self._cache = CompletionCache(
+                        Config.COMPLETION_CACHE_PATH,
+                        max_entries=Config.COMPLETION_CACHE_MAX_ENTRIES,
+                        ttl_seconds=Config.COMPLETION_CACHE_TTL_SECONDS,
+                    )
+        return self._cache
+
+    def complete(self, prompt: str, temperature: float, max_tokens: int,
+                 model: Optional[str] = None, cache: bool = False,
+                 response_format: Optional[Dict] = None) -> LLMResponse:
+        """Send a single-message chat completion and return its text and usage
+
+        With ``cache=True`` an identical earlier request is answered from the
+        on-disk completion cache instead of the network. ``response_format``
+        is passed through to the provider (e.g. ``{"type": "json_object"}``).
+        """
+        request = self._build_request(prompt, temperature, max_tokens, model, response_format)
+        with get_tracer().span("llm.complete", kind="llm", model=request["model"]) as span:
+            cache_key = self._cache_key(request) if cache else None
+            result = self._cached_response(cache_key)
+            if result is None:
+                started = time.perf_counter()
+                report = CallReport()
+                admission = self.scheduler.admission(request, span.debate_id)
+                try:
+                    completion = self.resilience.call(lambda: self.backend.complete(request),
+                                                      report, admission)
+                except Exception as e:
+                    self.stats.record_error(time.perf_counter() - started)
+                    raise self._error(e) from e
+                finally:
+                    self._annotate_attempts(span, report)
+                admission.settle(completion.prompt_tokens + completion.completion_tokens or None)
+                result = self._to_response(completion, request["model"],
+                                           time.perf_counter() - started, cache_key)
+                self._record_on_cassette(request, result)
+            return self._annotate(span, result)
+
+    async def acomplete(self, prompt: str, temperature: float, max_tokens: int,
+                        model: Optional[str] = None, cache: bool = False,
+                        response_format: Optional[Dict] = None) -> LLMResponse:
+        """Async counterpart of complete"""
+        request = self._build_request(prompt, temperature, max_tokens, model, response_format)
+        with get_tracer().span("llm.complete", kind="llm", model=request["model"]) as span:
+            cache_key = self._cache_key(request) if cache else None
+            result = await self._acached_response(cache_key)
+            if result is None:
+                started = time.perf_counter()
+                report = CallReport()
+                admission = self.scheduler.admission(request, span.debate_id)
+                try:
+                    completion = await self.resilience.acall(
+                        lambda: self.backend.acomplete(request), report, admission)
+                except Exception as e:
+                    self.stats.record_error(time.perf_counter() - started)
+                    raise self._error(e) from e
+                finally:
+                    self._annotate_attempts(span, report)
+                admission.settle(completion.prompt_tokens + completion.completion_tokens or None)
+                result = self._to_response(completion, request["model"],
+                                           time.perf_counter() - started)
+                self._record_on_cassette(request, result)
+                await self._astore(cache_key, result)
+            return self._annotate(span, result)
+
+    def stream(self, prompt: str, temperature: float, max_tokens: int,
+               on_token: Callable[[str], None], model: Optional[str] = None,
+               cache: bool = False) -> LLMResponse:
+        """Stream a completion, calling ``on_token`` for each chunk of text
+
+        Returns the full response with time-to-first-token recorded.
+        """
+        request = self._build_request(prompt, temperature, max_tokens, model)
+        with get_tracer().span("llm.stream", kind="llm", model=request["model"]) as span:
+            cache_key = self._cache_key(request) if cache else None
+            result = self._cached_response(cache_key)
+            if result is not None:
+                on_token(result.content)
+                return self._annotate(span, result)
+
+            accumulator = _StreamAccumulator(time.perf_counter())
+            report = CallReport()
+            admission = self.scheduler.admission(request, span.debate_id)
+            try:
+                for delta in self.resilience.stream(lambda: self.backend.stream(request), report,
+                                                    admission):
+                    accumulator.add(delta, on_token)
+            except Exception as e:
+                self.stats.record_error(time.perf_counter() - accumulator.started)
+                raise self._error(e) from e
+            finally:
+                self._annotate_attempts(span, report)
+            admission.settle(accumulator.prompt_tokens + accumulator.completion_tokens or None)
+            result = self._finish_stream(accumulator, request["model"], cache_key)
+            self._record_on_cassette(request, result)
+            return self._annotate(span, result)
+
+    async def astream(self, prompt: str, temperature: float, max_tokens: int,
+                      on_token: Callable[[str], None], model: Optional[str] = None,
+                      cache: bool = False) -> LLMResponse:
+        """Async counterpart of stream"""
+        request = self._build_request(prompt, temperature, max_tokens, model)
+        with get_tracer().span("llm.stream", kind="llm", model=request["model"]) as span:
+            cache_key = self._cache_key(request) if cache else None
+            result = await self._acached_response(cache_key)
+            if result is not None:
+                on_token(result.content)
+                return self._annotate(span, result)
+
+            accumulator = _StreamAccumulator(time.perf_counter())
+            report = CallReport()
+            admission = self.scheduler.admission(request, span.debate_id)
+            try:
+                async for delta in self.resilience.astream(lambda: self.backend.astream(request),
+                                                           report, admission):
+                    accumulator.add(delta, on_token)
+            except Exception as e:
+                self.stats.record_error(time.perf_counter() - accumulator.started)
+                raise self._error(e) from e
+            finally:
+                self._annotate_attempts(span, report)
+            admission.settle(accumulator.prompt_tokens + accumulator.completion_tokens or None)
+            result = self._finish_stream(accumulator, request["model"])
+            self._record_on_cassette(request, result)
+            await self._astore(cache_key, result)
+            return self._annotate(span, result)
+
+    def _cached_response(self, cache_key: Optional[str]) -> Optional[LLMResponse]:
+        if not cache_key:
+            return None
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            return None
+        return LLMResponse(cached=True, **cached)
+
+    async def _acached_response(self, cache_key: Optional[str]) -> Optional[LLMResponse]:
+        if not cache_key:
+            return None
+        # SQLite reads block; keep them off the event loop
+        return await asyncio.to_thread(self._cached_response, cache_key)
+
+    @staticmethod
+    def _error(error: Exception) -> LLMError:
+        # Some transport errors (e.g. read timeouts) have no message of their own
+        return LLMError(str(error) or type(error).__name__)
+
+    @staticmethod
+    def _annotate_attempts(span: Span, report: CallReport):
+        """Record retries and hedging on the call's trace span"""
+        span.retries = report.retries
+        if report.hedged:
+            span.attributes["hedged"] = True
+
+    def _annotate(self, span: Span, result: LLMResponse) -> LLMResponse:
+        """Copy usage figures onto the call's trace span and its debate's totals"""
+        self.usage.record(span.debate_id, result)
+        span.prompt_tokens = result.prompt_tokens
+        span.completion_tokens = result.completion_tokens
+        span.attributes["cached"] = result.cached
+        if result.ttft is not None:
+            span.attributes["ttft_ms"] = round(1000 * result.ttft, 1)
+        return result
+
+    def _finish_stream(self, accumulator: "_StreamAccumulator", model: str,
+                       cache_key: Optional[str] = None) -> LLMResponse:
+        result = LLMResponse(
+            content="".join(accumulator.parts).strip(),
+            model=model,
+            latency=time.perf_counter() - accumulator.started,
+            prompt_tokens=accumulator.prompt_tokens,
+            completion_tokens=accumulator.completion_tokens or accumulator.chunks,
+            ttft=accumulator.ttft,
+        )
+        return self._record(result, cache_key)
+
+    def _build_request(self, prompt: str, temperature: float, max_tokens: int,
+                       model: Optional[str], response_format: Optional[Dict] = None) -> Dict:
+        request = {
+            "model": model or self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        if response_format:
+            request["response_format"] = response_format
+        return request
+
+    def _cache_key(self, request: Dict) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return CompletionCache.make_key(**request)
+
+    def format_summary(self) -> str:
+        """One-line usage summary for the end of a run"""
+        summary = self.stats.format_summary()
+        resilience = self.resilience.stats.snapshot()
+        if any(resilience.values()):
+            summary += (f"; {resilience['retries']} retries, {resilience['timeouts']} timeouts, "
+                        f"{resilience['hedged']} hedged ({resilience['hedge_wins']} won by the hedge), "
+                        f"{resilience['rejected']} rejected by the circuit breaker")
+        scheduling = self.scheduler.stats.snapshot()
+        if scheduling["queued"] or scheduling["throttled"]:
+            summary += f"; {self.scheduler.format_summary()}"
+        if self._cache is not None:
+            summary += f"; {self._cache.format_summary()}"
+        return summary
+
+    def _to_response(self, completion: Completion, model: str, latency: float,
+                     cache_key: Optional[str] = None) -> LLMResponse:
+        result = LLMResponse(
+            content=completion.content.strip(),
+            model=model,
+            latency=latency,
+            prompt_tokens=completion.prompt_tokens,
+            completion_tokens=completion.completion_tokens,
+        )
+        return self._record(result, cache_key)
+
+    def _record(self, result: LLMResponse, cache_key: Optional[str]) -> LLMResponse:
+        self.stats.record(result)
+        self._store(cache_key, result)
+        return result
+
+    def _store(self, cache_key: Optional[str], result: LLMResponse):
+        if cache_key:
+            self.cache.put(cache_key, {
+                "content": result.content,
+                "model": result.model,
+                "latency": result.latency,
+                "prompt_tokens": result.prompt_tokens,
+                "completion_tokens": result.completion_tokens,
+            })
+
+    @staticmethod
+    def _record_on_cassette(request: Dict, result: LLMResponse):
+        """Keep the reply a call settled on, after retries and hedging, on the cassette"""
+        cassette = get_cassette()
+        if cassette is not None:
+            cassette.record(request, result.content, result.prompt_tokens,
+                            result.completion_tokens, result.latency)
+
+    async def _astore(self, cache_key: Optional[str], result: LLMResponse):
+        if cache_key:
+            await asyncio.to_thread(self._store, cache_key, result)
+
+class _StreamAccumulator:
+    """Collects streamed chunks, timing the first token and reading final usage"""
+
+    def __init__(self, started: float):
+        self.started = started
+        self.parts = []
+        self.chunks = 0
+        self.ttft: Optional[float] = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def add(self, delta: StreamDelta, on_token: Callable[[str], None]):
+        if delta.prompt_tokens is not None:
+            self.prompt_tokens = delta.prompt_tokens
+        if delta.completion_tokens is not None:
+            self.completion_tokens = delta.completion_tokens
+
+        text = delta.text
+        if not text:
+            return
+        if self.ttft is None:
+            self.ttft = time.perf_counter() - self.started
+        self.chunks += 1
+        self.parts.append(text)
+        on_token(text)
+
+_shared_client: Optional[LLMClient] = None
+_shared_client_lock = threading.Lock()
+
+def get_llm_client() -> LLMClient:
+    """Return the process-wide LLM client, creating it on first use"""
+    global _shared_client
+    if _shared_client is None:
+        with _shared_client_lock:
+            if _shared_client is None:
+                _shared_client = LLMClient()
+    return _shared_client
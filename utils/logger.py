@@ -1,20 +1,232 @@
+import atexit
+import json
 import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Optional, TextIO, Tuple
+
+from utils.config import Config
+
+# Debate currently being executed in this context (thread or asyncio task).
+# LangGraph propagates context variables into node execution, so nodes can
+# keep calling ``log_step`` without knowing which debate they belong to.
+_current_debate: ContextVar[Optional[str]] = ContextVar("current_debate", default=None)
+
+# Record kinds understood by the background writer
+_OPEN, _WRITE, _CLOSE, _FLUSH, _STOP = "open", "write", "close", "flush", "stop"
 
 class DebateLogger:
-    def __init__(self, log_file: str = "debate_log.txt"):
-        self.log_file = log_file
-        self._initialize_log()
-    
-    def _initialize_log(self):
-        with open(self.log_file, 'w') as f:
+    """Structured debate logger whose file I/O happens on a background thread
+
+    ``log_step`` only timestamps the record and puts it on a queue. A writer
+    thread drains the queue in batches, appends to one file per debate (plain
+    text or JSON Lines), rotates files that grow past ``max_bytes`` and flushes
+    on a timer, when ``flush()`` is called, and at interpreter shutdown.
+    Records logged outside any debate go to ``log_file``, which is only
+    created once something is logged there.
+    """
+
+    def __init__(self, log_file: Optional[str] = None, log_dir: Optional[str] = None,
+                 log_format: Optional[str] = None, max_bytes: Optional[int] = None,
+                 backup_count: Optional[int] = None, flush_interval: Optional[float] = None):
+        self.log_format = (log_format or Config.LOG_FORMAT).lower()
+        if self.log_format not in ("text", "jsonl"):
+            raise ValueError(f"Unsupported log format: {self.log_format}")
+        self.extension = ".jsonl" if self.log_format == "jsonl" else ".txt"
+        self.log_file = log_file or f"debate_log{self.extension}"
+        self.log_dir = log_dir or Config.LOG_DIR
+
+        self._queue: "queue.Queue[Tuple]" = queue.Queue()
+        self._writer = _LogWriter(
+            self._queue,
+            log_format=self.log_format,
+            max_bytes=Config.LOG_MAX_BYTES if max_bytes is None else max_bytes,
+            backup_count=Config.LOG_BACKUP_COUNT if backup_count is None else backup_count,
+            flush_interval=Config.LOG_FLUSH_INTERVAL if flush_interval is None else flush_interval,
+        )
+        self._writer.start()
+        atexit.register(self.close)
+        self._default_opened = False
+        self._default_lock = threading.Lock()
+
+    def _initialize_log(self, path: str):
+        self._queue.put((_OPEN, path, None))
+
+    def log_path(self, debate_id: Optional[str] = None) -> str:
+        """Return the log file used for a debate (or the current one)"""
+        debate_id = debate_id or _current_debate.get()
+        if debate_id is None:
+            return self.log_file
+        return os.path.join(self.log_dir, f"debate_{debate_id}{self.extension}")
+
+    @contextmanager
+    def debate(self, debate_id: str, resume: bool = False) -> Iterator[str]:
+        """Route log_step calls made in this context to a per-debate log file
+
+        A resumed debate appends to its existing log instead of starting afresh.
+        """
+        path = self.log_path(debate_id)
+        if not resume:
+            self._initialize_log(path)
+        token = _current_debate.set(debate_id)
+        try:
+            yield path
+        finally:
+            _current_debate.reset(token)
+            self._queue.put((_CLOSE, path, None))
+
+    def log_step(self, step_name: str, content: str):
+        debate_id = _current_debate.get()
+        record = {
+            "timestamp": datetime.now(),
+            "debate_id": debate_id,
+            "step": step_name,
+            "content": content,
+        }
+        if debate_id is None and not self._default_opened:
+            with self._default_lock:
+                if not self._default_opened:
+                    self._initialize_log(self.log_file)
+                    self._default_opened = True
+        self._queue.put((_WRITE, self.log_path(), record))
+
+    def flush(self):
+        """Block until every record logged so far has been written"""
+        if self._writer.is_alive():
+            self._queue.put((_FLUSH, None, None))
+            self._queue.join()
+
+    def close(self):
+        """Flush pending records and stop the writer thread"""
+        if self._writer.is_alive():
+            self._queue.put((_STOP, None, None))
+            self._writer.join()
+
+class _LogWriter(threading.Thread):
+    """Background thread that batches queued log records into file writes"""
+
+    BATCH_SIZE = 256
+
+    def __init__(self, records: "queue.Queue[Tuple]", log_format: str, max_bytes: int,
+                 backup_count: int, flush_interval: float):
+        super().__init__(name="debate-log-writer", daemon=True)
+        self.records = records
+        self.log_format = log_format
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self._files: Dict[str, TextIO] = {}
+
+    def run(self):
+        unflushed = 0
+        last_flush = time.monotonic()
+        stopping = False
+        while not stopping:
+            # Sleep until a record arrives, or until the next timed flush is due
+            timeout = None
+            if unflushed:
+                timeout = max(0.0, last_flush + self.flush_interval - time.monotonic())
+            try:
+                batch = [self.records.get(timeout=timeout)]
+            except queue.Empty:
+                batch = []
+            while batch and len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self.records.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopping, force = self._process(batch)
+            unflushed += len(batch)
+
+            if unflushed and (stopping or force
+                              or time.monotonic() - last_flush >= self.flush_interval):
+                for f in self._files.values():
+                    f.flush()
+                # Records count as done only once they are on disk, so that
+                # DebateLogger.flush() can wait on the queue
+                for _ in range(unflushed):
+                    self.records.task_done()
+                unflushed = 0
+                last_flush = time.monotonic()
+
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+    def _process(self, batch: List[Tuple]) -> Tuple[bool, bool]:
+        """Apply a batch of records; returns (stop requested, flush requested)"""
+        stopping = force = False
+        for kind, path, record in batch:
+            try:
+                if kind == _OPEN:
+                    self._open(path)
+                elif kind == _WRITE:
+                    self._write(path, self._format(record))
+                elif kind == _CLOSE:
+                    f = self._files.pop(path, None)
+                    if f is not None:
+                        f.close()
+                elif kind == _FLUSH:
+                    force = True
+                elif kind == _STOP:
+                    stopping = True
+            except OSError:
+                # Logging must never take a debate down with it
+                continue
+        return stopping, force
+
+    def _open(self, path: str) -> TextIO:
+        """Start a fresh log file (truncating any previous contents)"""
+        old = self._files.pop(path, None)
+        if old is not None:
+            old.close()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        f = open(path, "w", encoding="utf-8")
+        self._files[path] = f
+        if self.log_format == "text":
             f.write(f"=== MULTI-AGENT DEBATE LOG ===\n")
             f.write(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
             f.write("=" * 50 + "\n\n")
-    
-    def log_step(self, step_name: str, content: str):
-        with open(self.log_file, 'a') as f:
-            f.write(f"[{step_name}] {datetime.now().strftime('%H:%M:%S')}\n")
-            f.write(f"{content}\n")
-            f.write("-" * 30 + "\n\n")
\ No newline at end of file
+        return f
+
+    def _write(self, path: str, data: str):
+        f = self._files.get(path)
+        if f is None:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            f = open(path, "a", encoding="utf-8")
+            self._files[path] = f
+        elif self.max_bytes and f.tell() + len(data) > self.max_bytes:
+            f = self._rotate(path)
+        f.write(data)
+
+    def _rotate(self, path: str) -> TextIO:
+        """Shift path -> path.1 -> path.2 ... keeping backup_count old files"""
+        self._files.pop(path).close()
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = f"{path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{path}.{index + 1}")
+            os.replace(path, f"{path}.1")
+        return self._open(path)
+
+    def _format(self, record: Dict[str, Any]) -> str:
+        if self.log_format == "jsonl":
+            return json.dumps({
+                "timestamp": record["timestamp"].isoformat(timespec="milliseconds"),
+                "debate_id": record["debate_id"],
+                "step": record["step"],
+                "content": record["content"],
+            }) + "\n"
+        return (f"[{record['step']}] {record['timestamp'].strftime('%H:%M:%S')}\n"
+                f"{record['content']}\n"
+                + "-" * 30 + "\n\n")
@@ -0,0 +1,81 @@
+import hashlib
+import random
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+@dataclass(frozen=True)
+class Persona:
+    """How a debater is briefed: a one-line role and a few guidelines"""
+    name: str
+    role: str
+    guidelines: Tuple[str, ...]
+
+# Briefings for the built-in personas; any other name gets a generic one
+_BUILTIN = {
+    "scientist": Persona(
+        name="Scientist",
+        role="Present evidence-based, logical arguments from a scientific perspective.",
+        guidelines=(
+            "Use data, research, and empirical evidence",
+            "Be precise and factual",
+            "Challenge claims that lack scientific backing",
+            "Keep response to 2-3 sentences maximum",
+            "Be respectful but firm in your scientific stance",
+        ),
+    ),
+    "philosopher": Persona(
+        name="Philosopher",
+        role="Present philosophical and ethical arguments.",
+        guidelines=(
+            "Consider ethical implications and human values",
+            "Question assumptions and underlying principles",
+            "Use philosophical frameworks and reasoning",
+            "Keep response to 2-3 sentences maximum",
+            "Be respectful but firm in your philosophical position",
+        ),
+    ),
+}
+
+def get_persona(name: str) -> Persona:
+    """Briefing for a persona name (built-in, or generic for any other name)"""
+    builtin = _BUILTIN.get(name.strip().lower())
+    if builtin is not None:
+        return Persona(name=name, role=builtin.role, guidelines=builtin.guidelines)
+    return Persona(
+        name=name,
+        role=f"Present arguments from the perspective of a {name}.",
+        guidelines=(
+            f"Draw on the knowledge, priorities and methods of a {name}",
+            "Engage directly with the other debaters' strongest points",
+            "Keep response to 2-3 sentences maximum",
+            f"Be respectful but firm in your position as a {name}",
+        ),
+    )
+
+TURN_ORDERS = ("round_robin", "snake", "random")
+
+def speaker_for_turn(personas: Sequence[str], turn: int, order: str = "round_robin",
+                     seed: str = "") -> str:
+    """Persona who makes argument number ``turn`` (0-based) of a debate
+
+    Every persona speaks once per round. ``round_robin`` keeps the configured
+    order each round, ``snake`` reverses it every other round (so nobody
+    always answers the same opponent) and ``random`` shuffles each round,
+    reproducibly for a given ``seed`` (the debate ID).
+    """
+    count = len(personas)
+    round_index, position = divmod(turn, count)
+    if order == "round_robin":
+        return personas[position]
+    if order == "snake":
+        return personas[position if round_index % 2 == 0 else count - 1 - position]
+    if order == "random":
+        digest = hashlib.sha256(f"{seed}:{round_index}".encode("utf-8")).digest()
+        shuffled: List[str] = list(personas)
+        random.Random(digest).shuffle(shuffled)
+        return shuffled[position]
+    raise ValueError(f"Unknown turn order: {order} (expected one of {', '.join(TURN_ORDERS)})")
+
+def round_for_turn(personas: Sequence[str], turn: int) -> int:
+    """1-based round number of argument number ``turn``"""
+    return turn // len(personas) + 1
@@ -0,0 +1,421 @@
+import asyncio
+import itertools
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+from utils.config import Config
+from utils.resilience import DeadlineExceeded, is_rate_limited, retry_after
+
+# Priority classes, most urgent first: verdicts of finished debates, turns of
+# debates already under way, then the first turns of new debates
+JUDGE, ACTIVE, NEW = 0, 1, 2
+
+# Priority of the LLM calls made in this context; None derives it from the debate
+_priority: ContextVar[Optional[int]] = ContextVar("llm_priority", default=None)
+
+# Debates remembered as started, so their later calls rank as ACTIVE
+_MAX_STARTED = 10000
+
+@contextmanager
+def llm_priority(priority: int) -> Iterator[None]:
+    """Schedule the LLM calls made inside this block at ``priority``"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+def estimate_tokens(request: Dict[str, Any]) -> int:
+    """Tokens a request may use: its prompt (~4 characters per token) plus max_tokens"""
+    prompt = sum(len(message["content"]) for message in request["messages"])
+    return math.ceil(prompt / 4) + request.get("max_tokens", 0)
+
+def _number(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds in a reset header such as ``"7.66s"``, ``"2m59.56s"`` or ``"20ms"``"""
+    if not value:
+        return None
+    number = _number(value)
+    if number is not None:
+        return number
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if not parts:
+        return None
+    scale = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    return sum(float(amount) * scale[unit] for amount, unit in parts)
+
+class TokenBucket:
+    """A per-minute quota refilling continuously; disabled when the quota is 0
+
+    A take may overdraw the bucket (a request bigger than what is left goes
+    once the bucket is full) and later refills repay the debt.
+    """
+
+    def __init__(self, per_minute: float = 0.0):
+        self.configure(per_minute)
+
+    def configure(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` (at most a full bucket) is available"""
+        if not self.enabled:
+            return 0.0
+        self._refill(now)
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+    def take(self, amount: float, now: float):
+        if self.enabled:
+            self._refill(now)
+            self.level -= amount
+
+    def give_back(self, amount: float, now: float):
+        if self.enabled:
+            self._refill(now)
+            self.level = min(self.capacity, self.level + amount)
+
+    def sync(self, remaining: float, now: float):
+        """Trust the provider when it reports less quota left than we think"""
+        if self.enabled:
+            self._refill(now)
+            self.level = min(self.level, remaining)
+
+@dataclass(eq=False)
+class _Waiter:
+    """A request queued for capacity; woken by an event (threads) or a future (tasks)"""
+    priority: int
+    tokens: int
+    debate_id: Optional[str]
+    start: float
+    seq: int
+    queued_at: float
+    event: Optional[threading.Event] = None
+    future: Optional[asyncio.Future] = None
+    granted: bool = False
+
+    def order(self):
+        return (self.priority, self.start, self.seq)
+
+class SchedulerStats:
+    """Thread-safe counters of what the scheduler did"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.granted = 0
+            self.queued = 0
+            self.wait_seconds = 0.0
+            self.throttled = 0
+
+    def record_grant(self, waited: float):
+        with self._lock:
+            self.granted += 1
+            if waited > 0:
+                self.queued += 1
+                self.wait_seconds += waited
+
+    def record_throttle(self):
+        with self._lock:
+            self.throttled += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "granted": self.granted,
+                "queued": self.queued,
+                "avg_wait_ms": round(1000 * self.wait_seconds / self.queued, 1)
+                               if self.queued else 0.0,
+                "throttled": self.throttled,
+            }
+
+class RateLimitScheduler:
+    """Process-wide admission control for LLM requests under provider quotas
+
+    Every request attempt waits here for one request from the
+    requests-per-minute bucket and its estimated tokens from the
+    tokens-per-minute bucket. Waiting requests are granted strictly in order
+    of priority class (JUDGE, ACTIVE, NEW) and, within a class, by start-time
+    fair queueing over tokens: each debate's requests are tagged after the
+    tokens it was already granted, so one long or busy debate can't crowd out
+    the others. Token estimates are corrected with the real usage afterwards.
+
+    The provider's ``x-ratelimit-*`` headers keep the buckets honest, and a
+    429 holds back every queued request until the provider's Retry-After has
+    passed, so one throttled call doesn't turn into a storm of retries.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None, adapt: Optional[bool] = None):
+        self.requests = TokenBucket(Config.LLM_REQUESTS_PER_MINUTE
+                                    if requests_per_minute is None else requests_per_minute)
+        self.tokens = TokenBucket(Config.LLM_TOKENS_PER_MINUTE
+                                  if tokens_per_minute is None else tokens_per_minute)
+        self.adapt = Config.LLM_RATE_LIMIT_HEADERS if adapt is None else adapt
+        # An unset token quota is learned from x-ratelimit-limit-tokens
+        self._learn_tokens = not self.tokens.enabled
+        self.stats = SchedulerStats()
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._timer: Optional[threading.Thread] = None
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        # Fair queueing: virtual time, and the finish tag of each debate's last request
+        self._virtual = 0.0
+        self._finish: Dict[Optional[str], float] = {}
+        self._started: "OrderedDict[str, None]" = OrderedDict()
+        self._paused_until = 0.0
+
+    def admission(self, request: Dict[str, Any], debate_id: Optional[str] = None,
+                  priority: Optional[int] = None) -> "Admission":
+        """One call's claim on the scheduler, shared by its retries and hedges"""
+        return Admission(self, estimate_tokens(request), debate_id, priority)
+
+    def acquire(self, tokens: int, debate_id: Optional[str] = None,
+                priority: Optional[int] = None, timeout: Optional[float] = None):
+        """Block until one request and ``tokens`` tokens may be spent"""
+        waiter = self._enqueue(tokens, debate_id, priority, event=threading.Event())
+        if waiter.granted or waiter.event.wait(timeout):
+            return
+        self._abandon(waiter)
+        raise DeadlineExceeded(f"Waited more than {timeout:.1f}s for LLM rate limit capacity")
+
+    async def aacquire(self, tokens: int, debate_id: Optional[str] = None,
+                       priority: Optional[int] = None, timeout: Optional[float] = None):
+        """Async counterpart of acquire"""
+        future = asyncio.get_running_loop().create_future()
+        waiter = self._enqueue(tokens, debate_id, priority, future=future)
+        if waiter.granted:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            raise DeadlineExceeded(
+                f"Waited more than {timeout:.1f}s for LLM rate limit capacity") from None
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+    def try_acquire(self, tokens: int, debate_id: Optional[str] = None) -> bool:
+        """Take capacity only if nothing is queued and it is free right now (for hedges)"""
+        with self._lock:
+            now = time.monotonic()
+            if (self._waiters or now < self._paused_until
+                    or self.requests.wait_time(1, now) or self.tokens.wait_time(tokens, now)):
+                return False
+            self._take(tokens, debate_id, now)
+            return True
+
+    def settle(self, estimated: int, used: Optional[int]):
+        """Replace a granted request's token estimate with its real usage (0 refunds it)"""
+        if used is None:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if used < estimated:
+                self.tokens.give_back(estimated - used, now)
+            else:
+                self.tokens.take(used - estimated, now)
+            self._schedule()
+
+    def observe(self, headers: Mapping[str, str]):
+        """Adapt to the provider's ``x-ratelimit-*`` response headers"""
+        if not self.adapt:
+            return
+        limit_tokens = _number(headers.get("x-ratelimit-limit-tokens"))
+        remaining = {kind: _number(headers.get(f"x-ratelimit-remaining-{kind}"))
+                     for kind in ("requests", "tokens")}
+        with self._lock:
+            now = time.monotonic()
+            if self._learn_tokens and limit_tokens and limit_tokens != self.tokens.capacity:
+                self.tokens.configure(limit_tokens)
+            for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+                if remaining[kind] is None:
+                    continue
+                bucket.sync(remaining[kind], now)
+                # Out of quota, perhaps with no bucket of ours to pace it: wait for the reset
+                reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                if remaining[kind] <= 0 and reset:
+                    self._paused_until = max(self._paused_until, now + reset)
+            self._schedule()
+
+    def throttle(self, error: BaseException):
+        """Hold back every queued request after a 429 instead of letting each retry"""
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        self.observe(headers)
+        delay = (retry_after(error) or parse_duration(headers.get("x-ratelimit-reset-tokens"))
+                 or parse_duration(headers.get("x-ratelimit-reset-requests")) or 1.0)
+        self.stats.record_throttle()
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self._schedule()
+
+    def discard(self, debate_id: str):
+        """Forget a finished debate's fair-queueing state"""
+        with self._lock:
+            self._finish.pop(debate_id, None)
+            self._started.pop(debate_id, None)
+
+    def _enqueue(self, tokens: int, debate_id: Optional[str], priority: Optional[int],
+                 event: Optional[threading.Event] = None,
+                 future: Optional[asyncio.Future] = None) -> _Waiter:
+        if priority is None:
+            priority = _priority.get()
+        with self._lock:
+            if priority is None:
+                priority = ACTIVE if debate_id is None or debate_id in self._started else NEW
+            start = max(self._virtual, self._finish.get(debate_id, 0.0))
+            self._finish[debate_id] = start + tokens
+            now = time.monotonic()
+            waiter = _Waiter(priority, tokens, debate_id, start, next(self._seq), now, event, future)
+            self._waiters.append(waiter)
+            self._schedule(now)
+            return waiter
+
+    def _abandon(self, waiter: _Waiter):
+        """Withdraw a waiter that timed out or was cancelled; refund it if granted meanwhile"""
+        with self._lock:
+            if waiter.granted:
+                now = time.monotonic()
+                self.requests.give_back(1, now)
+                self.tokens.give_back(waiter.tokens, now)
+            else:
+                self._waiters.remove(waiter)
+            self._schedule()
+
+    def _take(self, tokens: int, debate_id: Optional[str], now: float):
+        self.requests.take(1, now)
+        self.tokens.take(tokens, now)
+        if debate_id is not None:
+            self._started[debate_id] = None
+            self._started.move_to_end(debate_id)
+            if len(self._started) > _MAX_STARTED:
+                self._started.popitem(last=False)
+
+    def _dispatch(self, now: Optional[float] = None) -> Optional[float]:
+        """Grant waiters in order while capacity lasts; seconds until the next one can go"""
+        now = time.monotonic() if now is None else now
+        while self._waiters:
+            if now < self._paused_until:
+                return self._paused_until - now
+            waiter = min(self._waiters, key=_Waiter.order)
+            wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(waiter.tokens, now))
+            if wait > 0:
+                return wait
+            self._waiters.remove(waiter)
+            self._take(waiter.tokens, waiter.debate_id, now)
+            self._virtual = max(self._virtual, waiter.start)
+            waiter.granted = True
+            self.stats.record_grant(now - waiter.queued_at)
+            if waiter.event is not None:
+                waiter.event.set()
+            if waiter.future is not None:
+                try:
+                    waiter.future.get_loop().call_soon_threadsafe(_resolve, waiter.future)
+                except RuntimeError:
+                    pass  # The waiting loop has closed; its task is gone
+        return None
+
+    def _schedule(self, now: Optional[float] = None):
+        """Grant what can go now and have the timer thread wake for the rest (lock held)"""
+        if self._dispatch(now) is None:
+            return
+        if self._timer is None:
+            self._timer = threading.Thread(target=self._run_timer, name="llm-rate-limit",
+                                           daemon=True)
+            self._timer.start()
+        self._wake.notify()
+
+    def _run_timer(self):
+        with self._lock:
+            while True:
+                self._wake.wait(self._dispatch())
+
+    def format_summary(self) -> str:
+        stats = self.stats.snapshot()
+        return (f"{stats['queued']} of {stats['granted']} LLM requests queued for rate limits "
+                f"(avg wait {stats['avg_wait_ms']:.0f} ms), {stats['throttled']} throttled (429)")
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+class Admission:
+    """One LLM call's claim on the scheduler, across its retries and hedges
+
+    Each attempt acquires a request and the call's estimated tokens. A failed
+    attempt gets its tokens back (a 429 also throttles the whole scheduler);
+    the successful one settles the estimate against the real usage.
+    """
+
+    def __init__(self, scheduler: RateLimitScheduler, tokens: int,
+                 debate_id: Optional[str] = None, priority: Optional[int] = None):
+        self.scheduler = scheduler
+        self.tokens = tokens
+        self.debate_id = debate_id
+        self.priority = priority
+        self._held = 0
+
+    def acquire(self, timeout: Optional[float] = None):
+        self.scheduler.acquire(self.tokens, self.debate_id, self.priority, timeout)
+        self._held += 1
+
+    async def aacquire(self, timeout: Optional[float] = None):
+        await self.scheduler.aacquire(self.tokens, self.debate_id, self.priority, timeout)
+        self._held += 1
+
+    def try_acquire(self) -> bool:
+        if not self.scheduler.try_acquire(self.tokens, self.debate_id):
+            return False
+        self._held += 1
+        return True
+
+    def failed(self, error: BaseException):
+        if is_rate_limited(error):
+            self.scheduler.throttle(error)
+        if self._held:
+            self._held -= 1
+            self.scheduler.settle(self.tokens, 0)
+
+    def settle(self, used_tokens: Optional[int]):
+        if self._held:
+            self._held -= 1
+            self.scheduler.settle(self.tokens, used_tokens)
+
+_shared_scheduler: Optional[RateLimitScheduler] = None
+_shared_scheduler_lock = threading.Lock()
+
+def get_rate_limiter() -> RateLimitScheduler:
+    """Return the process-wide rate-limit scheduler, creating it on first use"""
+    global _shared_scheduler
+    if _shared_scheduler is None:
+        with _shared_scheduler_lock:
+            if _shared_scheduler is None:
+                _shared_scheduler = RateLimitScheduler()
+    return _shared_scheduler
@@ -0,0 +1,138 @@
+import re
+import threading
+import zlib
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from utils.config import Config
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+# Mersenne prime modulus for the universal hash family
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+class MinHasher:
+    """MinHash signatures of word shingles for fast Jaccard estimates
+
+    The fraction of equal positions in two signatures estimates the Jaccard
+    similarity of the arguments' shingle sets.
+    """
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 2, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> List[str]:
+        words = _WORD.findall(text.lower())
+        if len(words) < self.shingle_size:
+            return [" ".join(words)] if words else []
+        return [" ".join(words[i:i + self.shingle_size])
+                for i in range(len(words) - self.shingle_size + 1)]
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.array([zlib.crc32(s.encode("utf-8")) for s in set(self.shingles(text))],
+                          dtype=np.uint64)
+        if hashes.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        # (a * h + b) mod p, wrapping in uint64 as in the usual MinHash
+        # construction, folded to 32 bits; one row per permutation
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % np.uint64(_PRIME)
+        return (permuted & np.uint64(_MAX_HASH)).min(axis=1)
+
+@dataclass
+class RepetitionCheck:
+    """How much the latest argument repeats earlier ones"""
+    similarity: float = 0.0        # Best match among all earlier arguments
+    self_similarity: float = 0.0   # Best match among the same agent's arguments
+    match: Optional[int] = None    # History position of the best match
+    repeated: bool = False
+    converged: bool = False
+
+class RepetitionIndex:
+    """Per-debate MinHash signatures, appended as each argument arrives
+
+    Each new argument costs one signature and one vectorized comparison
+    against the earlier signatures. The novelty of every argument is kept, so
+    convergence (the last ``window`` arguments all repeating earlier ones) is
+    a check over a few stored numbers rather than a re-scan of the history.
+    """
+
+    def __init__(self, hasher: Optional[MinHasher] = None, threshold: Optional[float] = None,
+                 window: Optional[int] = None):
+        self.hasher = hasher or MinHasher(Config.MINHASH_PERMUTATIONS, Config.SHINGLE_SIZE)
+        self.threshold = Config.REPETITION_THRESHOLD if threshold is None else threshold
+        self.window = window or Config.CONVERGENCE_WINDOW
+        self._debates: Dict[str, "_DebateSignatures"] = {}
+        self._lock = threading.Lock()
+
+    def check(self, debate_id: str, history: Sequence[Dict]) -> RepetitionCheck:
+        """Index any new arguments and report on the latest one"""
+        with self._lock:
+            debate = self._debates.get(debate_id)
+            if debate is None:
+                debate = self._debates[debate_id] = _DebateSignatures(self.hasher.num_perm)
+            for entry in history[len(debate.checks):]:
+                debate.checks.append(self._add(debate, entry))
+            if not debate.checks:
+                return RepetitionCheck()
+
+            latest = debate.checks[-1]
+            recent = debate.checks[-self.window:]
+            latest.converged = (len(debate.checks) > self.window
+                                and all(check.repeated for check in recent))
+            return latest
+
+    def discard(self, debate_id: str):
+        with self._lock:
+            self._debates.pop(debate_id, None)
+
+    def _add(self, debate: "_DebateSignatures", entry: Dict) -> RepetitionCheck:
+        signature = self.hasher.signature(entry["argument"])
+        check = RepetitionCheck()
+        size = len(debate.agents)
+        if size:
+            similarities = (debate.signatures[:size] == signature).mean(axis=1)
+            best = int(similarities.argmax())
+            check.similarity = float(similarities[best])
+            check.match = best
+            same_agent = np.array(debate.agents) == entry["agent"]
+            if same_agent.any():
+                check.self_similarity = float(similarities[same_agent].max())
+            check.repeated = check.similarity >= self.threshold
+        debate.append(signature, entry["agent"])
+        return check
+
+class _DebateSignatures:
+    """Growable signature matrix for one debate (doubling, amortized O(1) appends)"""
+
+    def __init__(self, num_perm: int, capacity: int = 32):
+        self.signatures = np.zeros((capacity, num_perm), dtype=np.uint64)
+        self.agents: List[str] = []
+        self.checks: List[RepetitionCheck] = []
+
+    def append(self, signature: np.ndarray, agent: str):
+        size = len(self.agents)
+        if size == len(self.signatures):
+            grown = np.zeros((2 * size, self.signatures.shape[1]), dtype=np.uint64)
+            grown[:size] = self.signatures
+            self.signatures = grown
+        self.signatures[size] = signature
+        self.agents.append(agent)
+
+_shared_index: Optional[RepetitionIndex] = None
+_shared_index_lock = threading.Lock()
+
+def get_repetition_index() -> RepetitionIndex:
+    """Return the process-wide repetition index, creating it on first use"""
+    global _shared_index
+    if _shared_index is None:
+        with _shared_index_lock:
+            if _shared_index is None:
+                _shared_index = RepetitionIndex()
+    return _shared_index
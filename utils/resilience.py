@@ -0,0 +1,516 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import math
+import queue
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterator, Optional, TypeVar
+
+import httpx
+from utils.config import Config
+
+T = TypeVar("T")
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits, server errors
+TRANSIENT_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+# Provider SDK errors for network failures, matched by name so the SDKs stay unimported
+_TRANSIENT_ERROR_NAMES = {"APITimeoutError", "APIConnectionError"}
+
+class DeadlineExceeded(TimeoutError):
+    """An attempt or a whole call ran past its time budget"""
+
+class CircuitOpenError(Exception):
+    """The circuit breaker is open: calls fail fast until the provider recovers"""
+
+def _status(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+def is_transient(error: BaseException) -> bool:
+    """True for failures a retry may fix: timeouts, dropped connections, 429 and 5xx"""
+    if isinstance(error, (TimeoutError, ConnectionError, httpx.TimeoutException,
+                          httpx.TransportError)):
+        return True
+    status = _status(error)
+    if status is not None:
+        return status in TRANSIENT_STATUSES or status >= 500
+    return type(error).__name__ in _TRANSIENT_ERROR_NAMES
+
+def is_rate_limited(error: BaseException) -> bool:
+    """True for a 429: the provider is up but we are over its quota"""
+    return _status(error) == 429
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait (``Retry-After``), if it said"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    try:
+        return float(headers.get("retry-after")) if headers else None
+    except (TypeError, ValueError):
+        return None
+
+@dataclass
+class RetryPolicy:
+    """Bounded attempts with full-jitter exponential backoff
+
+    The n-th retry waits a random time up to ``base * 2**n`` seconds (capped at
+    ``max_delay``), so clients that failed together don't retry together. A
+    provider's ``Retry-After`` is honoured as a lower bound.
+    """
+    attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+
+    def delay(self, retry: int, error: Optional[BaseException] = None) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+        requested = retry_after(error) if error is not None else None
+        return max(delay, min(requested, self.max_delay)) if requested else delay
+
+class LatencyTracker:
+    """Recent successful call latencies, for the hedging threshold"""
+
+    def __init__(self, window: int = 200):
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def percentile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        """The ``q``-th percentile (0-100), or None before ``min_samples`` calls"""
+        with self._lock:
+            if len(self._latencies) < max(1, min_samples):
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+class CircuitBreaker:
+    """Stops calling a provider that keeps failing
+
+    After ``threshold`` consecutive failures the breaker opens and calls fail
+    immediately with CircuitOpenError. Once ``reset_timeout`` has passed one
+    probe call is let through: success closes the breaker, failure re-opens it.
+    """
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._probing or time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go ahead"""
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+            if remaining > 0 or self._probing:
+                raise CircuitOpenError(f"LLM circuit breaker open after {self._failures} "
+                                       f"consecutive failures; retrying in {max(remaining, 0):.1f}s")
+            self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+class CallStats:
+    """Thread-safe counters of what the resilience layer did"""
+
+    _FIELDS = ("retries", "timeouts", "hedged", "hedge_wins", "rejected")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            for name in self._FIELDS:
+                setattr(self, name, 0)
+
+    def add(self, name: str, count: int = 1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + count)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {name: getattr(self, name) for name in self._FIELDS}
+
+@dataclass
+class CallReport:
+    """What happened during one resilient call"""
+    attempts: int = 0
+    hedged: bool = False
+
+    @property
+    def retries(self) -> int:
+        return max(0, self.attempts - 1)
+
+class ResilientCaller:
+    """Retries, deadlines, hedging and circuit breaking around provider calls
+
+    ``call``/``acall`` run a zero-argument function (one provider request)
+    until it succeeds, the attempts run out, the call's deadline passes or the
+    error is not transient. Each attempt is cut off after ``attempt_timeout``.
+    With hedging on, an attempt still running after the ``hedge_percentile``
+    of recent latencies gets a duplicate request; the first answer wins.
+
+    An optional ``admission`` (see utils/rate_limit.py) is acquired before
+    every attempt, so retries wait their turn under the rate limits too. The
+    wait counts against the call's deadline but not the attempt's timeout,
+    and hedges are only sent when the scheduler has spare capacity.
+
+    ``stream``/``astream`` wrap streamed responses. They retry only until the
+    first chunk arrives, since the tokens already shown can't be taken back,
+    and are never hedged. A timed-out sync stream's worker thread stays busy
+    until its connection sends the next chunk or hits the HTTP read timeout.
+    """
+
+    def __init__(self, policy: Optional[RetryPolicy] = None, attempt_timeout: Optional[float] = None,
+                 deadline: Optional[float] = None, hedge_percentile: Optional[float] = None,
+                 hedge_min_samples: Optional[int] = None,
+                 breaker: Optional[CircuitBreaker] = None, max_workers: Optional[int] = None):
+        self.policy = policy or RetryPolicy(
+            attempts=max(1, Config.LLM_MAX_ATTEMPTS),
+            base_delay=Config.LLM_RETRY_BASE_SECONDS,
+            max_delay=Config.LLM_RETRY_MAX_SECONDS,
+        )
+        self.attempt_timeout = (Config.LLM_ATTEMPT_TIMEOUT_SECONDS
+                                if attempt_timeout is None else attempt_timeout)
+        self.deadline = Config.LLM_DEADLINE_SECONDS if deadline is None else deadline
+        self.hedge_percentile = (Config.LLM_HEDGE_PERCENTILE
+                                 if hedge_percentile is None else hedge_percentile)
+        self.hedge_min_samples = (Config.LLM_HEDGE_MIN_SAMPLES
+                                  if hedge_min_samples is None else hedge_min_samples)
+        self.breaker = breaker or CircuitBreaker(Config.LLM_BREAKER_THRESHOLD,
+                                                 Config.LLM_BREAKER_RESET_SECONDS)
+        self.latencies = LatencyTracker()
+        self.stats = CallStats()
+        # Sync attempts run here so they can be timed out and hedged; a timed
+        # out request keeps its worker until the HTTP timeout ends it
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers or 2 * Config.LLM_MAX_CONNECTIONS, thread_name_prefix="llm-call")
+
+    def _remaining(self, started: float) -> Optional[float]:
+        if self.deadline <= 0:
+            return None
+        return self.deadline - (time.perf_counter() - started)
+
+    def _attempt_budget(self, started: float) -> Optional[float]:
+        """Seconds the next attempt may take: the attempt timeout within the call deadline"""
+        remaining = self._remaining(started)
+        limits = [limit for limit in (self.attempt_timeout if self.attempt_timeout > 0 else None,
+                                      remaining) if limit is not None]
+        if not limits:
+            return None
+        budget = min(limits)
+        if budget <= 0:
+            raise DeadlineExceeded(f"LLM call exceeded its {self.deadline:.0f}s deadline")
+        return budget
+
+    def _hedge_delay(self) -> Optional[float]:
+        if self.hedge_percentile <= 0:
+            return None
+        return self.latencies.percentile(self.hedge_percentile, self.hedge_min_samples)
+
+    def _record_outcome(self, error: BaseException):
+        """Count a failure against the breaker only if the provider is at fault"""
+        if is_transient(error) and not is_rate_limited(error):
+            self.breaker.record_failure()
+        else:
+            # The provider answered (e.g. rejected a bad request or asked us to
+            # slow down, which the rate-limit scheduler handles), so it is up
+            self.breaker.record_success()
+
+    def _admit(self, admission: Any, started: float):
+        """Wait for rate-limit capacity, within the call's deadline"""
+        if admission is None:
+            return
+        remaining = self._remaining(started)
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded(f"LLM call exceeded its {self.deadline:.0f}s deadline")
+        admission.acquire(remaining)
+
+    async def _aadmit(self, admission: Any, started: float):
+        if admission is None:
+            return
+        remaining = self._remaining(started)
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded(f"LLM call exceeded its {self.deadline:.0f}s deadline")
+        await admission.aacquire(remaining)
+
+    def _failed(self, error: BaseException, report: CallReport, started: float,
+                admission: Any = None) -> float:
+        """Record a failed attempt; the backoff before the next one, or raise ``error``"""
+        if admission is not None:
+            admission.failed(error)
+        if isinstance(error, CircuitOpenError):
+            self.stats.add("rejected")
+            raise error
+        self._record_outcome(error)
+        if isinstance(error, DeadlineExceeded):
+            self.stats.add("timeouts")
+        if not is_transient(error) or report.attempts >= self.policy.attempts:
+            raise error
+        delay = self.policy.delay(report.retries, error)
+        remaining = self._remaining(started)
+        if remaining is not None and delay >= remaining:
+            raise error
+        self.stats.add("retries")
+        return delay
+
+    def _succeeded(self, latency: float):
+        self.breaker.record_success()
+        self.latencies.record(latency)
+
+    def call(self, func: Callable[[], T], report: Optional[CallReport] = None,
+             admission: Any = None) -> T:
+        """Run ``func`` with retries, deadlines, hedging and circuit breaking"""
+        report = report if report is not None else CallReport()
+        started = time.perf_counter()
+        while True:
+            report.attempts += 1
+            try:
+                self.breaker.before_call()
+                self._admit(admission, started)
+                return self._attempt(func, self._attempt_budget(started), report, admission)
+            except Exception as e:
+                time.sleep(self._failed(e, report, started, admission))
+
+    def _attempt(self, func: Callable[[], T], budget: Optional[float], report: CallReport,
+                 admission: Any = None) -> T:
+        hedge_delay = self._hedge_delay()
+        attempt_started = time.perf_counter()
+        if budget is None and hedge_delay is None:
+            result = func()
+            self._succeeded(time.perf_counter() - attempt_started)
+            return result
+
+        first = self._submit(func)
+        pending = {first}
+        deadline = attempt_started + budget if budget is not None else None
+        hedge_at = attempt_started + hedge_delay if hedge_delay is not None else None
+        error: Optional[BaseException] = None
+        while pending:
+            # Wake up for whichever comes first: an answer, the hedge or the deadline
+            wake = [t for t in (deadline, None if report.hedged else hedge_at) if t is not None]
+            timeout = max(0.0, min(wake) - time.perf_counter()) if wake else None
+            done, pending = concurrent.futures.wait(pending, timeout=timeout,
+                                                    return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self._succeeded(time.perf_counter() - attempt_started)
+                    if future is not first:
+                        self.stats.add("hedge_wins")
+                    return future.result()
+                error = future.exception()
+
+            now = time.perf_counter()
+            if deadline is not None and now >= deadline:
+                break
+            if pending and not report.hedged and hedge_at is not None and now >= hedge_at:
+                if admission is not None and not admission.try_acquire():
+                    hedge_at = None  # No spare quota for a duplicate request
+                    continue
+                report.hedged = True
+                self.stats.add("hedged")
+                pending.add(self._submit(func))
+
+        if error is not None and not pending:
+            raise error
+        # Timed-out requests can't be interrupted; their results are ignored
+        raise DeadlineExceeded(f"LLM request took longer than {budget:.1f}s")
+
+    def _submit(self, func: Callable[[], T]) -> concurrent.futures.Future:
+        # Keep the caller's context (trace span, debate log) in the worker thread
+        return self._executor.submit(contextvars.copy_context().run, func)
+
+    def stream(self, open_stream: Callable[[], Iterator[T]],
+               report: Optional[CallReport] = None, admission: Any = None) -> Iterator[T]:
+        """Yield a streamed response, retrying only until the first chunk"""
+        report = report if report is not None else CallReport()
+        started = time.perf_counter()
+        while True:
+            report.attempts += 1
+            yielded = False
+            try:
+                self.breaker.before_call()
+                self._admit(admission, started)
+                budget = self._attempt_budget(started)
+                attempt_started = time.perf_counter()
+                for chunk in self._chunks(open_stream, budget):
+                    yielded = True
+                    yield chunk
+                self._succeeded(time.perf_counter() - attempt_started)
+                return
+            except Exception as e:
+                if yielded:
+                    self._record_outcome(e)
+                    raise
+                time.sleep(self._failed(e, report, started, admission))
+
+    def _chunks(self, open_stream: Callable[[], Iterator[T]], budget: Optional[float]) -> Iterator[T]:
+        """One streamed attempt, read on a worker thread so waiting for a chunk can time out"""
+        if budget is None:
+            yield from open_stream()
+            return
+
+        chunks: "queue.Queue[tuple]" = queue.Queue()
+        finished = object()
+        abandoned = threading.Event()
+
+        def produce():
+            stream = open_stream()
+            try:
+                for chunk in stream:
+                    if abandoned.is_set():
+                        return
+                    chunks.put((chunk, None))
+                chunks.put((finished, None))
+            except Exception as e:
+                chunks.put((finished, e))
+            finally:
+                close = getattr(stream, "close", None)
+                if close is not None:
+                    close()
+
+        self._submit(produce)
+        deadline = time.perf_counter() + budget
+        try:
+            while True:
+                try:
+                    chunk, error = chunks.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    raise DeadlineExceeded(f"LLM stream took longer than {budget:.1f}s") from None
+                if chunk is finished:
+                    if error is not None:
+                        raise error
+                    return
+                yield chunk
+        finally:
+            # A stalled producer stops at its next chunk or when the HTTP timeout fires
+            abandoned.set()
+
+    async def acall(self, func: Callable[[], Awaitable[T]],
+                    report: Optional[CallReport] = None, admission: Any = None) -> T:
+        """Async counterpart of call; timed-out and losing requests are cancelled"""
+        report = report if report is not None else CallReport()
+        started = time.perf_counter()
+        while True:
+            report.attempts += 1
+            try:
+                self.breaker.before_call()
+                await self._aadmit(admission, started)
+                return await self._aattempt(func, self._attempt_budget(started), report, admission)
+            except Exception as e:
+                await asyncio.sleep(self._failed(e, report, started, admission))
+
+    async def _aattempt(self, func: Callable[[], Awaitable[T]], budget: Optional[float],
+                        report: CallReport, admission: Any = None) -> T:
+        attempt_started = time.perf_counter()
+        hedge_delay = self._hedge_delay()
+        first = asyncio.ensure_future(func())
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=min(
+                [t for t in (hedge_delay, budget) if t is not None], default=None))
+            if (not done and hedge_delay is not None and (budget is None or hedge_delay < budget)
+                    and (admission is None or admission.try_acquire())):
+                report.hedged = True
+                self.stats.add("hedged")
+                tasks.add(asyncio.ensure_future(func()))
+
+            error: Optional[BaseException] = None
+            while tasks:
+                remaining = (None if budget is None
+                             else budget - (time.perf_counter() - attempt_started))
+                if remaining is not None and remaining <= 0:
+                    break
+                done, tasks = await asyncio.wait(tasks, timeout=remaining,
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    if task.exception() is None:
+                        self._succeeded(time.perf_counter() - attempt_started)
+                        if task is not first:
+                            self.stats.add("hedge_wins")
+                        return task.result()
+                    error = task.exception()
+            if error is not None and not tasks:
+                raise error
+            raise DeadlineExceeded(f"LLM request took longer than {budget:.1f}s")
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def astream(self, open_stream: Callable[[], AsyncIterator[T]],
+                      report: Optional[CallReport] = None,
+                      admission: Any = None) -> AsyncIterator[T]:
+        """Async counterpart of stream; a chunk that doesn't arrive in time ends the attempt"""
+        report = report if report is not None else CallReport()
+        started = time.perf_counter()
+        while True:
+            report.attempts += 1
+            yielded = False
+            try:
+                self.breaker.before_call()
+                await self._aadmit(admission, started)
+                budget = self._attempt_budget(started)
+                attempt_started = time.perf_counter()
+                chunks = open_stream()
+                try:
+                    while True:
+                        remaining = (None if budget is None
+                                     else budget - (time.perf_counter() - attempt_started))
+                        if remaining is not None and remaining <= 0:
+                            raise DeadlineExceeded(f"LLM stream took longer than {budget:.1f}s")
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), remaining)
+                        except StopAsyncIteration:
+                            break
+                        except asyncio.TimeoutError:
+                            raise DeadlineExceeded(f"LLM stream took longer than {budget:.1f}s")
+                        yielded = True
+                        yield chunk
+                finally:
+                    aclose = getattr(chunks, "aclose", None)
+                    if aclose is not None:
+                        await aclose()
+                self._succeeded(time.perf_counter() - attempt_started)
+                return
+            except Exception as e:
+                if yielded:
+                    self._record_outcome(e)
+                    raise
+                await asyncio.sleep(self._failed(e, report, started, admission))
@@ -0,0 +1,444 @@
+import asyncio
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from utils.config import Config
+from utils.personas import TURN_ORDERS
+from utils.state import new_debate_id
+from utils.streaming import CallbackSink
+from utils.tracing import get_tracer
+
+_MAX_BODY_BYTES = 64 * 1024
+_KEEPALIVE_SECONDS = 15.0
+
+class RequestError(Exception):
+    """A request the service rejects, with the HTTP status to answer with"""
+
+    def __init__(self, status: int, message: str, headers: Optional[List[Tuple[bytes, bytes]]] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or []
+
+class DebateJob:
+    """One debate submitted over HTTP: its parameters, status and event log
+
+    Every event is kept for the life of the job so a client that connects
+    late (or reconnects with ``Last-Event-ID``) replays the debate from the
+    start. Events are appended by the worker running the debate and never
+    block on slow readers.
+    """
+
+    def __init__(self, topic: str, personas: Optional[List[str]] = None,
+                 turn_order: Optional[str] = None, max_rounds: Optional[int] = None):
+        self.debate_id = new_debate_id()
+        self.topic = topic
+        self.personas = personas
+        self.turn_order = turn_order
+        self.max_rounds = max_rounds
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.events: List[Tuple[str, Dict[str, Any]]] = []
+        self._changed = asyncio.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    async def publish(self, event: str, data: Dict[str, Any]):
+        async with self._changed:
+            self.events.append((event, data))
+            self._changed.notify_all()
+
+    async def finish(self, status: str, error: Optional[str] = None):
+        """Record the outcome and publish the final "done" event in one step"""
+        async with self._changed:
+            self.status = status
+            self.error = error
+            self.finished_at = time.time()
+            self.events.append(("done", {
+                "status": status, "error": error,
+                "duration_seconds": round(self.finished_at - (self.started_at or self.created_at), 3),
+            }))
+            self._changed.notify_all()
+
+    def publish_threadsafe(self, loop: asyncio.AbstractEventLoop, event: str, data: Dict[str, Any]):
+        """Publish from a worker thread (token callbacks of sync LLM calls)"""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            loop.create_task(self.publish(event, data))
+        else:
+            asyncio.run_coroutine_threadsafe(self.publish(event, data), loop)
+
+    async def wait_for_events(self, seen: int, timeout: float) -> bool:
+        """Wait until there are more than ``seen`` events or the job finished; False on timeout"""
+        async with self._changed:
+            try:
+                await asyncio.wait_for(
+                    self._changed.wait_for(lambda: len(self.events) > seen or self.finished),
+                    timeout)
+                return True
+            except asyncio.TimeoutError:
+                return False
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "debate_id": self.debate_id,
+            "topic": self.topic,
+            "status": self.status,
+            "personas": self.personas or Config.PERSONAS,
+            "turn_order": self.turn_order or Config.TURN_ORDER,
+            "max_rounds": self.max_rounds or Config.MAX_ROUNDS,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "events_url": f"/debates/{self.debate_id}/events",
+            "result": self.result,
+            "error": self.error,
+        }
+
+class DebateService:
+    """Runs debates submitted over HTTP on one shared DebateSystem
+
+    At most ``max_concurrent`` debates run at once, each as a worker task on
+    the server's event loop using the system's compiled graph; each debate's
+    state, log file and token sink stay private to it. Up to ``queue_size``
+    more wait in a bounded queue. When the queue is full new debates are
+    refused (HTTP 503 with Retry-After) rather than piling up in memory.
+    """
+
+    def __init__(self, debate_system, max_concurrent: Optional[int] = None,
+                 queue_size: Optional[int] = None, retain: Optional[int] = None):
+        self.debate_system = debate_system
+        self.max_concurrent = max_concurrent or Config.SERVER_MAX_CONCURRENT_DEBATES
+        self.queue_size = Config.SERVER_QUEUE_SIZE if queue_size is None else queue_size
+        self.retain = retain or Config.SERVER_RETAIN_DEBATES
+        self.jobs: "OrderedDict[str, DebateJob]" = OrderedDict()
+        self.counters = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0}
+        self.running = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    def start(self):
+        """Start the worker tasks on the running loop (idempotent)"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=max(1, self.queue_size))
+        self._workers = [asyncio.create_task(self._worker(), name=f"debate-worker-{i}")
+                         for i in range(self.max_concurrent)]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(self, job: DebateJob) -> DebateJob:
+        """Queue a debate; raises RequestError(503) when the queue is full"""
+        self.start()
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.counters["rejected"] += 1
+            raise RequestError(503, "Too many debates queued, retry later",
+                               [(b"retry-after", b"5")])
+        self.counters["submitted"] += 1
+        self.jobs[job.debate_id] = job
+        self._evict()
+        return job
+
+    def _evict(self):
+        """Forget the oldest finished debates beyond the retention count"""
+        excess = len(self.jobs) - self.retain
+        for debate_id in [d for d, job in self.jobs.items() if job.finished][:max(0, excess)]:
+            del self.jobs[debate_id]
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            self.running += 1
+            try:
+                await self._run(job)
+            finally:
+                self.running -= 1
+                self._queue.task_done()
+
+    async def _run(self, job: DebateJob):
+        """Run one debate, publishing its turns and verdict as events"""
+        job.status = "running"
+        job.started_at = time.time()
+        await job.publish("status", {"status": "running"})
+
+        loop = asyncio.get_running_loop()
+        sink = None
+        if Config.STREAMING:
+            sink = CallbackSink(lambda event, payload: job.publish_threadsafe(
+                loop, "token", {"event": event, "payload": payload}))
+
+        published = 0
+        try:
+            async for node_name, update in self.debate_system.astream_debate(
+                    job.topic, job.debate_id, sink, job.personas, job.turn_order,
+                    job.max_rounds, console=False):
+                if not isinstance(update, dict):
+                    continue
+                # Nodes return only what they add, so each update carries just the new turns
+                metrics = update.get("turn_metrics", [])
+                for i, entry in enumerate(update.get("debate_history", [])):
+                    published += 1
+                    await job.publish("turn", {
+                        **entry,
+                        "position": published,
+                        "metrics": metrics[i] if i < len(metrics) else {},
+                    })
+                if node_name == "judge" and update.get("winner") is not None:
+                    job.result = {
+                        "winner": update["winner"],
+                        "judgment": update["judgment"],
+                        "confidence": update.get("judge_confidence"),
+                        "votes": update.get("judge_votes", []),
+                        "arguments": published,
+                    }
+                    await job.publish("verdict", job.result)
+        except Exception as e:
+            self.counters["failed"] += 1
+            await job.finish("failed", str(e))
+        else:
+            self.counters["completed"] += 1
+            await job.finish("completed")
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "running": self.running,
+            "queued": self.queued,
+            "max_concurrent": self.max_concurrent,
+            "queue_size": self.queue_size,
+        }
+
+    def metrics(self) -> str:
+        """Prometheus text exposition: service gauges/counters plus node and LLM timings"""
+        lines = [
+            "# HELP debate_server_running Debates currently running",
+            "# TYPE debate_server_running gauge",
+            f"debate_server_running {self.running}",
+            "# HELP debate_server_queued Debates waiting for a worker",
+            "# TYPE debate_server_queued gauge",
+            f"debate_server_queued {self.queued}",
+            "# HELP debate_server_debates_total Debates by outcome",
+            "# TYPE debate_server_debates_total counter",
+        ]
+        for outcome, count in self.counters.items():
+            lines.append(f'debate_server_debates_total{{outcome="{outcome}"}} {count}')
+        return "\n".join(lines) + "\n" + get_tracer().to_prometheus()
+
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class DebateApp:
+    """ASGI application serving debates over REST with Server-Sent Events
+
+    Routes:
+        POST /debates                 create a debate; answers 202 with its ID,
+                                      or streams its events directly when the
+                                      request accepts text/event-stream
+        GET  /debates/{id}            status and, once judged, the verdict
+        GET  /debates/{id}/events     turns and verdict as Server-Sent Events
+        GET  /health                  liveness and queue depth
+        GET  /metrics                 Prometheus metrics
+    """
+
+    _DEBATE_PATH = re.compile(r"^/debates/([0-9a-f]+)(/events)?$")
+
+    def __init__(self, service: DebateService):
+        self.service = service
+
+    async def __call__(self, scope: Dict[str, Any], receive: Receive, send: Send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        # Servers that skip the lifespan protocol still get workers on first use
+        self.service.start()
+        try:
+            await self._route(scope, receive, send)
+        except RequestError as e:
+            await self._send_json(send, e.status, {"error": str(e)}, e.headers)
+
+    async def _lifespan(self, receive: Receive, send: Send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.service.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.service.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _route(self, scope: Dict[str, Any], receive: Receive, send: Send):
+        method, path = scope["method"], scope["path"].rstrip("/") or "/"
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1")
+                   for key, value in scope.get("headers", [])}
+
+        if path == "/health":
+            self._allow(method, "GET")
+            await self._send_json(send, 200, self.service.health())
+        elif path == "/metrics":
+            self._allow(method, "GET")
+            await self._send(send, 200, self.service.metrics().encode("utf-8"),
+                             b"text/plain; version=0.0.4")
+        elif path == "/debates":
+            self._allow(method, "POST")
+            job = self.service.submit(self._parse_job(await self._read_json(receive)))
+            if "text/event-stream" in headers.get("accept", ""):
+                await self._stream_events(job, receive, send)
+            else:
+                await self._send_json(send, 202, job.describe(),
+                                      [(b"location", f"/debates/{job.debate_id}".encode("ascii"))])
+        else:
+            match = self._DEBATE_PATH.match(path)
+            job = self.service.jobs.get(match.group(1)) if match else None
+            if job is None:
+                raise RequestError(404, "Not found")
+            self._allow(method, "GET")
+            if match.group(2):
+                await self._stream_events(job, receive, send,
+                                          self._last_event_id(headers.get("last-event-id")))
+            else:
+                await self._send_json(send, 200, job.describe())
+
+    @staticmethod
+    def _allow(method: str, allowed: str):
+        if method != allowed:
+            raise RequestError(405, f"Method {method} not allowed",
+                               [(b"allow", allowed.encode("ascii"))])
+
+    @staticmethod
+    def _last_event_id(value: Optional[str]) -> int:
+        """Number of events a reconnecting client has already seen"""
+        try:
+            return max(0, int(value)) if value else 0
+        except ValueError:
+            return 0
+
+    async def _read_json(self, receive: Receive) -> Dict[str, Any]:
+        body = b""
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise RequestError(400, "Client disconnected")
+            body += message.get("body", b"")
+            if len(body) > _MAX_BODY_BYTES:
+                raise RequestError(413, "Request body too large")
+            if not message.get("more_body"):
+                break
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            raise RequestError(400, "Request body must be JSON")
+        if not isinstance(data, dict):
+            raise RequestError(400, "Request body must be a JSON object")
+        return data
+
+    @staticmethod
+    def _parse_job(data: Dict[str, Any]) -> DebateJob:
+        """Validate a create-debate request"""
+        topic = data.get("topic")
+        if not isinstance(topic, str) or not topic.strip():
+            raise RequestError(400, "'topic' must be a non-empty string")
+
+        personas = data.get("personas")
+        if personas is not None:
+            if (not isinstance(personas, list) or len(personas) < 2
+                    or not all(isinstance(name, str) and name.strip() for name in personas)):
+                raise RequestError(400, "'personas' must be a list of at least two names")
+            personas = [name.strip() for name in personas]
+            if len(set(name.lower() for name in personas)) != len(personas):
+                raise RequestError(400, "'personas' must be distinct")
+
+        turn_order = data.get("turn_order")
+        if turn_order is not None and turn_order not in TURN_ORDERS:
+            raise RequestError(400, f"'turn_order' must be one of {', '.join(TURN_ORDERS)}")
+
+        max_rounds = data.get("max_rounds")
+        if max_rounds is not None:
+            if (not isinstance(max_rounds, int) or isinstance(max_rounds, bool)
+                    or not 1 <= max_rounds <= Config.SERVER_MAX_ROUNDS):
+                raise RequestError(400, f"'max_rounds' must be an integer between 1 and "
+                                        f"{Config.SERVER_MAX_ROUNDS}")
+
+        return DebateJob(topic.strip(), personas, turn_order, max_rounds)
+
+    async def _stream_events(self, job: DebateJob, receive: Receive, send: Send, seen: int = 0):
+        """Send the job's events from ``seen`` onwards until it finishes or the client leaves"""
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/event-stream"),
+            (b"cache-control", b"no-cache"),
+            (b"x-debate-id", job.debate_id.encode("ascii")),
+        ]})
+
+        disconnected = asyncio.Event()
+
+        async def watch_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            while not disconnected.is_set():
+                if not await job.wait_for_events(seen, _KEEPALIVE_SECONDS):
+                    await send({"type": "http.response.body", "body": b": keepalive\n\n",
+                                "more_body": True})
+                    continue
+                events = job.events[seen:]
+                if events:
+                    chunk = "".join(f"id: {seen + i + 1}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+                                    for i, (event, data) in enumerate(events))
+                    seen += len(events)
+                    await send({"type": "http.response.body", "body": chunk.encode("utf-8"),
+                                "more_body": True})
+                if job.finished and seen >= len(job.events):
+                    break
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            watcher.cancel()
+
+    async def _send_json(self, send: Send, status: int, data: Any,
+                         headers: Optional[List[Tuple[bytes, bytes]]] = None):
+        await self._send(send, status, json.dumps(data).encode("utf-8"), b"application/json", headers)
+
+    @staticmethod
+    async def _send(send: Send, status: int, body: bytes, content_type: bytes,
+                    headers: Optional[List[Tuple[bytes, bytes]]] = None):
+        await send({"type": "http.response.start", "status": status, "headers": [
+            (b"content-type", content_type),
+            (b"content-length", str(len(body)).encode("ascii")),
+            *(headers or []),
+        ]})
+        await send({"type": "http.response.body", "body": body})
+
+def create_app(debate_system=None) -> DebateApp:
+    """ASGI app over ``debate_system`` (a new DebateSystem by default)
+
+    Usable as a factory: ``uvicorn --factory utils.server:create_app``.
+    """
+    if debate_system is None:
+        from debate_system import DebateSystem
+        debate_system = DebateSystem()
+    return DebateApp(DebateService(debate_system))
@@ -1,30 +1,110 @@
-from typing import Dict, List, Optional, TypedDict
-from enum import Enum
+import uuid
+from typing import Annotated, Any, Dict, List, Optional, Sequence, TypedDict
 
-class AgentType(Enum):
-    SCIENTIST = "Scientist"
-    PHILOSOPHER = "Philosopher"
+from utils.config import Config
+from utils.transcript import Transcript
+
+try:
+    # Stores each step's appended items in checkpoints instead of the whole list
+    from langgraph.channels.delta import DeltaChannel
+except ImportError:  # langgraph < 1.2: plain reducers, full values in every checkpoint
+    DeltaChannel = None
+
+def append_items(current: Optional[List], batches: Sequence[List]) -> List:
+    """Reducer for append-only lists: each write is a list of new items"""
+    merged = list(current or [])
+    for batch in batches:
+        merged.extend(batch or [])
+    return merged
+
+def append_turns(current: Optional[List], batches: Sequence[List]) -> Transcript:
+    """Reducer for the debate transcript: each write is a list of new turns"""
+    merged = Transcript(current or ())
+    for batch in batches:
+        merged.extend(batch or [])
+    return merged
+
+def _append_only(batch_reducer):
+    """Channel annotation for an append-only field
+
+    Nodes write only what they add; the reducer appends it. With a delta
+    channel, checkpoints store those additions rather than the whole value.
+    """
+    if DeltaChannel is not None:
+        return DeltaChannel(batch_reducer)
+    return lambda current, update: batch_reducer(current, [update])
+
+def merge_dicts(current: Dict, update: Dict) -> Dict:
+    """Reducer for channels written by parallel branches: merge by key
+
+    Writing the same key twice (e.g. a branch re-run after resuming from a
+    checkpoint) just overwrites it, so the merge is idempotent.
+    """
+    return {**(current or {}), **(update or {})}
 
 class DebateState(TypedDict):
+    debate_id: str
     topic: str
+    personas: List[str]
+    turn_order: str
+    # Total number of arguments in the debate (Config.MAX_ROUNDS by default)
+    max_rounds: int
     current_round: int
-    current_agent: Optional[AgentType]
-    debate_history: List[Dict[str, str]]
-    agent_a_memory: List[str]
-    agent_b_memory: List[str]
+    current_agent: Optional[str]
+    # Append-only: nodes return just the entries they add. The transcript is
+    # the only copy of each argument; per-agent memories are views over it
+    debate_history: Annotated[Transcript, _append_only(append_turns)]
+    # Opening statements written concurrently by the "opening" branches, keyed by persona
+    opening_statements: Annotated[Dict[str, Dict], merge_dicts]
+    context_summary: str
+    summary_turns: int
+    steering: str
+    turn_metrics: Annotated[List[Dict], _append_only(append_items)]
     is_complete: bool
     winner: Optional[str]
     judgment: str
+    # Judge panel votes and the share of the panel backing the winner
+    judge_votes: List[Dict]
+    judge_confidence: Optional[float]
+
+def merge_updates(*updates: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine several node updates into one, as the graph's reducers would"""
+    merged: Dict[str, Any] = {}
+    for update in updates:
+        for key, value in update.items():
+            if key in merged and key in ("debate_history", "turn_metrics"):
+                merged[key] = append_items(merged[key], [value])
+            elif key in merged and key == "opening_statements":
+                merged[key] = merge_dicts(merged[key], value)
+            else:
+                merged[key] = value
+    return merged
+
+def new_debate_id() -> str:
+    return uuid.uuid4().hex[:12]
 
-def create_initial_state() -> DebateState:
+def create_initial_state(topic: str = "", debate_id: Optional[str] = None,
+                         personas: Optional[List[str]] = None,
+                         turn_order: Optional[str] = None,
+                         max_rounds: Optional[int] = None) -> DebateState:
+    personas = list(personas or Config.PERSONAS)
     return {
-        "topic": "",
+        "debate_id": debate_id or new_debate_id(),
+        "topic": topic,
+        "personas": personas,
+        "turn_order": turn_order or Config.TURN_ORDER,
+        "max_rounds": max_rounds or Config.MAX_ROUNDS,
         "current_round": 0,
         "current_agent": None,
-        "debate_history": [],
-        "agent_a_memory": [],
-        "agent_b_memory": [],
+        "debate_history": Transcript(),
+        "opening_statements": {},
+        "context_summary": "",
+        "summary_turns": 0,
+        "steering": "",
+        "turn_metrics": [],
         "is_complete": False,
         "winner": None,
-        "judgment": ""
-    }
\ No newline at end of file
+        "judgment": "",
+        "judge_votes": [],
+        "judge_confidence": None
+    }
@@ -0,0 +1,173 @@
+import asyncio
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+class TokenSink:
+    """Receives streamed completion tokens as they arrive
+
+    ``meta`` describes the stream (node, round, agent, label) and ``metrics``
+    carries per-turn timings such as time-to-first-token.
+    """
+
+    def on_start(self, meta: Dict[str, Any]):
+        pass
+
+    def on_token(self, token: str):
+        pass
+
+    def on_end(self, meta: Dict[str, Any], metrics: Dict[str, Any]):
+        pass
+
+class ConsoleSink(TokenSink):
+    """Print tokens to stdout as they arrive"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def on_start(self, meta: Dict[str, Any]):
+        self.stream.write(meta.get("label", ""))
+        self.stream.flush()
+
+    def on_token(self, token: str):
+        self.stream.write(token)
+        self.stream.flush()
+
+    def on_end(self, meta: Dict[str, Any], metrics: Dict[str, Any]):
+        self.stream.write("\n\n")
+        self.stream.flush()
+
+class CallbackSink(TokenSink):
+    """Forward every event to ``callback(event, payload)``
+
+    Events are ``"start"`` (payload: meta), ``"token"`` (payload: text) and
+    ``"end"`` (payload: meta merged with metrics).
+    """
+
+    def __init__(self, callback: Callable[[str, Any], None]):
+        self.callback = callback
+
+    def on_start(self, meta: Dict[str, Any]):
+        self.callback("start", meta)
+
+    def on_token(self, token: str):
+        self.callback("token", token)
+
+    def on_end(self, meta: Dict[str, Any], metrics: Dict[str, Any]):
+        self.callback("end", {**meta, **metrics})
+
+class AsyncQueueSink(CallbackSink):
+    """Expose streamed events as an async iterator of ``(event, payload)`` pairs
+
+    Must be created on the event loop that will consume it. Events may be
+    produced from that loop or from worker threads.
+    """
+
+    _CLOSED = object()
+
+    def __init__(self, maxsize: int = 0):
+        super().__init__(self._put)
+        self.loop = asyncio.get_running_loop()
+        self.queue: "asyncio.Queue" = asyncio.Queue(maxsize)
+
+    def _put(self, event: str, payload: Any):
+        self._enqueue((event, payload))
+
+    def _enqueue(self, item):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self.queue.put_nowait(item)
+        else:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, item)
+
+    def close(self):
+        """Signal the consumer that no more events will arrive"""
+        self._enqueue(self._CLOSED)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Tuple[str, Any]:
+        item = await self.queue.get()
+        if item is self._CLOSED:
+            raise StopAsyncIteration
+        return item
+
+class FanOutSink(TokenSink):
+    """Send every event to several sinks"""
+
+    def __init__(self, *sinks: TokenSink):
+        self.sinks = sinks
+
+    def on_start(self, meta: Dict[str, Any]):
+        for sink in self.sinks:
+            sink.on_start(meta)
+
+    def on_token(self, token: str):
+        for sink in self.sinks:
+            sink.on_token(token)
+
+    def on_end(self, meta: Dict[str, Any], metrics: Dict[str, Any]):
+        for sink in self.sinks:
+            sink.on_end(meta, metrics)
+
+# Sink for the debate running in this context; console output by default
+_current_sink: ContextVar[Optional[TokenSink]] = ContextVar("current_token_sink", default=None)
+# Whether the debate running in this context prints its transcript
+_console: ContextVar[bool] = ContextVar("console_output", default=True)
+
+def get_sink() -> TokenSink:
+    return _current_sink.get() or ConsoleSink()
+
+def echo(*args, **kwargs):
+    """print() unless the debate running in this context has no console"""
+    if _console.get():
+        print(*args, **kwargs)
+
+@contextmanager
+def use_sink(sink: Optional[TokenSink], console: bool = True) -> Iterator[None]:
+    """Stream tokens produced in this context to ``sink`` (and the console)
+
+    With ``console`` off, tokens reach only ``sink`` and ``echo`` is silent.
+    """
+    if sink is None and console:
+        yield
+        return
+    if console:
+        sink_token = _current_sink.set(FanOutSink(ConsoleSink(), sink))
+    else:
+        sink_token = _current_sink.set(sink or TokenSink())
+    console_token = _console.set(console)
+    try:
+        yield
+    finally:
+        _console.reset(console_token)
+        _current_sink.reset(sink_token)
+
+def stream_completion(llm, prompt: str, meta: Dict[str, Any], **kwargs):
+    """Stream a completion from ``llm`` to the current sink and return the response"""
+    sink = get_sink()
+    sink.on_start(meta)
+    try:
+        response = llm.stream(prompt, on_token=sink.on_token, **kwargs)
+    except Exception as e:
+        sink.on_end(meta, {"error": str(e)})
+        raise
+    sink.on_end(meta, response.metrics())
+    return response
+
+async def astream_completion(llm, prompt: str, meta: Dict[str, Any], **kwargs):
+    """Async counterpart of stream_completion"""
+    sink = get_sink()
+    sink.on_start(meta)
+    try:
+        response = await llm.astream(prompt, on_token=sink.on_token, **kwargs)
+    except Exception as e:
+        sink.on_end(meta, {"error": str(e)})
+        raise
+    sink.on_end(meta, response.metrics())
+    return response
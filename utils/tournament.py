@@ -0,0 +1,349 @@
+import asyncio
+import json
+import math
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from itertools import combinations
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+from utils.config import Config
+
+FORMATS = ("round_robin", "swiss")
+
+# Identifies a game across runs: first speaker, second speaker, topic, debate length
+GameKey = Tuple[str, str, str, int]
+
+@dataclass(frozen=True)
+class Game:
+    """One debate of a tournament; ``first`` opens it"""
+    first: str
+    second: str
+    topic: str
+    max_rounds: int
+
+    @property
+    def key(self) -> GameKey:
+        return (self.first, self.second, self.topic, self.max_rounds)
+
+def both_sides(a: str, b: str, topic: str, max_rounds: int) -> List[Game]:
+    """A pairing as two games with the speaking order swapped, cancelling first-speaker bias"""
+    return [Game(a, b, topic, max_rounds), Game(b, a, topic, max_rounds)]
+
+def round_robin(personas: Sequence[str], topics: Sequence[str], max_rounds: int) -> List[Game]:
+    """Every pair of personas on every topic, from both sides"""
+    return [game for a, b in combinations(personas, 2) for topic in topics
+            for game in both_sides(a, b, topic, max_rounds)]
+
+def swiss_pairings(personas: Sequence[str], points: Dict[str, float],
+                   met: Set[FrozenSet[str]], byes: Set[str]) -> List[Tuple[str, str]]:
+    """Pair personas with similar scores, avoiding rematches where possible
+
+    With an odd number of personas the lowest-ranked one without a bye sits
+    out (and is added to ``byes``). Ties in score keep the given order, so
+    the pairings are reproducible.
+    """
+    ranked = sorted(personas, key=lambda name: (-points.get(name, 0.0), personas.index(name)))
+    if len(ranked) % 2:
+        resting = next((name for name in reversed(ranked) if name not in byes), ranked[-1])
+        byes.add(resting)
+        ranked.remove(resting)
+
+    # Backtracking finds rematch-free pairings greedy pairing would miss; the
+    # search is bounded, and falls back to greedy pairing with rematches
+    budget = [10000]
+
+    def pair(remaining: List[str]) -> Optional[List[Tuple[str, str]]]:
+        if not remaining:
+            return []
+        budget[0] -= 1
+        if budget[0] < 0:
+            return None
+        a, rest = remaining[0], remaining[1:]
+        for b in rest:
+            if frozenset((a, b)) in met:
+                continue
+            others = pair([name for name in rest if name != b])
+            if others is not None:
+                return [(a, b)] + others
+        return None
+
+    pairs = pair(ranked)
+    if pairs is not None:
+        return pairs
+    pairs = []
+    while ranked:
+        a = ranked.pop(0)
+        b = next((name for name in ranked if frozenset((a, name)) not in met), ranked[0])
+        ranked.remove(b)
+        pairs.append((a, b))
+    return pairs
+
+def first_speaker_score(record: Dict[str, Any]) -> Optional[float]:
+    """1 if the first speaker won, 0 if the second did, 0.5 for a tie; None if undecided"""
+    if record.get("status") != "ok":
+        return None
+    winner = (record.get("winner") or "").strip().lower()
+    if winner == record["first"].lower():
+        return 1.0
+    if winner == record["second"].lower():
+        return 0.0
+    if winner == "tie":
+        return 0.5
+    return None
+
+def bradley_terry(players: Sequence[str], results: Sequence[Tuple[str, str, float]],
+                  prior: float = 1.0, iterations: int = 1000,
+                  tolerance: float = 1e-5) -> Dict[str, float]:
+    """Bradley-Terry ratings on the Elo scale (averaging 1500), fitted by minorization-maximization
+
+    ``results`` are (player, opponent, player's score) with ties scoring 0.5.
+    Every player also gets ``prior`` virtual wins and losses against an
+    average opponent, so unbeaten and winless players get finite ratings.
+    """
+    index = {name: i for i, name in enumerate(players)}
+    count = len(players)
+    wins = [[0.0] * count for _ in range(count)]
+    for a, b, score in results:
+        wins[index[a]][index[b]] += score
+        wins[index[b]][index[a]] += 1.0 - score
+    # Games played against each opponent, per player
+    opponents = [[(j, wins[i][j] + wins[j][i]) for j in range(count) if wins[i][j] + wins[j][i]]
+                 for i in range(count)]
+    total_wins = [sum(row) + prior for row in wins]
+
+    # Stops once no rating moves by more than about 0.002 Elo points
+    strength = [1.0] * count
+    for _ in range(iterations):
+        updated = []
+        for i in range(count):
+            own = strength[i]
+            denominator = 2 * prior / (own + 1.0) + sum(
+                games / (own + strength[j]) for j, games in opponents[i])
+            updated.append(total_wins[i] / denominator)
+        # Keep the virtual opponent average: geometric mean strength 1
+        scale = math.exp(sum(math.log(value) for value in updated) / count)
+        updated = [value / scale for value in updated]
+        change = max(abs(math.log(new / old)) for new, old in zip(updated, strength))
+        strength = updated
+        if change < tolerance:
+            break
+
+    return {name: 1500 + 400 * math.log10(strength[index[name]]) for name in players}
+
+@dataclass
+class Rating:
+    persona: str
+    rating: float
+    low: float
+    high: float
+    wins: float = 0
+    draws: float = 0
+    losses: float = 0
+
+    @property
+    def games(self) -> int:
+        return int(self.wins + self.draws + self.losses)
+
+def rate(players: Sequence[str], results: Sequence[Tuple[str, str, float]],
+         samples: int = 200, confidence: float = 0.95, seed: int = 0) -> List[Rating]:
+    """Ratings with bootstrap confidence intervals (games resampled with replacement), best first"""
+    point = bradley_terry(players, results)
+    rng = random.Random(seed)
+    draws: Dict[str, List[float]] = {name: [] for name in players}
+    for _ in range(samples if results else 0):
+        resampled = [results[rng.randrange(len(results))] for _ in results]
+        for name, value in bradley_terry(players, resampled).items():
+            draws[name].append(value)
+
+    ratings = []
+    tail = (1 - confidence) / 2
+    for name in players:
+        values = sorted(draws[name]) or [point[name]]
+        low = values[int(tail * (len(values) - 1))]
+        high = values[math.ceil((1 - tail) * (len(values) - 1))]
+        ratings.append(Rating(name, point[name], low, high))
+
+    by_name = {rating.persona: rating for rating in ratings}
+    for a, b, score in results:
+        for name, value in ((a, score), (b, 1.0 - score)):
+            if value == 1.0:
+                by_name[name].wins += 1
+            elif value == 0.0:
+                by_name[name].losses += 1
+            else:
+                by_name[name].draws += 1
+    return sorted(ratings, key=lambda rating: -rating.rating)
+
+@dataclass
+class TournamentSummary:
+    ratings: List[Rating] = field(default_factory=list)
+    # Games in this tournament's schedule, played now, reused from earlier runs, failed
+    scheduled: int = 0
+    played: int = 0
+    reused: int = 0
+    failed: int = 0
+    # Share of decided games won by the side that spoke first
+    first_speaker_share: Optional[float] = None
+    elapsed_seconds: float = 0.0
+
+class Tournament:
+    """Round-robin or Swiss tournament between personas, resumable from its results file
+
+    Each pairing is debated on its topic twice with the speaking order
+    swapped. Games run concurrently on one DebateSystem (up to
+    ``concurrency`` at a time) and each finished game is appended to
+    ``results_path`` (JSON Lines) straight away. Running again with the same
+    file skips every game already decided, so an interrupted tournament
+    picks up where it stopped and adding personas or topics plays only the
+    new games. Ratings are fitted over all decided games between the
+    current personas on the current topics.
+    """
+
+    def __init__(self, debate_system, personas: Sequence[str], topics: Sequence[str],
+                 results_path: str, format: str = "round_robin", rounds: Optional[int] = None,
+                 concurrency: int = 4, max_rounds: Optional[int] = None,
+                 bootstrap_samples: int = 200):
+        personas = [name.strip() for name in personas if name.strip()]
+        if len(personas) < 2 or len({name.lower() for name in personas}) != len(personas):
+            raise ValueError("A tournament needs at least two distinct personas")
+        if not topics:
+            raise ValueError("A tournament needs at least one topic")
+        if format not in FORMATS:
+            raise ValueError(f"Unknown tournament format: {format} (expected one of {', '.join(FORMATS)})")
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.debate_system = debate_system
+        self.personas = personas
+        self.topics = list(topics)
+        self.results_path = results_path
+        self.format = format
+        self.rounds = rounds or max(1, math.ceil(math.log2(len(personas))))
+        self.concurrency = concurrency
+        self.max_rounds = max_rounds or Config.MAX_ROUNDS
+        self.bootstrap_samples = bootstrap_samples
+        self.results: Dict[GameKey, Dict[str, Any]] = {}
+
+    def load(self) -> Dict[GameKey, Dict[str, Any]]:
+        """Decided games recorded by earlier runs, by game key"""
+        decided: Dict[GameKey, Dict[str, Any]] = {}
+        if not os.path.exists(self.results_path):
+            return decided
+        with open(self.results_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if first_speaker_score(record) is not None:
+                    decided[Game(record["first"], record["second"], record["topic"],
+                                 record["max_rounds"]).key] = record
+        return decided
+
+    def run(self, progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> TournamentSummary:
+        """Play every game not decided yet and rate the personas"""
+        return asyncio.run(self.arun(progress))
+
+    async def arun(self, progress: Optional[Callable[[Dict[str, Any]], None]] = None
+                   ) -> TournamentSummary:
+        """Async counterpart of run for callers that already own an event loop"""
+        self.results = self.load()
+        summary = TournamentSummary()
+        started = time.perf_counter()
+
+        with open(self.results_path, "a", encoding="utf-8") as output:
+            if self.format == "round_robin":
+                await self._play(round_robin(self.personas, self.topics, self.max_rounds),
+                                 summary, output, progress)
+            else:
+                schedule: List[Game] = []
+                byes: Set[str] = set()
+                for round_number in range(1, self.rounds + 1):
+                    games = self._swiss_round(round_number, schedule, byes)
+                    schedule.extend(games)
+                    await self._play(games, summary, output, progress, round_number)
+
+        summary.ratings, summary.first_speaker_share = self._rate()
+        summary.elapsed_seconds = time.perf_counter() - started
+        return summary
+
+    def _swiss_round(self, round_number: int, schedule: List[Game], byes: Set[str]) -> List[Game]:
+        """Pairings for one Swiss round from the results of the rounds before it"""
+        points: Dict[str, float] = {}
+        met: Set[FrozenSet[str]] = set()
+        for game in schedule:
+            met.add(frozenset((game.first, game.second)))
+            record = self.results.get(game.key)
+            if record is None:
+                continue
+            score = first_speaker_score(record)
+            points[game.first] = points.get(game.first, 0.0) + score
+            points[game.second] = points.get(game.second, 0.0) + 1.0 - score
+
+        topic = self.topics[(round_number - 1) % len(self.topics)]
+        return [game for a, b in swiss_pairings(self.personas, points, met, byes)
+                for game in both_sides(a, b, topic, self.max_rounds)]
+
+    async def _play(self, games: Sequence[Game], summary: TournamentSummary, output,
+                    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                    round_number: Optional[int] = None):
+        summary.scheduled += len(games)
+        pending = [game for game in games if game.key not in self.results]
+        summary.reused += len(games) - len(pending)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def play(game: Game) -> Dict[str, Any]:
+            async with semaphore:
+                result = await self.debate_system.aexecute_debate(
+                    game.topic, personas=[game.first, game.second], max_rounds=game.max_rounds)
+            return {
+                "first": game.first,
+                "second": game.second,
+                "topic": game.topic,
+                "max_rounds": game.max_rounds,
+                "round": round_number,
+                "debate_id": result["debate_id"],
+                "status": result["status"],
+                "winner": result.get("winner"),
+                "error": result.get("error"),
+                "duration_seconds": result["duration_seconds"],
+                "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+
+        tasks = [asyncio.create_task(play(game)) for game in pending]
+        for task in asyncio.as_completed(tasks):
+            record = await task
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            if first_speaker_score(record) is None:
+                summary.failed += 1
+            else:
+                summary.played += 1
+                self.results[Game(record["first"], record["second"], record["topic"],
+                                  record["max_rounds"]).key] = record
+            if progress is not None:
+                progress(record)
+
+    def _rate(self) -> Tuple[List[Rating], Optional[float]]:
+        """Ratings over the decided games between current personas on current topics"""
+        personas, topics = set(self.personas), set(self.topics)
+        results = []
+        for (first, second, topic, max_rounds), record in self.results.items():
+            if (first in personas and second in personas and topic in topics
+                    and max_rounds == self.max_rounds):
+                results.append((first, second, first_speaker_score(record)))
+        share = sum(score for _, _, score in results) / len(results) if results else None
+        return rate(self.personas, results, self.bootstrap_samples), share
+
+def format_standings(summary: TournamentSummary) -> str:
+    """Ratings table with 95% intervals and win-draw-loss records"""
+    lines = [f"{'#':>3}  {'persona':<20}{'rating':>8}{'95% CI':>16}{'W-D-L':>12}{'games':>7}"]
+    for rank, rating in enumerate(summary.ratings, 1):
+        record = f"{rating.wins:.0f}-{rating.draws:.0f}-{rating.losses:.0f}"
+        interval = f"{rating.low:.0f}-{rating.high:.0f}"
+        lines.append(f"{rank:>3}  {rating.persona:<20}{rating.rating:>8.0f}{interval:>16}"
+                     f"{record:>12}{rating.games:>7}")
+    if summary.first_speaker_share is not None:
+        lines.append(f"First speaker scored {summary.first_speaker_share:.0%} of decided games "
+                     f"(every pairing is played from both sides)")
+    return "\n".join(lines)
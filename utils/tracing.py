@@ -0,0 +1,235 @@
+import functools
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from utils.config import Config
+
+@dataclass
+class Span:
+    """One timed operation: a graph node execution or an LLM call"""
+    name: str
+    kind: str
+    debate_id: Optional[str] = None
+    parent_id: Optional[str] = None
+    span_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    start: float = 0.0
+    duration: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    retries: int = 0
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+# Innermost open span in this context; LLM spans attach to the node span
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(q * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+class Tracer:
+    """Collects spans in memory and exports them as Prometheus text or OTLP JSON
+
+    Only the most recent ``max_spans`` spans are kept, so long batch runs use
+    bounded memory; percentiles are computed over that window.
+    """
+
+    def __init__(self, max_spans: int = 100000):
+        self._spans: Deque[Span] = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, kind: str = "node", debate_id: Optional[str] = None,
+             **attributes: Any) -> Iterator[Span]:
+        parent = _current_span.get()
+        span = Span(
+            name=name,
+            kind=kind,
+            debate_id=debate_id or (parent.debate_id if parent else None),
+            parent_id=parent.span_id if parent else None,
+            start=time.time(),
+            attributes=attributes,
+        )
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration = time.perf_counter() - started
+            _current_span.reset(token)
+            with self._lock:
+                self._spans.append(span)
+
+    def spans(self, debate_id: Optional[str] = None, kind: Optional[str] = None) -> List[Span]:
+        with self._lock:
+            spans = list(self._spans)
+        return [s for s in spans
+                if (debate_id is None or s.debate_id == debate_id)
+                and (kind is None or s.kind == kind)]
+
+    def latency_stats(self, kind: str = "node", debate_id: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """Per-name call count, total, p50 and p95 latency (seconds) and tokens"""
+        grouped: Dict[str, List[Span]] = {}
+        for span in self.spans(debate_id, kind):
+            grouped.setdefault(span.name, []).append(span)
+
+        stats = {}
+        for name, spans in grouped.items():
+            durations = sorted(s.duration for s in spans)
+            stats[name] = {
+                "count": len(spans),
+                "total": sum(durations),
+                "p50": _percentile(durations, 0.50),
+                "p95": _percentile(durations, 0.95),
+                "errors": sum(1 for s in spans if s.error),
+                "retries": sum(s.retries for s in spans),
+                "prompt_tokens": sum(s.prompt_tokens for s in spans),
+                "completion_tokens": sum(s.completion_tokens for s in spans),
+            }
+        return stats
+
+    def format_summary(self, debate_id: Optional[str] = None) -> str:
+        """Per-node latency table, with LLM tokens attributed to the calling node"""
+        node_stats = self.latency_stats("node", debate_id)
+        tokens: Dict[str, List[int]] = {}
+        node_names = {s.span_id: s.name for s in self.spans(debate_id, "node")}
+        for span in self.spans(debate_id, "llm"):
+            counts = tokens.setdefault(node_names.get(span.parent_id, "-"), [0, 0, 0])
+            counts[0] += span.prompt_tokens
+            counts[1] += span.completion_tokens
+            counts[2] += 1
+
+        lines = [f"{'node':<18}{'calls':>7}{'total ms':>11}{'p50 ms':>9}{'p95 ms':>9}"
+                 f"{'llm calls':>11}{'tokens in/out':>16}"]
+        for name, stats in sorted(node_stats.items(), key=lambda item: -item[1]["total"]):
+            prompt, completion, llm_calls = tokens.get(name, [0, 0, 0])
+            lines.append(f"{name:<18}{stats['count']:>7}{1000 * stats['total']:>11.1f}"
+                         f"{1000 * stats['p50']:>9.1f}{1000 * stats['p95']:>9.1f}"
+                         f"{llm_calls:>11}{f'{prompt}/{completion}':>16}")
+        return "\n".join(lines)
+
+    def export(self, path: str, export_format: Optional[str] = None):
+        """Write all retained spans to ``path`` as Prometheus text or OTLP JSON"""
+        export_format = (export_format or Config.TRACE_FORMAT).lower()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if export_format == "prometheus":
+            content = self.to_prometheus()
+        elif export_format == "otlp-json":
+            content = json.dumps(self.to_otlp_json())
+        else:
+            raise ValueError(f"Unsupported trace format: {export_format}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def to_prometheus(self) -> str:
+        lines = []
+
+        def summary(metric: str, help_text: str, label: str, stats: Dict[str, Dict[str, float]]):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} summary")
+            for name, s in sorted(stats.items()):
+                lines.append(f'{metric}{{{label}="{name}",quantile="0.5"}} {s["p50"]:.6f}')
+                lines.append(f'{metric}{{{label}="{name}",quantile="0.95"}} {s["p95"]:.6f}')
+                lines.append(f'{metric}_sum{{{label}="{name}"}} {s["total"]:.6f}')
+                lines.append(f'{metric}_count{{{label}="{name}"}} {s["count"]}')
+
+        def counter(metric: str, help_text: str, label: str, stats: Dict[str, Dict[str, float]], key: str):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, s in sorted(stats.items()):
+                lines.append(f'{metric}{{{label}="{name}"}} {s[key]}')
+
+        node_stats = self.latency_stats("node")
+        llm_stats = self.latency_stats("llm")
+        summary("debate_node_duration_seconds", "Wall time of debate graph node executions",
+                "node", node_stats)
+        counter("debate_node_errors_total", "Node executions that raised", "node", node_stats, "errors")
+        summary("debate_llm_request_duration_seconds", "Wall time of LLM calls", "call", llm_stats)
+        counter("debate_llm_errors_total", "LLM calls that failed", "call", llm_stats, "errors")
+        counter("debate_llm_retries_total", "LLM call retries", "call", llm_stats, "retries")
+        counter("debate_llm_prompt_tokens_total", "Prompt tokens reported by the provider",
+                "call", llm_stats, "prompt_tokens")
+        counter("debate_llm_completion_tokens_total", "Completion tokens reported by the provider",
+                "call", llm_stats, "completion_tokens")
+        return "\n".join(lines) + "\n"
+
+    def to_otlp_json(self) -> Dict[str, Any]:
+        """Spans in the OTLP/JSON trace format (one trace per debate)"""
+
+        def attribute(key: str, value: Any) -> Dict[str, Any]:
+            if isinstance(value, bool):
+                return {"key": key, "value": {"boolValue": value}}
+            if isinstance(value, int):
+                return {"key": key, "value": {"intValue": str(value)}}
+            if isinstance(value, float):
+                return {"key": key, "value": {"doubleValue": value}}
+            return {"key": key, "value": {"stringValue": str(value)}}
+
+        otlp_spans = []
+        for span in self.spans():
+            trace_id = (span.debate_id or "0").encode("utf-8").hex()[:32].ljust(32, "0")
+            attributes = {"span.kind": span.kind, "prompt_tokens": span.prompt_tokens,
+                          "completion_tokens": span.completion_tokens, "retries": span.retries,
+                          **span.attributes}
+            if span.debate_id:
+                attributes["debate.id"] = span.debate_id
+            otlp_span = {
+                "traceId": trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(int(span.start * 1e9)),
+                "endTimeUnixNano": str(int((span.start + span.duration) * 1e9)),
+                "attributes": [attribute(k, v) for k, v in attributes.items() if v is not None],
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            otlp_spans.append(otlp_span)
+
+        return {"resourceSpans": [{
+            "resource": {"attributes": [attribute("service.name", "multi-agent-debate-dag")]},
+            "scopeSpans": [{"scope": {"name": "debate_dag.tracing"}, "spans": otlp_spans}],
+        }]}
+
+_tracer = Tracer(max_spans=Config.TRACE_MAX_SPANS)
+
+def current_debate_id() -> Optional[str]:
+    """Debate of the innermost open span in this context, if any"""
+    span = _current_span.get()
+    return span.debate_id if span is not None else None
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+def trace_node(name: str, func: Callable) -> Callable:
+    """Wrap a node's sync execute so each call is recorded as a span"""
+    @functools.wraps(func)
+    def wrapper(state):
+        with _tracer.span(name, kind="node", debate_id=state.get("debate_id")):
+            return func(state)
+    return wrapper
+
+def atrace_node(name: str, func: Callable) -> Callable:
+    """Wrap a node's async execute so each call is recorded as a span"""
+    @functools.wraps(func)
+    async def wrapper(state):
+        with _tracer.span(name, kind="node", debate_id=state.get("debate_id")):
+            return await func(state)
+    return wrapper
@@ -0,0 +1,137 @@
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+class Turn:
+    """One argument of a debate
+
+    Slotted, so a turn costs three references instead of a dict, and the
+    speaker's name is interned so every turn shares one copy of it. Turns
+    still read like the dict entries they replace (``turn["argument"]``,
+    ``{**turn}``), and ``_asdict`` lets checkpoints store them in that
+    format.
+    """
+
+    __slots__ = ("round", "agent", "argument")
+
+    def __init__(self, round: int, agent: str, argument: str):
+        self.round = round
+        self.agent = sys.intern(agent)
+        self.argument = argument
+
+    @classmethod
+    def coerce(cls, entry: Any) -> "Turn":
+        """A Turn from a Turn or a ``{"round", "agent", "argument"}`` dict"""
+        if isinstance(entry, Turn):
+            return entry
+        return cls(entry["round"], entry["agent"], entry["argument"])
+
+    def _asdict(self) -> Dict[str, Any]:
+        return {"round": self.round, "agent": self.agent, "argument": self.argument}
+
+    to_dict = _asdict
+
+    def keys(self) -> Sequence[str]:
+        return self.__slots__
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Turn):
+            return self._asdict() == other._asdict()
+        if isinstance(other, dict):
+            return self._asdict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Turn(round={self.round!r}, agent={self.agent!r}, argument={self.argument!r})"
+
+class AgentMemory(Sequence[str]):
+    """One debater's arguments as ``"Round N: ..."`` lines, formatted on access
+
+    A view over the transcript: it holds positions, not copies of the text.
+    """
+
+    __slots__ = ("_transcript", "_positions")
+
+    def __init__(self, transcript: "Transcript", positions: List[int]):
+        self._transcript = transcript
+        self._positions = positions
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._line(position) for position in self._positions[index]]
+        return self._line(self._positions[index])
+
+    def _line(self, position: int) -> str:
+        turn = self._transcript[position]
+        return f"Round {turn.round}: {turn.argument}"
+
+class Transcript(list):
+    """Append-only list of Turns with a per-speaker index
+
+    The single copy of every argument in a debate: per-agent memories are
+    index views over it rather than separate lists of formatted strings.
+    The index is built on first use and then kept up to date by ``append``
+    and ``extend``; the transcript is only ever appended to.
+    """
+
+    __slots__ = ("_positions",)
+
+    def __init__(self, turns: Iterable[Any] = ()):
+        super().__init__(Turn.coerce(turn) for turn in turns)
+        self._positions: Optional[Dict[str, List[int]]] = None
+
+    @classmethod
+    def of(cls, history: Iterable[Any]) -> "Transcript":
+        """``history`` itself if it is already a Transcript (e.g. not a restored plain list)"""
+        return history if isinstance(history, Transcript) else cls(history)
+
+    def append(self, entry: Any):
+        turn = Turn.coerce(entry)
+        super().append(turn)
+        if self._positions is not None:
+            self._positions.setdefault(turn.agent, []).append(len(self) - 1)
+
+    def extend(self, entries: Iterable[Any]):
+        for entry in entries:
+            self.append(entry)
+
+    def __iadd__(self, entries: Iterable[Any]) -> "Transcript":
+        self.extend(entries)
+        return self
+
+    def __copy__(self) -> "Transcript":
+        return Transcript(self)
+
+    def positions(self, agent: str) -> List[int]:
+        """History positions of ``agent``'s turns"""
+        if self._positions is None:
+            self._positions = {}
+            for position, turn in enumerate(self):
+                self._positions.setdefault(turn.agent, []).append(position)
+        return self._positions.get(agent, [])
+
+    def turns_by(self, agent: str) -> List[Turn]:
+        return [self[position] for position in self.positions(agent)]
+
+    def memory(self, agent: str) -> AgentMemory:
+        return AgentMemory(self, self.positions(agent))
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """The transcript in the plain ``{"round", "agent", "argument"}`` format"""
+        return [turn._asdict() for turn in self]
+
+    @classmethod
+    def from_dicts(cls, entries: Iterable[Dict[str, Any]]) -> "Transcript":
+        return cls(entries)
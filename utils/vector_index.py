@@ -0,0 +1,129 @@
+import math
+import re
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.config import Config
+
+_WORD = re.compile(r"[a-z0-9']+")
+
+# Very common words carry no signal about which argument is relevant
+_STOP_WORDS = frozenset("""a an and are as at be because but by can for from has have in is it
+its not of on or our that the their this to was we were which while will with you your""".split())
+
+class HashedTfEmbedder:
+    """Local text embedder: sublinear term frequencies hashed into a fixed vector
+
+    Words and word bigrams are hashed (crc32, with a sign bit to reduce
+    collision bias) into ``dim`` buckets and the vector is L2-normalized.
+    Needs no vocabulary, model download or network access.
+    """
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+
+    def features(self, text: str) -> Counter:
+        words = [w for w in _WORD.findall(text.lower()) if w not in _STOP_WORDS]
+        return Counter(words + [f"{a} {b}" for a, b in zip(words, words[1:])])
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, count in self.features(text).items():
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dim] += (1.0 if h & 0x80000000 else -1.0) * (1.0 + math.log(count))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+class VectorIndex:
+    """Append-only matrix of unit vectors searched with one matrix-vector product
+
+    Rows live in a preallocated array that doubles when full, so an append is
+    amortized O(1). Bucket document frequencies are kept alongside; queries
+    are weighted by IDF so that words shared by every argument (the topic,
+    the personas' stock phrases) count for less than distinctive ones.
+    """
+
+    def __init__(self, dim: int, capacity: int = 64):
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._doc_freq = np.zeros(dim, dtype=np.float32)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, vector: np.ndarray) -> int:
+        """Append a vector; returns its row number"""
+        if self._size == len(self._vectors):
+            grown = np.zeros((2 * len(self._vectors), self._vectors.shape[1]), dtype=np.float32)
+            grown[:self._size] = self._vectors[:self._size]
+            self._vectors = grown
+        self._vectors[self._size] = vector
+        self._doc_freq += vector != 0
+        self._size += 1
+        return self._size - 1
+
+    def search(self, vector: np.ndarray, k: int, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Top-k (row, score) among the first ``limit`` rows, best first"""
+        size = self._size if limit is None else min(limit, self._size)
+        if size == 0 or k <= 0:
+            return []
+        idf = np.log((1.0 + self._size) / (1.0 + self._doc_freq)) + 1.0
+        scores = self._vectors[:size] @ (vector * idf)
+        k = min(k, size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(row), float(scores[row])) for row in top if scores[row] > 0]
+
+class ArgumentIndex:
+    """Per-debate vector indexes over the transcript, shared by memory and agents
+
+    Row ``i`` of a debate's index is ``debate_history[i]``. ``sync`` embeds
+    only the entries added since the last call, so the memory node pays one
+    embedding per turn and a resumed debate catches up on first use.
+    """
+
+    def __init__(self, embedder: Optional[HashedTfEmbedder] = None):
+        self.embedder = embedder or HashedTfEmbedder(Config.RETRIEVAL_DIM)
+        self._indexes: Dict[str, VectorIndex] = {}
+        self._lock = threading.Lock()
+
+    def sync(self, debate_id: str, history: Sequence[Dict]) -> VectorIndex:
+        """Index any history entries not yet in this debate's index"""
+        with self._lock:
+            index = self._indexes.get(debate_id)
+            if index is None:
+                index = self._indexes[debate_id] = VectorIndex(self.embedder.dim)
+            for entry in history[len(index):]:
+                index.add(self.embedder.embed(entry["argument"]))
+            return index
+
+    def relevant(self, debate_id: str, history: Sequence[Dict], query: str, k: int,
+                 before: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Positions and scores of the k past arguments most similar to ``query``
+
+        Only ``history[:before]`` is searched, so callers can leave out turns
+        they already quote verbatim.
+        """
+        index = self.sync(debate_id, history)
+        with self._lock:
+            return index.search(self.embedder.embed(query), k, limit=before)
+
+    def discard(self, debate_id: str):
+        with self._lock:
+            self._indexes.pop(debate_id, None)
+
+_shared_index: Optional[ArgumentIndex] = None
+_shared_index_lock = threading.Lock()
+
+def get_argument_index() -> ArgumentIndex:
+    """Return the process-wide argument index, creating it on first use"""
+    global _shared_index
+    if _shared_index is None:
+        with _shared_index_lock:
+            if _shared_index is None:
+                _shared_index = ArgumentIndex()
+    return _shared_index